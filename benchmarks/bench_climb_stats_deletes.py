@@ -0,0 +1,83 @@
+"""
+Compare deleting retired climb_stats rows one statement at a time against the batched executemany delete.
+
+Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_climb_stats_deletes.py --page-size 5000 --delete-ratio 0.9
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import boardlib.db.aurora
+from tests.boardlib.db.sqlite_fixtures import create_database, sync_page
+
+
+def delete_rows_per_statement(connection, table_name, rows):
+    """
+    The previous implementation of the climb_stats deletes, kept for comparison.
+    """
+    for row in rows:
+        connection.execute(
+            f"DELETE FROM {table_name} WHERE climb_uuid = :climb_uuid AND angle = :angle",
+            row,
+        )
+
+
+def delete_rows_batched(connection, table_name, rows):
+    connection.executemany(
+        f"DELETE FROM {table_name} WHERE climb_uuid = :climb_uuid AND angle = :angle",
+        rows,
+    )
+
+
+def timed_deletes(database, delete_rows, rows, pages):
+    elapsed = 0
+    for _ in range(pages):
+        with sqlite3.connect(database) as connection:
+            # Refill the table so that every page deletes existing rows
+            boardlib.db.aurora.insert_rows_default(connection, "climb_stats", rows)
+            start = time.perf_counter()
+            delete_rows(connection, "climb_stats", rows)
+            elapsed += time.perf_counter() - start
+        connection.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=5000)
+    parser.add_argument("--delete-ratio", type=float, default=0.9)
+    args = parser.parse_args()
+
+    stats_rows = sync_page(0, args.page_size, args.delete_ratio)["climb_stats"]
+    delete_rows = [
+        row for row in stats_rows if row["difficulty_average"] is None
+    ]
+    for row in delete_rows:
+        row["display_difficulty"] = 1
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        database = os.path.join(temp_dir, "deletes.db")
+        create_database(database)
+        per_statement_time = timed_deletes(
+            database, delete_rows_per_statement, delete_rows, args.pages
+        )
+        batched_time = timed_deletes(
+            database, delete_rows_batched, delete_rows, args.pages
+        )
+
+    print(
+        f"{args.pages} pages of {args.page_size} climb_stats rows, "
+        f"{len(delete_rows)} deletes per page"
+    )
+    print(f"One DELETE per row:  {per_statement_time:.3f}s")
+    print(f"executemany DELETE:  {batched_time:.3f}s")
+    print(f"Speedup:             {per_statement_time / batched_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Compare the keyed-merge combine_ascents_and_bids against the original row-by-row implementation on a synthetic
+logbook.
+
+Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_combine_ascents_and_bids.py --entries 50000
+"""
+import argparse
+import time
+
+import pandas as pd
+
+import boardlib.api.aurora
+from tests.boardlib.api.logbook_fixtures import (
+    StubClimbLookup,
+    logbook_frames,
+    raw_logbook,
+    reference_combine_ascents_and_bids,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument(
+        "--skip-reference",
+        help="Only time the merge implementation",
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    lookup = StubClimbLookup()
+    ascents_df, bids_summary = logbook_frames(*raw_logbook(args.entries), lookup)
+    print(
+        f"{len(ascents_df)} ascents, {len(bids_summary)} summarized bids "
+        f"from {args.entries} synthetic entries"
+    )
+
+    start = time.perf_counter()
+    combined = boardlib.api.aurora.combine_ascents_and_bids(
+        ascents_df, bids_summary, None, lookup
+    )
+    merge_time = time.perf_counter() - start
+    print(f"Keyed merge:  {merge_time:.3f}s")
+    if args.skip_reference:
+        return
+
+    start = time.perf_counter()
+    reference = pd.DataFrame(
+        reference_combine_ascents_and_bids(ascents_df, bids_summary, lookup),
+        columns=boardlib.api.aurora.COMBINED_LOGBOOK_COLUMNS,
+    )
+    reference_time = time.perf_counter() - start
+    print(f"Row by row:   {reference_time:.3f}s")
+    print(f"Speedup:      {reference_time / merge_time:.1f}x")
+    print(
+        "Outputs equal:",
+        combined.to_csv(index=False) == reference.to_csv(index=False),
+    )
+
+
+if __name__ == "__main__":
+    main()
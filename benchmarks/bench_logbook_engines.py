@@ -0,0 +1,61 @@
+"""
+Compare the pandas and SQL logbook engines on a synthetic user store and board database.
+
+Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_logbook_engines.py --entries 50000
+"""
+import argparse
+import os
+import tempfile
+import time
+import unittest.mock
+
+import boardlib.api.aurora
+from tests.boardlib.api.logbook_fixtures import (
+    create_logbook_database,
+    create_user_store,
+    raw_logbook,
+)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=50000)
+    parser.add_argument("--climbs", type=int, default=20000)
+    args = parser.parse_args()
+
+    raw_ascents, raw_bids = raw_logbook(args.entries, climb_count=args.climbs)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = os.path.join(tmpdir, "board.sqlite3")
+        user_store = os.path.join(tmpdir, "user.sqlite3")
+        create_logbook_database(db_path, args.climbs)
+        create_user_store(user_store, raw_ascents, raw_bids)
+        print(f"{args.entries} stored entries over {args.climbs} climbs")
+
+        logbooks = {}
+        timings = {}
+        # Both engines read the same user store, without syncing it
+        with unittest.mock.patch("boardlib.api.aurora.sync_user_store"):
+            for engine in boardlib.api.aurora.LOGBOOK_ENGINES:
+                start = time.perf_counter()
+                logbooks[engine] = boardlib.api.aurora.logbook_entries(
+                    "kilter",
+                    None,
+                    db_path,
+                    user_store=user_store,
+                    user_id=1,
+                    engine=engine,
+                )
+                timings[engine] = time.perf_counter() - start
+                print(f"{engine:<8}{timings[engine]:.3f}s")
+
+    print(f"Speedup: {timings['pandas'] / timings['sql']:.1f}x")
+    print(
+        "Outputs equal:",
+        logbooks["pandas"].to_csv(index=False) == logbooks["sql"].to_csv(index=False),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Compare applying sync pages from their JSON text with SharedTablesWriter.write_json (SQLite's JSON functions) against
+decoding them with json.loads and writing the rows with SharedTablesWriter.write (executemany).
+
+Each page is written twice, to time both a first sync into an empty database and a repeated sync of unchanged rows.
+
+Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_sync_json.py --pages 50 --page-size 2000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+
+import boardlib.db.aurora
+from tests.boardlib.db.sqlite_fixtures import create_database, sync_page
+
+
+def write_decoded(writer, page_json):
+    writer.write(json.loads(page_json))
+
+
+def write_json(writer, page_json):
+    writer.write_json(page_json)
+
+
+def timed_syncs(database, write_page, pages_json):
+    """
+    :return: The seconds taken by the first sync and by the repeated sync.
+    """
+    elapsed = []
+    for _ in range(2):
+        with boardlib.db.aurora.SharedTablesWriter(database) as writer:
+            start = time.perf_counter()
+            for page_json in pages_json:
+                write_page(writer, page_json)
+            writer.commit()
+            elapsed.append(time.perf_counter() - start)
+    return elapsed
+
+
+def peak_python_memory(database, write_page, page_json):
+    """
+    :return: The peak bytes allocated by Python objects while writing one page.
+    """
+    with boardlib.db.aurora.SharedTablesWriter(database) as writer:
+        tracemalloc.start()
+        write_page(writer, page_json)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=2000)
+    parser.add_argument("--delete-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    pages_json = [
+        json.dumps(sync_page(page * args.page_size, args.page_size, args.delete_ratio))
+        for page in range(args.pages)
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        executemany_database = os.path.join(temp_dir, "executemany.db")
+        json_database = os.path.join(temp_dir, "json.db")
+        create_database(executemany_database)
+        create_database(json_database)
+
+        executemany_times = timed_syncs(executemany_database, write_decoded, pages_json)
+        json_times = timed_syncs(json_database, write_json, pages_json)
+        executemany_peak = peak_python_memory(
+            executemany_database, write_decoded, pages_json[0]
+        )
+        json_peak = peak_python_memory(json_database, write_json, pages_json[0])
+
+    print(f"{args.pages} pages of {args.page_size} rows per table")
+    for label, executemany_time, json_time in zip(
+        ("First sync", "Repeated sync"), executemany_times, json_times
+    ):
+        print(f"{label}:")
+        print(f"  json.loads + executemany:  {executemany_time:.3f}s")
+        print(f"  JSON1 write_json:          {json_time:.3f}s")
+        print(f"  Speedup:                   {executemany_time / json_time:.2f}x")
+    print("Peak Python memory per page:")
+    print(f"  json.loads + executemany:  {executemany_peak / 1e6:.1f} MB")
+    print(f"  JSON1 write_json:          {json_peak / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
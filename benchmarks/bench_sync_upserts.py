@@ -0,0 +1,78 @@
+"""
+Compare repeating a sync of unchanged rows with the change-aware upserts against INSERT OR REPLACE.
+
+The database is put in WAL mode without checkpoints, so the size of the WAL file after the repeated sync is the
+number of bytes of pages written.
+
+Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_sync_upserts.py --pages 50 --page-size 2000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+import unittest.mock
+
+import boardlib.db.aurora
+from tests.boardlib.db.sqlite_fixtures import create_database, sync_page
+
+
+def replace_sql(table_name, columns, conflict_columns):
+    """
+    The statement of the previous implementation of the inserters, kept for comparison.
+    """
+    value_params = ", ".join(f":{column}" for column in columns)
+    return f"INSERT OR REPLACE INTO {table_name} VALUES ({value_params})"
+
+
+def repeat_sync(database, pages):
+    """
+    :return: A (seconds, wal_bytes) tuple for writing pages which are already stored.
+    """
+    with boardlib.db.aurora.SharedTablesWriter(database) as writer:
+        for page in pages:
+            writer.write(page)
+
+    with boardlib.db.aurora.SharedTablesWriter(database) as writer:
+        writer.connection.execute("PRAGMA journal_mode = WAL")
+        writer.connection.execute("PRAGMA wal_autocheckpoint = 0")
+        start = time.perf_counter()
+        for page in pages:
+            writer.write(page)
+        writer.commit()
+        elapsed = time.perf_counter() - start
+        wal_bytes = os.path.getsize(f"{database}-wal")
+        writer.connection.execute("PRAGMA journal_mode = DELETE")
+    return elapsed, wal_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--page-size", type=int, default=2000)
+    args = parser.parse_args()
+
+    pages = [
+        sync_page(page * args.page_size, args.page_size)
+        for page in range(args.pages)
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        replace_database = os.path.join(temp_dir, "replace.db")
+        upsert_database = os.path.join(temp_dir, "upsert.db")
+        for database in (replace_database, upsert_database):
+            create_database(database)
+            boardlib.db.aurora.optimize_database(database)
+
+        with unittest.mock.patch("boardlib.db.aurora.upsert_sql", replace_sql):
+            replace_time, replace_bytes = repeat_sync(replace_database, pages)
+        upsert_time, upsert_bytes = repeat_sync(upsert_database, pages)
+
+    print(f"Repeated sync of {args.pages} pages of {args.page_size} unchanged rows per table")
+    print(f"INSERT OR REPLACE:  {replace_time:.3f}s, {replace_bytes / 1e6:.1f} MB written")
+    print(f"Upsert:             {upsert_time:.3f}s, {upsert_bytes / 1e6:.1f} MB written")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compare applying sync pages with sync_shared_tables (one connection per page) against SharedTablesWriter, in its
+default and bulk-load modes.
+
+Run from the repository root:
+
+    PYTHONPATH=src:. python benchmarks/bench_sync_writer.py --pages 100 --page-size 500 --indexed
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import boardlib.db.aurora
+from tests.boardlib.db.sqlite_fixtures import create_database, sync_page
+
+
+def run_per_page_connections(database, pages):
+    for page in pages:
+        boardlib.db.aurora.sync_shared_tables(database, page)
+
+
+def run_writer(database, pages, commit_pages, bulk_load=False):
+    with boardlib.db.aurora.SharedTablesWriter(
+        database, commit_pages=commit_pages, bulk_load=bulk_load
+    ) as writer:
+        for page in pages:
+            writer.write(page)
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--page-size", type=int, default=500)
+    parser.add_argument(
+        "--commit-pages",
+        type=int,
+        default=boardlib.db.aurora.DEFAULT_SYNC_COMMIT_PAGES,
+    )
+    parser.add_argument(
+        "--indexed",
+        help="Create the indexes of optimize_database before syncing",
+        action="store_true",
+    )
+    args = parser.parse_args()
+
+    pages = [
+        sync_page(page * args.page_size, args.page_size)
+        for page in range(args.pages)
+    ]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        per_page_database = os.path.join(temp_dir, "per_page.db")
+        writer_database = os.path.join(temp_dir, "writer.db")
+        bulk_database = os.path.join(temp_dir, "bulk.db")
+        for database in (per_page_database, writer_database, bulk_database):
+            create_database(database)
+            if args.indexed:
+                boardlib.db.aurora.optimize_database(database)
+
+        per_page_time = timed(run_per_page_connections, per_page_database, pages)
+        writer_time = timed(run_writer, writer_database, pages, args.commit_pages)
+        bulk_time = timed(
+            run_writer, bulk_database, pages, args.commit_pages, True
+        )
+
+    print(f"{args.pages} pages of {args.page_size} rows per table")
+    print(f"sync_shared_tables:  {per_page_time:.3f}s")
+    print(f"SharedTablesWriter:  {writer_time:.3f}s")
+    print(f"Speedup:             {per_page_time / writer_time:.2f}x")
+    print(f"Bulk-load writer:    {bulk_time:.3f}s")
+    print(f"Bulk-load speedup:   {writer_time / bulk_time:.2f}x over SharedTablesWriter")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,21 @@
 import argparse
+import concurrent.futures
 import csv
 import getpass
+import importlib.util
+import itertools
 import os
 import pathlib
 import sys
+import time
+
+import pandas as pd
 
 import boardlib.api.aurora
 import boardlib.api.moon
 import boardlib.db.aurora
+import boardlib.util.http
+import boardlib.util.pipeline
 
 
 LOGBOOK_FIELDS = (
@@ -26,6 +34,14 @@ LOGBOOK_FIELDS = (
     "is_ascent",
     "comment",
 )
+EXPORT_CHUNK_SIZE = 10000
+LOGBOOK_FORMATS = ("csv", "parquet", "feather", "ndjson")
+COLUMNAR_FORMATS = ("parquet", "feather")
+BULK_LOAD_MODES = ("auto", "on", "off")
+LOGBOOK_BOOLEAN_FIELDS = ("is_benchmark", "is_mirror", "is_repeat", "is_ascent")
+LOGBOOK_INTEGER_FIELDS = ("angle", "sessions_count", "tries_total")
+LOGBOOK_CATEGORY_FIELDS = ("board", "logged_grade", "displayed_grade")
+LOGBOOK_STRING_FIELDS = ("climb_name", "comment")
 
 
 def logbook_entries(board, username, password, database=None):
@@ -42,13 +58,138 @@ def logbook_entries(board, username, password, database=None):
 
 
 def write_entries(output_file, entries, no_headers=False, fields=LOGBOOK_FIELDS):
-    cleaned_entries = (
-        {k: v for k, v in entry.items() if k in fields} for entry in entries
-    )
-    writer = csv.DictWriter(output_file, fieldnames=fields)
+    # Fields outside of the given fields are skipped by the writer, without copying each entry
+    writer = csv.DictWriter(output_file, fieldnames=fields, extrasaction="ignore")
     if not no_headers:
         writer.writeheader()
-    writer.writerows(cleaned_entries)
+    writer.writerows(entries)
+
+
+def write_entries_frame(
+    output_file,
+    entries_df,
+    no_headers=False,
+    fields=LOGBOOK_FIELDS,
+    chunk_size=EXPORT_CHUNK_SIZE,
+):
+    """
+    Write a DataFrame of logbook entries as CSV, chunk by chunk from its columns, without building a record per row.
+    """
+    entries_df = entries_df.reindex(columns=list(fields))
+    if entries_df.empty and not no_headers:
+        csv.writer(output_file).writerow(fields)
+
+    for start in range(0, len(entries_df), chunk_size):
+        entries_df.iloc[start : start + chunk_size].to_csv(
+            output_file,
+            header=start == 0 and not no_headers,
+            index=False,
+            date_format="%Y-%m-%d %H:%M:%S",
+            lineterminator="\r\n",
+        )
+
+
+def typed_logbook_frame(entries, fields=LOGBOOK_FIELDS):
+    """
+    Build a DataFrame of logbook entries with typed columns: datetime dates, nullable booleans and integers,
+    categorical grades and strings. Tries are integers, or strings for the Moonboard, which logs them as text (e.g.
+    "4+"). The type of tries depends only on the board, not on the values, so every chunk of an export gets the same
+    type.
+
+    :param entries: A DataFrame or an iterable of logbook entry dictionaries.
+    :param fields: The columns to keep. Fields missing from the entries become empty columns.
+    """
+    if not isinstance(entries, pd.DataFrame):
+        entries = pd.DataFrame.from_records(list(entries))
+    logbook_df = entries.reindex(columns=list(fields)).reset_index(drop=True)
+
+    if "date" in logbook_df:
+        logbook_df["date"] = pd.to_datetime(logbook_df["date"])
+    if "tries" in logbook_df:
+        if "board" in logbook_df and any(
+            str(board).startswith("moon") for board in logbook_df["board"].unique()
+        ):
+            logbook_df["tries"] = logbook_df["tries"].astype("string")
+        else:
+            logbook_df["tries"] = pd.to_numeric(logbook_df["tries"]).astype("Int64")
+    for field_types, dtype in (
+        (LOGBOOK_BOOLEAN_FIELDS, "boolean"),
+        (LOGBOOK_INTEGER_FIELDS, "Int64"),
+        (LOGBOOK_CATEGORY_FIELDS, "category"),
+        (LOGBOOK_STRING_FIELDS, "string"),
+    ):
+        for field in field_types:
+            if field in logbook_df:
+                logbook_df[field] = logbook_df[field].astype(dtype)
+    return logbook_df
+
+
+def iter_entry_chunks(entries, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    :param entries: A DataFrame or an iterable of logbook entry dictionaries.
+    :return: An iterator of DataFrame slices or lists of at most chunk_size entries.
+    """
+    if isinstance(entries, pd.DataFrame):
+        for start in range(0, len(entries), chunk_size):
+            yield entries.iloc[start : start + chunk_size]
+        return
+
+    entries = iter(entries)
+    while True:
+        chunk = list(itertools.islice(entries, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def write_entries_ndjson(
+    output_file, entries, fields=LOGBOOK_FIELDS, chunk_size=EXPORT_CHUNK_SIZE
+):
+    """
+    Write logbook entries as newline delimited JSON, one typed chunk at a time. Dates are written in ISO 8601 format.
+    """
+    for chunk in iter_entry_chunks(entries, chunk_size):
+        output_file.write(
+            typed_logbook_frame(chunk, fields).to_json(
+                orient="records", lines=True, date_format="iso", date_unit="s"
+            )
+        )
+
+
+def write_logbook_columnar(output_path, entries, output_format, fields=LOGBOOK_FIELDS):
+    """
+    Write logbook entries with typed columns to a Parquet or Feather file. Requires pyarrow.
+    """
+    logbook_df = typed_logbook_frame(entries, fields)
+    if output_format == "parquet":
+        logbook_df.to_parquet(output_path, index=False)
+    elif output_format == "feather":
+        logbook_df.to_feather(output_path)
+    else:
+        raise ValueError(f"Unknown columnar format {output_format}")
+
+
+def write_logbook_file(
+    output_path, entries, output_format="csv", no_headers=False, fields=LOGBOOK_FIELDS
+):
+    if output_format in COLUMNAR_FORMATS:
+        write_logbook_columnar(output_path, entries, output_format, fields=fields)
+    else:
+        with open(output_path, "w", encoding="utf-8") as output_file:
+            write_logbook(
+                output_file, entries, no_headers, fields=fields, output_format=output_format
+            )
+
+
+def write_logbook(
+    output_file, entries, no_headers=False, fields=LOGBOOK_FIELDS, output_format="csv"
+):
+    if output_format == "ndjson":
+        write_entries_ndjson(output_file, entries, fields)
+    elif isinstance(entries, pd.DataFrame):
+        write_entries_frame(output_file, entries, no_headers, fields)
+    else:
+        write_entries(output_file, entries, no_headers, fields)
 
 
 def get_password(board):
@@ -59,79 +200,270 @@ def get_password(board):
     return password
 
 
-def get_aurora_login_token(board, username):
-    password = get_password(board)
-    login_info = boardlib.api.aurora.login(board, username, password)
-    return login_info["token"]
+def get_aurora_login(board, username, session=None, password=None):
+    if password is None:
+        password = get_password(board)
+    return boardlib.api.aurora.login(board, username, password, session)
+
+
+def get_aurora_login_token(board, username, session=None, password=None):
+    return get_aurora_login(board, username, session, password)["token"]
+
+
+def download_progress_printer(log_prefix=""):
+    """
+    :return: A download_database progress callback which prints a line at every 10% of each stage.
+    """
+    reported = {}
+
+    def print_progress(stage, bytes_done, total_bytes):
+        if total_bytes:
+            step = bytes_done * 10 // total_bytes
+            progress = f"{step * 10}%"
+        else:
+            step = bytes_done // (10 * 1024 * 1024)
+            progress = f"{bytes_done // (1024 * 1024)} MiB"
+        if reported.get(stage) != step:
+            reported[stage] = step
+            print(f"{log_prefix}{stage.capitalize()}: {progress}")
+
+    return print_progress
+
+
+def sync_database(board, database_path, token, args, session, log_prefix=""):
+    tables_and_sync_dates = boardlib.db.aurora.get_shared_syncs(database_path)
+    bulk_load = args.bulk_load == "on" or (
+        args.bulk_load == "auto"
+        and boardlib.db.aurora.is_bulk_load_needed(tables_and_sync_dates)
+    )
+    if bulk_load:
+        print(f"{log_prefix}Synchronizing in bulk-load mode")
+    row_counts_totals = {}
+    with boardlib.db.aurora.SharedTablesWriter(
+        database_path, commit_pages=args.commit_pages, bulk_load=bulk_load
+    ) as writer:
+        sync_results = boardlib.api.aurora.sync(
+            board,
+            tables_and_sync_dates,
+            token=token,
+            max_pages=args.max_sync_pages,
+            session=session,
+            stream=args.stream,
+            raw=args.json1,
+        )
+        if args.pipelined:
+            # Fetch the next pages in the background while the current page is written
+            sync_results = boardlib.util.pipeline.prefetch(sync_results)
+
+        for sync_result in sync_results:
+            row_counts = (
+                writer.write_json(sync_result)
+                if args.json1
+                else writer.write(sync_result)
+            )
+            boardlib.db.aurora.add_row_counts(row_counts_totals, row_counts)
+            for table_name, table_row_counts in row_counts.items():
+                print(
+                    f"{log_prefix}Synchronized page of {table_name}. "
+                    f"Page: {format_row_counts(table_row_counts)}. "
+                    f"Cumulative: {format_row_counts(row_counts_totals[table_name])}"
+                )
+    return row_counts_totals
+
+
+def format_row_counts(row_counts):
+    return ", ".join(f"{count} {key}" for key, count in row_counts.items())
+
+
+def check_sync_modes(args):
+    if args.json1 and args.stream:
+        print("boardlib: error: --json1 cannot be combined with --stream")
+        return False
+    return True
 
 
 def handle_database_command(args):
     if os.path.isdir(args.database_path):
         print("boardlib: error: download path should be a file, not a folder.")
         return
+    if not check_sync_modes(args):
+        return
 
+    session = boardlib.util.http.create_session()
     if not args.database_path.exists():
         args.database_path.parent.mkdir(parents=True, exist_ok=True)
         print(f"Downloading database to {args.database_path}")
-        boardlib.db.aurora.download_database(args.board, args.database_path)
-
-    if not args.username:
+        sha256 = boardlib.db.aurora.download_database(
+            args.board,
+            args.database_path,
+            session=session,
+            progress_callback=download_progress_printer(),
+        )
+        print(f"Database SHA-256: {sha256}")
+
+    if args.username:
+        print(f"Synchronizing database at {args.database_path}")
+        sync_database(
+            args.board,
+            args.database_path,
+            get_aurora_login_token(args.board, args.username, session),
+            args,
+            session,
+        )
+    else:
         print("No username provided, skipping database synchronization.")
-        return
-    
-    print(f"Synchronizing database at {args.database_path}")
-    tables_and_sync_dates = boardlib.db.aurora.get_shared_syncs(args.database_path)
-    row_counts_totals = {}
-    for sync_result in boardlib.api.aurora.sync(
-        args.board,
-        tables_and_sync_dates,
-        token=get_aurora_login_token(args.board, args.username),
-        max_pages=args.max_sync_pages,
-    ):
-        row_counts = boardlib.db.aurora.sync_shared_tables(
-            args.database_path, sync_result
+
+    if args.optimize:
+        optimize_database(args.database_path, args.vacuum)
+
+
+def optimize_database(database_path, vacuum=False):
+    print(f"Optimizing database at {database_path}")
+    created_indexes = boardlib.db.aurora.optimize_database(database_path, vacuum)
+    if created_indexes:
+        print(f"Created indexes: {', '.join(created_indexes)}")
+    for query_name, scans in boardlib.db.aurora.check_query_plans(
+        database_path
+    ).items():
+        print(f"Warning: {query_name} scans without an index: {'; '.join(scans)}")
+
+
+def check_output_format(output_format):
+    if output_format in COLUMNAR_FORMATS and importlib.util.find_spec("pyarrow") is None:
+        print(
+            f"boardlib: error: --format={output_format} requires pyarrow. "
+            "Install it with: pip install boardlib[arrow]"
         )
-        for table_name, row_count in row_counts.items():
-            row_counts_totals[table_name] = (
-                row_counts_totals.get(table_name, 0) + row_count
-            )
-            print(
-                f"Synchronized page of {table_name}. Page size: {row_count}. Cumulative: {row_counts_totals[table_name]}"
-            )
+        return False
+    return True
 
 
 def handle_logbook_command(args):
+    if args.format in COLUMNAR_FORMATS and not args.output:
+        print(f"boardlib: error: -o/--output is required for --format={args.format}")
+        return
+    if not check_output_format(args.format):
+        return
+
     if args.board.startswith("moon"):
         entries = boardlib.api.moon.logbook_entries(
-            args.board, args.username, get_password(args.board)
+            args.board,
+            args.username,
+            get_password(args.board),
+            session_cache=args.session_cache,
         )
     else:
         if not args.database_path or not args.database_path.exists():
             print(f"boardlib: error: valid -d/--database-path is required for {args.board}")
             return
+        if args.engine == "sql" and not args.user_store:
+            print("boardlib: error: --user-store is required for --engine=sql")
+            return
         
-        token = get_aurora_login_token(args.board, args.username)
-        entries = boardlib.api.aurora.logbook_entries(args.board, token, args.database_path).to_dict(orient="records")
+        session = boardlib.util.http.create_session()
+        login_info = get_aurora_login(args.board, args.username, session)
+        entries = boardlib.api.aurora.logbook_entries(
+            args.board,
+            login_info["token"],
+            args.database_path,
+            session,
+            user_store=args.user_store,
+            user_id=login_info.get("user_id"),
+            engine=args.engine,
+        )
 
     if args.output:
-        with open(args.output, "w", encoding="utf-8") as output_file:
-            write_entries(
-                output_file,
-                entries,
-                args.no_headers,
-                fields=LOGBOOK_FIELDS,
-            )
+        write_logbook_file(
+            args.output,
+            entries,
+            args.format,
+            args.no_headers,
+            fields=LOGBOOK_FIELDS,
+        )
     else:
         sys.stdout.reconfigure(encoding="utf-8")
-        write_entries(
+        write_logbook(
             sys.stdout,
             entries,
             args.no_headers,
             fields=LOGBOOK_FIELDS,
+            output_format=args.format,
+        )
+
+
+def read_batch_credentials(args):
+    """
+    :return: A list of (username, password) pairs from --users and --users-file. Passwords missing from the users
+        file are asked for.
+    """
+    credentials = []
+    if args.users_file:
+        with open(args.users_file, encoding="utf-8", newline="") as users_file:
+            for row in csv.DictReader(users_file):
+                credentials.append((row["username"], row.get("password") or None))
+    credentials.extend((username, None) for username in args.users or ())
+
+    return [
+        (username, password or getpass.getpass(f"Password for {username}: "))
+        for username, password in credentials
+    ]
+
+
+def handle_logbook_batch_command(args):
+    if not args.database_path.exists():
+        print(f"boardlib: error: valid -d/--database-path is required for {args.board}")
+        return
+    if not args.output_directory and not args.combined:
+        print("boardlib: error: one of -o/--output-directory or --combined is required")
+        return
+    if not check_output_format(args.format):
+        return
+
+    credentials = read_batch_credentials(args)
+    with boardlib.db.aurora.ReadOnlyDatabase(args.database_path) as database:
+        logbooks, failures = boardlib.api.aurora.batch_logbook_entries(
+            args.board,
+            credentials,
+            database,
+            max_workers=args.jobs,
+            user_store=args.user_store,
         )
+    for username, error in failures.items():
+        print(f"{username}: failed to download logbook: {error}")
+
+    if args.output_directory:
+        args.output_directory.mkdir(parents=True, exist_ok=True)
+        for username, logbook_df in logbooks.items():
+            output_path = args.output_directory / f"{username}.{args.format}"
+            write_logbook_file(output_path, logbook_df, args.format, args.no_headers)
+            print(f"{username}: {len(logbook_df)} entries written to {output_path}")
+
+    if args.combined:
+        combined_df = (
+            pd.concat(
+                [
+                    logbook_df.assign(username=username)
+                    for username, logbook_df in logbooks.items()
+                ],
+                ignore_index=True,
+            )
+            if logbooks
+            else pd.DataFrame()
+        )
+        write_logbook_file(
+            args.combined,
+            combined_df,
+            args.format,
+            args.no_headers,
+            fields=("username",) + LOGBOOK_FIELDS,
+        )
+        print(f"{len(combined_df)} entries of {len(logbooks)} users written to {args.combined}")
 
 
 def handle_download_all_command(args):
+    if not check_sync_modes(args):
+        return
+
     output_dir = args.output_directory
     output_dir.mkdir(parents=True, exist_ok=True)
     print(f"Downloading all Aurora databases and images to {output_dir}")
@@ -140,60 +472,211 @@ def handle_download_all_command(args):
     if args.boards:
         boards = tuple(args.boards)
 
-    for board in boards:
-        db_path = output_dir / f"{board}.db"
+    # Ask for any passwords up front, before the boards are processed in parallel
+    passwords = (
+        {board: get_password(board) for board in boards} if args.username else {}
+    )
 
-        # Download / sync the database
-        if not db_path.exists():
-            print(f"\n[{board}] Downloading database to {db_path}")
-            boardlib.db.aurora.download_database(board, db_path)
-        else:
-            print(f"\n[{board}] Database already exists at {db_path}, skipping download")
-
-        if args.username:
-            print(f"[{board}] Synchronizing database at {db_path}")
-            try:
-                token = get_aurora_login_token(board, args.username)
-                tables_and_sync_dates = boardlib.db.aurora.get_shared_syncs(db_path)
-                row_counts_totals = {}
-                for sync_result in boardlib.api.aurora.sync(
-                    board,
-                    tables_and_sync_dates,
-                    token=token,
-                    max_pages=args.max_sync_pages,
-                ):
-                    row_counts = boardlib.db.aurora.sync_shared_tables(
-                        db_path, sync_result
-                    )
-                    for table_name, row_count in row_counts.items():
-                        row_counts_totals[table_name] = (
-                            row_counts_totals.get(table_name, 0) + row_count
-                        )
-                        print(
-                            f"[{board}] Synchronized page of {table_name}. "
-                            f"Page size: {row_count}. Cumulative: {row_counts_totals[table_name]}"
-                        )
-            except Exception as e:
-                print(f"[{board}] Warning: sync failed: {e}")
-
-        # Download images
-        if not args.skip_images:
-            images_dir = output_dir / f"{board}-images"
-            images_dir.mkdir(parents=True, exist_ok=True)
-            print(f"[{board}] Downloading images to {images_dir}")
-            try:
-                boardlib.api.aurora.download_images(board, db_path, images_dir, args.composite)
-                print(f"[{board}] Images downloaded successfully")
-            except Exception as e:
-                print(f"[{board}] Warning: image download failed: {e}")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+        summaries = list(
+            executor.map(
+                lambda board: download_board(board, args, passwords.get(board)),
+                boards,
+            )
+        )
 
+    print()
+    print_summary_table(
+        summaries, ("board", "database", "synced_rows", "images", "seconds")
+    )
     print("\nDone.")
 
 
+def download_board(board, args, password=None):
+    """
+    Download, synchronize and download the images for one board of the download-all command.
+
+    :return: A summary of the results for each step.
+    """
+    start_time = time.perf_counter()
+    log_prefix = f"[{board}] "
+    summary = {"board": board, "database": "", "synced_rows": "-", "images": "-"}
+    db_path = args.output_directory / f"{board}.db"
+    session = create_image_session(args)
+
+    # Download / sync the database
+    if not db_path.exists():
+        print(f"{log_prefix}Downloading database to {db_path}")
+        try:
+            sha256 = boardlib.db.aurora.download_database(
+                board,
+                db_path,
+                session=session,
+                progress_callback=download_progress_printer(log_prefix),
+            )
+        except Exception as e:
+            print(f"{log_prefix}Warning: database download failed: {e}")
+            summary["database"] = "failed"
+            summary["seconds"] = f"{time.perf_counter() - start_time:.1f}"
+            return summary
+
+        print(f"{log_prefix}Database SHA-256: {sha256}")
+        summary["database"] = "downloaded"
+    else:
+        print(f"{log_prefix}Database already exists at {db_path}, skipping download")
+        summary["database"] = "existing"
+
+    if args.username:
+        print(f"{log_prefix}Synchronizing database at {db_path}")
+        try:
+            token = get_aurora_login_token(board, args.username, session, password)
+            row_counts_totals = sync_database(
+                board, db_path, token, args, session, log_prefix
+            )
+            summary["synced_rows"] = sum(
+                table_row_counts.get(key, 0)
+                for table_row_counts in row_counts_totals.values()
+                for key in boardlib.db.aurora.CHANGED_ROW_COUNT_KEYS
+            )
+        except Exception as e:
+            print(f"{log_prefix}Warning: sync failed: {e}")
+            summary["synced_rows"] = "failed"
+
+    # Download images
+    if not args.skip_images:
+        images_dir = args.output_directory / f"{board}-images"
+        images_dir.mkdir(parents=True, exist_ok=True)
+        print(f"{log_prefix}Downloading images to {images_dir}")
+        try:
+            failures = boardlib.api.aurora.download_images(
+                board,
+                db_path,
+                images_dir,
+                args.composite,
+                session=session,
+                concurrency=args.concurrency,
+                refresh=args.refresh,
+                log_prefix=log_prefix,
+            )
+            report_image_failures(failures, log_prefix)
+            summary["images"] = f"{len(failures)} failed" if failures else "ok"
+        except Exception as e:
+            print(f"{log_prefix}Warning: image download failed: {e}")
+            summary["images"] = "failed"
+
+    summary["seconds"] = f"{time.perf_counter() - start_time:.1f}"
+    return summary
+
+
+def print_summary_table(rows, columns):
+    widths = {
+        column: max(len(column), *(len(str(row[column])) for row in rows))
+        for column in columns
+    }
+    lines = [
+        columns,
+        ["-" * widths[column] for column in columns],
+        *([str(row[column]) for column in columns] for row in rows),
+    ]
+    for line in lines:
+        print(
+            "  ".join(
+                value.ljust(widths[column]) for column, value in zip(columns, line)
+            ).rstrip()
+        )
+
+
 def handle_images_command(args):
     print(f"Downloading images for {args.board} to {args.output_directory}")
-    boardlib.api.aurora.download_images(args.board, args.database_path, args.output_directory, args.composite)
-    print("Images downloaded successfully")
+    session = create_image_session(args)
+    failures = boardlib.api.aurora.download_images(
+        args.board,
+        args.database_path,
+        args.output_directory,
+        args.composite,
+        session=session,
+        concurrency=args.concurrency,
+        refresh=args.refresh,
+    )
+    report_image_failures(failures)
+
+
+def create_image_session(args):
+    # Keep enough connections alive for every download worker
+    return boardlib.util.http.create_session(
+        pool_size=max(boardlib.util.http.DEFAULT_POOL_SIZE, args.concurrency)
+    )
+
+
+def report_image_failures(failures, log_prefix=""):
+    if not failures:
+        print(f"{log_prefix}Images downloaded successfully")
+        return
+
+    print(f"{log_prefix}Warning: {len(failures)} images failed to download:")
+    for image_filename, error in failures.items():
+        print(f"{log_prefix}  {image_filename}: {error}")
+
+
+def positive_int(value):
+    """
+    An argparse type for counts which must be at least 1.
+    """
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}")
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {count}")
+    return count
+
+
+def add_sync_arguments(parser):
+    """
+    Add the options controlling how sync pages are downloaded and written, shared by the commands which sync a board
+    database.
+    """
+    parser.add_argument(
+        "--commit-pages",
+        help=(
+            "Number of sync pages to write between database commits. "
+            f"Defaults to {boardlib.db.aurora.DEFAULT_SYNC_COMMIT_PAGES}."
+        ),
+        type=int,
+        default=boardlib.db.aurora.DEFAULT_SYNC_COMMIT_PAGES,
+    )
+    parser.add_argument(
+        "--bulk-load",
+        help=(
+            "Write the sync in bulk-load mode: WAL journaling, large transactions, and non-unique indexes rebuilt "
+            "after the load. 'auto' uses it when the database was last synchronized more than "
+            f"{boardlib.db.aurora.BULK_LOAD_SYNC_AGE.days} days ago. Defaults to auto."
+        ),
+        choices=BULK_LOAD_MODES,
+        default="auto",
+    )
+    parser.add_argument(
+        "--json1",
+        help=(
+            "Write each sync page with SQLite's JSON functions from the raw response, without decoding its rows in "
+            "Python. Cannot be combined with --stream"
+        ),
+        action="store_true",
+        required=False,
+    )
+    sync_mode_group = parser.add_mutually_exclusive_group()
+    sync_mode_group.add_argument(
+        "--pipelined",
+        help="Download the next sync pages while the current page is being written to the database",
+        action="store_true",
+        required=False,
+    )
+    sync_mode_group.add_argument(
+        "--stream",
+        help="Decode sync pages incrementally, writing rows in batches instead of loading each page into memory",
+        action="store_true",
+        required=False,
+    )
 
 
 def add_database_parser(subparsers):
@@ -222,12 +705,29 @@ def add_database_parser(subparsers):
         type=int,
         default=boardlib.api.aurora.DEFAULT_MAX_SYNC_PAGES,
     )
+    add_sync_arguments(database_parser)
+    database_parser.add_argument(
+        "--optimize",
+        help=(
+            "After synchronizing, create the indexes used by boardlib's lookups and run ANALYZE. "
+            "Warns about any lookup which still scans a whole table."
+        ),
+        action="store_true",
+        required=False,
+    )
+    database_parser.add_argument(
+        "--vacuum",
+        help="With --optimize, also VACUUM the database, rewriting the file to reclaim free pages",
+        action="store_true",
+        required=False,
+    )
     database_parser.set_defaults(func=handle_database_command)
 
 
 def add_logbook_parser(subparsers):
     logbook_parser = subparsers.add_parser(
-        "logbook", help="Download full logbook entries (ascents and bids) to CSV"
+        "logbook",
+        help="Download full logbook entries (ascents and bids) to CSV, Parquet, Feather or NDJSON",
     )
     logbook_parser.add_argument(
         "board",
@@ -249,9 +749,115 @@ def add_logbook_parser(subparsers):
     logbook_parser.add_argument(
         "--no-headers", help="Don't write headers", action="store_true", required=False
     )
+    logbook_parser.add_argument(
+        "--format",
+        help=(
+            "Output format. 'parquet' and 'feather' write typed columns and require -o/--output and pyarrow. "
+            "'ndjson' writes one JSON object per line."
+        ),
+        choices=LOGBOOK_FORMATS,
+        default="csv",
+    )
+    logbook_parser.add_argument(
+        "--user-store",
+        help=(
+            "Path for a local store of your ascents and bids, created on first use. Later runs only download what "
+            "changed since the previous run. Use one store per board. Aurora-based boards only."
+        ),
+        type=pathlib.Path,
+        required=False,
+    )
+    logbook_parser.add_argument(
+        "--session-cache",
+        help=(
+            "Path of a file to keep the Moonboard login session in, so later runs can skip logging in again while "
+            "the session is valid. Moonboard only."
+        ),
+        type=pathlib.Path,
+        required=False,
+    )
+    logbook_parser.add_argument(
+        "--engine",
+        help=(
+            "How to build the logbook of Aurora-based boards: 'pandas' (default) or 'sql', which builds it with a "
+            "single query over the user store and the database. 'sql' requires --user-store."
+        ),
+        choices=boardlib.api.aurora.LOGBOOK_ENGINES,
+        default="pandas",
+    )
     logbook_parser.set_defaults(func=handle_logbook_command)
 
 
+def add_logbook_batch_parser(subparsers):
+    logbook_batch_parser = subparsers.add_parser(
+        "logbook-batch",
+        help="Download the logbooks of several users of the same Aurora-based board",
+    )
+    logbook_batch_parser.add_argument(
+        "board",
+        help="Board name",
+        choices=sorted(boardlib.api.aurora.HOST_BASES.keys()),
+    )
+    logbook_batch_parser.add_argument(
+        "-d", "--database-path",
+        help="Path for the database file. Run the 'database' command first to download the database.",
+        type=pathlib.Path,
+        required=True,
+    )
+    logbook_batch_parser.add_argument(
+        "--users",
+        help="Usernames to download logbooks for. Passwords are asked for.",
+        nargs="+",
+        required=False,
+    )
+    logbook_batch_parser.add_argument(
+        "--users-file",
+        help=(
+            "CSV file with a 'username' column and an optional 'password' column. Missing passwords are asked for."
+        ),
+        type=pathlib.Path,
+        required=False,
+    )
+    logbook_batch_parser.add_argument(
+        "-o", "--output-directory",
+        help="Directory to write one logbook file per user to, named after the username",
+        type=pathlib.Path,
+        required=False,
+    )
+    logbook_batch_parser.add_argument(
+        "--combined",
+        help="File to write the logbooks of all users to, with an additional username column",
+        type=pathlib.Path,
+        required=False,
+    )
+    logbook_batch_parser.add_argument(
+        "--format",
+        help="Output format. 'parquet' and 'feather' require pyarrow.",
+        choices=LOGBOOK_FORMATS,
+        default="csv",
+    )
+    logbook_batch_parser.add_argument(
+        "--no-headers", help="Don't write headers", action="store_true", required=False
+    )
+    logbook_batch_parser.add_argument(
+        "--user-store",
+        help="Path for a local store of the users' ascents and bids, so later runs only download what changed",
+        type=pathlib.Path,
+        required=False,
+    )
+    logbook_batch_parser.add_argument(
+        "-j",
+        "--jobs",
+        help=(
+            "Number of users to download at once. "
+            f"Defaults to {boardlib.api.aurora.DEFAULT_BATCH_WORKERS}."
+        ),
+        type=int,
+        default=boardlib.api.aurora.DEFAULT_BATCH_WORKERS,
+    )
+    logbook_batch_parser.set_defaults(func=handle_logbook_batch_command)
+
+
 def add_images_parser(subparsers):
     images_parser = subparsers.add_parser(
         "images", help="Download all images for a board"
@@ -279,6 +885,18 @@ def add_images_parser(subparsers):
         help="Build composite layout images for each board layout.",
         required = False
     )
+    images_parser.add_argument(
+        "--concurrency",
+        help=f"Number of images to download at once. Defaults to {boardlib.api.aurora.DEFAULT_IMAGE_CONCURRENCY}.",
+        type=positive_int,
+        default=boardlib.api.aurora.DEFAULT_IMAGE_CONCURRENCY,
+    )
+    images_parser.add_argument(
+        "--refresh",
+        help="Check previously downloaded images with the server and download any which have changed",
+        action="store_true",
+        required=False,
+    )
     images_parser.set_defaults(func=handle_images_command)
 
 
@@ -311,6 +929,7 @@ def add_download_all_parser(subparsers):
         type=int,
         default=boardlib.api.aurora.DEFAULT_MAX_SYNC_PAGES,
     )
+    add_sync_arguments(download_all_parser)
     download_all_parser.add_argument(
         "--skip-images",
         help="Skip downloading images",
@@ -323,6 +942,25 @@ def add_download_all_parser(subparsers):
         help="Build composite layout images for each board layout.",
         required=False,
     )
+    download_all_parser.add_argument(
+        "--concurrency",
+        help=f"Number of images to download at once. Defaults to {boardlib.api.aurora.DEFAULT_IMAGE_CONCURRENCY}.",
+        type=positive_int,
+        default=boardlib.api.aurora.DEFAULT_IMAGE_CONCURRENCY,
+    )
+    download_all_parser.add_argument(
+        "--refresh",
+        help="Check previously downloaded images with the server and download any which have changed",
+        action="store_true",
+        required=False,
+    )
+    download_all_parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Number of boards to process in parallel. Defaults to 1.",
+        type=int,
+        default=1,
+    )
     download_all_parser.set_defaults(func=handle_download_all_command)
 
 
@@ -330,6 +968,7 @@ def main():
     parser = argparse.ArgumentParser()
     subparsers = parser.add_subparsers(dest="command", required=True)
     add_logbook_parser(subparsers)
+    add_logbook_batch_parser(subparsers)
     add_database_parser(subparsers)
     add_images_parser(subparsers)
     add_download_all_parser(subparsers)
@@ -1,16 +1,47 @@
+import concurrent.futures
+import contextlib
 import datetime
+import email.utils
+import hashlib
+import json
 import os
+import tempfile
+import threading
 import uuid
 
 import requests
 import pandas as pd
 
 import boardlib.db.aurora
+import boardlib.util.http
 import boardlib.util.images
+import boardlib.util.jsonstream
 
 
 BASE_SYNC_DATE = "1970-01-01 00:00:00.000000"
 DEFAULT_MAX_SYNC_PAGES = 100
+SYNC_STREAM_CHUNK_SIZE = 64 * 1024
+DEFAULT_IMAGE_CONCURRENCY = 8
+IMAGE_CHUNK_SIZE = 64 * 1024
+IMAGE_MANIFEST_FILENAME = ".boardlib-images.json"
+COMBINED_LOGBOOK_COLUMNS = [
+    "climb_angle_uuid",
+    "climb_uuid",
+    "board",
+    "angle",
+    "climb_name",
+    "date",
+    "logged_grade",
+    "displayed_grade",
+    "is_benchmark",
+    "tries",
+    "is_mirror",
+    "is_ascent",
+    "comment",
+]
+USER_TABLES = ("ascents", "bids")
+LOGBOOK_ENGINES = ("pandas", "sql")
+DEFAULT_BATCH_WORKERS = 4
 HOST_BASES = {
     "aurora": "auroraboardapp",
     "decoy": "decoyboardapp",
@@ -25,26 +56,36 @@ WEB_HOSTS = {
 }
 
 
-def login(board, username, password):
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-        "Connection": "keep-alive",
-        "Accept-Language": "en-AU,en;q=0.9",
-        "Accept-Encoding": "gzip, deflate, br",
-        "User-Agent": "Kilter%20Board/202 CFNetwork/1568.100.1 Darwin/24.0.0",
+LOGIN_HEADERS = {
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "Connection": "keep-alive",
+    "Accept-Language": "en-AU,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate, br",
+    "User-Agent": "Kilter%20Board/202 CFNetwork/1568.100.1 Darwin/24.0.0",
+}
+SYNC_HEADERS = {
+    "Accept": "application/json",
+    "User-Agent": "Kilter%20Board/202 CFNetwork/1568.100.1 Darwin/24.0.0",
+    "Content-Type": "application/x-www-form-urlencoded",
+}
+
+
+def login_json(username, password):
+    return {
+        "username": username,
+        "password": password,
+        "tou": "accepted",
+        "pp": "accepted",
+        "ua": "app",
     }
 
-    response = requests.post(
+
+def login(board, username, password, session=None):
+    response = (session or requests).post(
         f"{WEB_HOSTS[board]}/sessions",
-        json={
-            "username": username,
-            "password": password,
-            "tou": "accepted",
-            "pp": "accepted",
-            "ua": "app",
-        },
-        headers=headers,
+        json=login_json(username, password),
+        headers=LOGIN_HEADERS,
     )
     if response.status_code == requests.codes["unprocessable_entity"]:
         raise ValueError(
@@ -54,8 +95,8 @@ def login(board, username, password):
     return response.json()["session"]
 
 
-def explore(board, token):
-    response = requests.get(
+def explore(board, token, session=None):
+    response = (session or requests).get(
         f"{WEB_HOSTS[board]}/explore",
         headers={"cookie": f"token={token}"},
     )
@@ -63,23 +104,25 @@ def explore(board, token):
     return response.json()
 
 
-def get_ascents(board, token):
+def get_ascents(board, token, session=None):
     return [
         ascent
-        for sync_data in sync(board, {"ascents": BASE_SYNC_DATE}, token)
+        for sync_data in sync(
+            board, {"ascents": BASE_SYNC_DATE}, token, session=session
+        )
         for ascent in sync_data.get("ascents", [])
     ]
 
 
-def get_attempts(board, token):
+def get_attempts(board, token, session=None):
     return [
         bid
-        for sync_data in sync(board, {"bids": BASE_SYNC_DATE}, token)
+        for sync_data in sync(board, {"bids": BASE_SYNC_DATE}, token, session=session)
         for bid in sync_data.get("bids", [])
     ]
 
 
-def get_gyms(board):
+def get_gyms(board, session=None):
     """
     :return:
         {
@@ -95,13 +138,13 @@ def get_gyms(board):
             ]
         }
     """
-    response = requests.get(f"{WEB_HOSTS[board]}/pins?gyms=1")
+    response = (session or requests).get(f"{WEB_HOSTS[board]}/pins?gyms=1")
     response.raise_for_status()
     return response.json()
 
 
-def get_user(board, token, user_id):
-    response = requests.get(
+def get_user(board, token, user_id, session=None):
+    response = (session or requests).get(
         f"{WEB_HOSTS[board]}/users/{user_id}",
         headers={"cookie": f"token={token}"},
     )
@@ -109,59 +152,131 @@ def get_user(board, token, user_id):
     return response.json()
 
 
-def sync(board, tables_and_sync_dates, token=None, max_pages=DEFAULT_MAX_SYNC_PAGES):
-    headers = {
-        "Accept": "application/json",
-        "User-Agent": "Kilter%20Board/202 CFNetwork/1568.100.1 Darwin/24.0.0",
-        "Content-Type": "application/x-www-form-urlencoded",
-    }
-    if token:
-        headers["Cookie"] = f"token={token}"
+def sync(
+    board,
+    tables_and_sync_dates,
+    token=None,
+    max_pages=DEFAULT_MAX_SYNC_PAGES,
+    session=None,
+    stream=False,
+    raw=False,
+):
+    """
+    Page through the sync API, yielding the tables returned by each request.
 
+    :param board: The board name
+    :param tables_and_sync_dates: A mapping of table names to the date they were last synchronized
+    :param token: Optional login token, required for user tables
+    :param max_pages: The maximum number of sync requests to make
+    :param session: Optional requests session to reuse connections between pages
+    :param stream: If true, decode each response incrementally instead of loading it whole. Each page is then an
+        iterator of (table_name, rows) pairs, where rows is an iterator decoding one row at a time. Pages and rows
+        must be consumed in order; anything left unconsumed is skipped when the next page is requested.
+    :param raw: If true, yield each page as the undecoded JSON text of the response, for
+        boardlib.db.aurora.SharedTablesWriter.write_json. Only the sync dates are decoded, with SQLite. Cannot be
+        combined with stream.
+    """
+    if stream and raw:
+        raise ValueError("stream and raw cannot be combined")
+
+    headers = sync_headers(token)
     payload_dict = dict(tables_and_sync_dates)
     page_count = 0
     complete = False
 
     while not complete and page_count < max_pages:
-        # Build URL-encoded form data manually - Aurora expects this format!
-        payload = "&".join(
-            f"{requests.utils.quote(table)}={requests.utils.quote(sync_date)}"
-            for table, sync_date in payload_dict.items()
-        )
-
-        response = requests.post(
+        response = (session or requests).post(
             f"{WEB_HOSTS[board]}/sync",
-            data=payload,
+            data=encode_sync_payload(payload_dict),
             headers=headers,
+            stream=stream,
         )
         response.raise_for_status()
-        response_json = response.json()
-        complete = response_json.pop("_complete", False)
-        yield response_json
-
-        # Update payload with last sync date
-        if token:
-            for user_sync in response_json.get("user_syncs", []):
-                table_name = user_sync.get("table_name")
-                last_synchronized_at = user_sync.get("last_synchronized_at")
-                if table_name not in payload_dict or not last_synchronized_at:
-                    continue
+        if stream:
+            # Only the small sync tables and completion flag are kept, for the cursor update below
+            response_json = {}
+            try:
+                page = iter_sync_page(response, response_json)
+                yield page
+                for _, rows in page:
+                    for _ in rows:
+                        pass
+            finally:
+                response.close()
+            complete = response_json.pop("_complete", False)
+        elif raw:
+            page_json = response.content.decode("utf-8")
+            response_json = boardlib.db.aurora.get_json_sync_state(page_json)
+            complete = response_json.pop("_complete", False)
+            yield page_json
+        else:
+            response_json = response.json()
+            complete = response_json.pop("_complete", False)
+            yield response_json
 
-                payload_dict[table_name] = last_synchronized_at
+        update_sync_dates(payload_dict, response_json, token)
+        page_count += 1
 
-        for shared_sync in response_json.get("shared_syncs", []):
-            table_name = shared_sync.get("table_name")
-            last_synchronized_at = shared_sync.get("last_synchronized_at")
-            if table_name not in payload_dict or not last_synchronized_at:
-                continue
 
-            payload_dict[table_name] = last_synchronized_at
+def sync_headers(token=None):
+    headers = dict(SYNC_HEADERS)
+    if token:
+        headers["Cookie"] = f"token={token}"
+    return headers
 
-        page_count += 1
 
+def encode_sync_payload(tables_and_sync_dates):
+    # Build URL-encoded form data manually - Aurora expects this format!
+    return "&".join(
+        f"{requests.utils.quote(table)}={requests.utils.quote(sync_date)}"
+        for table, sync_date in tables_and_sync_dates.items()
+    )
+
+
+def update_sync_dates(tables_and_sync_dates, sync_result, token=None):
+    """
+    Advance the sync dates of the requested tables to those returned with a page of sync results.
+
+    :param tables_and_sync_dates: The mapping of table names to sync dates to update in place
+    :param sync_result: The user_syncs and shared_syncs of a page of sync results
+    :param token: The login token the page was requested with. User tables are only advanced with a token.
+    """
+    sync_rows = list(sync_result.get("shared_syncs", []))
+    if token:
+        sync_rows = list(sync_result.get("user_syncs", [])) + sync_rows
+
+    for sync_row in sync_rows:
+        table_name = sync_row.get("table_name")
+        last_synchronized_at = sync_row.get("last_synchronized_at")
+        if table_name not in tables_and_sync_dates or not last_synchronized_at:
+            continue
+
+        tables_and_sync_dates[table_name] = last_synchronized_at
 
-def gym_boards(board):
-    for gym in get_gyms(board)["gyms"]:
+
+def iter_sync_page(response, sync_state):
+    """
+    Incrementally decode a streamed sync API response.
+
+    :param response: The streamed requests.Response of a sync request
+    :param sync_state: A dictionary which receives the "_complete" flag and the user_syncs/shared_syncs rows
+    :return: An iterator of (table_name, rows) pairs
+    """
+    items = boardlib.util.jsonstream.iter_object_items(
+        response.iter_content(chunk_size=SYNC_STREAM_CHUNK_SIZE)
+    )
+    for table_name, rows in items:
+        if table_name == "_complete":
+            sync_state[table_name] = rows
+        elif table_name in ("user_syncs", "shared_syncs"):
+            sync_state[table_name] = list(rows)
+            yield table_name, sync_state[table_name]
+        else:
+            yield table_name, rows
+
+
+def gym_boards(board, session=None):
+    for gym in get_gyms(board, session)["gyms"]:
         yield {
             "name": gym["name"],
             "latitude": gym["latitude"],
@@ -169,36 +284,219 @@ def gym_boards(board):
         }
 
 
-def download_images(board, database_path, output_directory, composite=False):
+def download_image(
+    api_host, image_filename, output_path, session=None, manifest_entry=None
+):
+    """
+    Download a single image to the given path.
+
+    The body is streamed to a temporary file next to output_path and renamed into place once complete, so an
+    interrupted download never leaves a truncated image behind. When a manifest entry from a previous download is
+    given, the request is made conditional on the image having changed since.
+
+    :param api_host: The base URL of the board's API host
+    :param image_filename: The image filename, relative to the host's image directory
+    :param output_path: The path to write the image to
+    :param session: Optional requests session to reuse connections across image downloads
+    :param manifest_entry: Optional manifest entry for the image already at output_path
+    :return: The manifest entry for the image at output_path. This is manifest_entry if the image was unchanged.
+    """
+    response = (session or requests).get(
+        f"{api_host}/img/{image_filename}",
+        headers=conditional_image_headers(manifest_entry),
+        stream=True,
+    )
+    try:
+        if manifest_entry and response.status_code == requests.codes.not_modified:
+            return manifest_entry
+
+        response.raise_for_status()
+        sha256 = hashlib.sha256()
+        size = 0
+        temp_file = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(output_path),
+            prefix=f".{os.path.basename(output_path)}.",
+            suffix=".part",
+            delete=False,
+        )
+        try:
+            with temp_file:
+                for chunk in response.iter_content(chunk_size=IMAGE_CHUNK_SIZE):
+                    temp_file.write(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+            os.replace(temp_file.name, output_path)
+        except BaseException:
+            os.remove(temp_file.name)
+            raise
+    finally:
+        response.close()
+
+    return {
+        "size": size,
+        "sha256": sha256.hexdigest(),
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+
+
+def conditional_image_headers(manifest_entry=None):
+    """
+    :return: The headers making an image request conditional on the image having changed since manifest_entry.
+    """
+    headers = {}
+    if manifest_entry:
+        if manifest_entry.get("etag"):
+            headers["If-None-Match"] = manifest_entry["etag"]
+        if manifest_entry.get("last_modified"):
+            headers["If-Modified-Since"] = manifest_entry["last_modified"]
+    return headers
+
+
+def existing_image_manifest_entry(output_path):
+    """
+    Build a manifest entry for an image already at output_path but not in the manifest, e.g. one downloaded by a
+    version of boardlib without a manifest. The file's modification time stands in for the Last-Modified value, so a
+    refresh can still ask whether the image changed since.
+
+    :param output_path: The path of the image
+    :return: The manifest entry for the image, or None if there is no file or it is not a complete image.
+    """
+    if not os.path.exists(output_path) or not boardlib.util.images.is_complete_image(
+        output_path
+    ):
+        return None
+
+    sha256 = hashlib.sha256()
+    with open(output_path, "rb") as image_file:
+        for chunk in iter(lambda: image_file.read(IMAGE_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return {
+        "size": os.path.getsize(output_path),
+        "sha256": sha256.hexdigest(),
+        "etag": None,
+        "last_modified": email.utils.formatdate(
+            os.path.getmtime(output_path), usegmt=True
+        ),
+    }
+
+
+def load_image_manifest(output_directory):
+    """
+    :param output_directory: The image download directory
+    :return: The manifest of previously downloaded images, mapping image filenames to their size, sha256 hash, ETag
+        and Last-Modified values.
+    """
+    manifest_path = os.path.join(output_directory, IMAGE_MANIFEST_FILENAME)
+    if not os.path.exists(manifest_path):
+        return {}
+
+    with open(manifest_path, encoding="utf-8") as manifest_file:
+        return json.load(manifest_file)
+
+
+def save_image_manifest(output_directory, manifest):
+    manifest_path = os.path.join(output_directory, IMAGE_MANIFEST_FILENAME)
+    with open(f"{manifest_path}.part", "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, indent=1, sort_keys=True)
+    os.replace(f"{manifest_path}.part", manifest_path)
+
+
+def download_images(
+    board,
+    database_path,
+    output_directory,
+    composite=False,
+    session=None,
+    concurrency=DEFAULT_IMAGE_CONCURRENCY,
+    refresh=False,
+    log_prefix="",
+):
     """
     Download all images for a given board to the specified directory.
-    
+
+    Images are downloaded by up to concurrency worker threads sharing one connection pool. Progress is reported in
+    database order, and a failed image does not stop the remaining downloads.
+
+    Completed downloads are recorded in a manifest in output_directory. Images matching their manifest entry are
+    skipped without any request, or revalidated with a conditional request if refresh is set. Complete images without
+    a manifest entry (e.g. downloaded by an older version) are added to the manifest and treated the same way, while
+    incomplete files, such as those left by an interrupted download, are downloaded again.
+
     :param board: The board name
     :param database_path: Path to the SQLite database file
     :param output_directory: Directory to save the downloaded images
     :param composite: If true, build composite layout images for each board layout
+    :param session: Optional requests session to reuse connections across image downloads
+    :param concurrency: The maximum number of images to download at once
+    :param refresh: If true, ask the server whether previously downloaded images have changed and refetch them if so
+    :param log_prefix: Prefix for progress messages, e.g. to tell apart boards downloaded in parallel
+    :return: A dictionary mapping the filenames of images which could not be downloaded to their errors
     """
     os.makedirs(output_directory, exist_ok=True)
     image_filenames = boardlib.db.aurora.get_image_filenames(database_path)
     api_host = f"https://api.{HOST_BASES[board]}.com"
-    
+    if session is None:
+        session = boardlib.util.http.create_session(pool_size=concurrency)
+
+    manifest = load_image_manifest(output_directory)
+    pending_downloads = []
     for image_filename in image_filenames:
         # Create subdirectories if needed (e.g., for product_sizes_layouts_sets/1-v4.png)
         output_path = os.path.join(output_directory, image_filename)
         os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        
-        # Skip download if file already exists
-        if os.path.exists(output_path):
-            print(f"Skipping {image_filename} (already exists)")
+
+        manifest_entry = manifest.get(image_filename)
+        if not (
+            manifest_entry
+            and os.path.exists(output_path)
+            and os.path.getsize(output_path) == manifest_entry["size"]
+        ):
+            manifest_entry = existing_image_manifest_entry(output_path)
+            if manifest_entry:
+                manifest[image_filename] = manifest_entry
+        if manifest_entry and not refresh:
+            print(f"{log_prefix}Skipping {image_filename} (already exists)")
             continue
-        
-        response = requests.get(
-            f"{api_host}/img/{image_filename}",
-        )
-        response.raise_for_status()
-        
-        with open(output_path, "wb") as output_file:
-            output_file.write(response.content)
+
+        pending_downloads.append((image_filename, output_path, manifest_entry))
+
+    failures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                download_image,
+                api_host,
+                image_filename,
+                output_path,
+                session,
+                manifest_entry,
+            )
+            for image_filename, output_path, manifest_entry in pending_downloads
+        ]
+        try:
+            for download_count, ((image_filename, _, manifest_entry), future) in enumerate(
+                zip(pending_downloads, futures), start=1
+            ):
+                try:
+                    new_manifest_entry = future.result()
+                except Exception as e:
+                    failures[image_filename] = e
+                    print(f"{log_prefix}Failed to download {image_filename}: {e}")
+                    continue
+
+                manifest[image_filename] = new_manifest_entry
+                status = (
+                    "Unchanged" if new_manifest_entry is manifest_entry else "Downloaded"
+                )
+                print(
+                    f"{log_prefix}{status} {image_filename} ({download_count}/{len(pending_downloads)})"
+                )
+        finally:
+            # Keep the progress of interrupted runs
+            for future in futures:
+                future.cancel()
+            save_image_manifest(output_directory, manifest)
 
     if (composite):  
         # Get the layouts-image-path dict from the database
@@ -206,9 +504,18 @@ def download_images(board, database_path, output_directory, composite=False):
         
         # Construct the images one at a time.
         for (layout, product_size), image_names in layouts_images_dict.items():
+            if any(image_name in failures for image_name in image_names):
+                print(
+                    f"{log_prefix}Skipping composite image for {layout} {product_size} (missing images)"
+                )
+                continue
+
             image_path = os.path.join(output_directory, layout, f"{product_size}.png")
             boardlib.util.images.overlay_images(output_directory, image_names, image_path)
 
+    return failures
+
+
 def generate_uuid():
     return str(uuid.uuid4()).replace("-", "")
 
@@ -227,30 +534,59 @@ def save_ascent(
     is_benchmark,
     comment,
     climbed_at,
+    session=None,
 ):
-    uuid = generate_uuid()
-    response = requests.put(
-        f"{WEB_HOSTS[board]}/ascents/save/{uuid}",
+    ascent = ascent_json(
+        user_id,
+        climb_uuid,
+        angle,
+        is_mirror,
+        attempt_id,
+        bid_count,
+        quality,
+        difficulty,
+        is_benchmark,
+        comment,
+        climbed_at,
+    )
+    response = (session or requests).put(
+        f"{WEB_HOSTS[board]}/ascents/save/{ascent['uuid']}",
         headers={"Cookie": f"token={token}"},
-        json={
-            "user_id": user_id,
-            "uuid": uuid,
-            "climb_uuid": climb_uuid,
-            "angle": angle,
-            "is_mirror": is_mirror,
-            "attempt_id": attempt_id,
-            "bid_count": bid_count,
-            "quality": quality,
-            "difficulty": difficulty,
-            "is_benchmark": is_benchmark,
-            "comment": comment,
-            "climbed_at": climbed_at,
-        },
+        json=ascent,
     )
     response.raise_for_status()
     return response.json()
 
 
+def ascent_json(
+    user_id,
+    climb_uuid,
+    angle,
+    is_mirror,
+    attempt_id,
+    bid_count,
+    quality,
+    difficulty,
+    is_benchmark,
+    comment,
+    climbed_at,
+):
+    return {
+        "user_id": user_id,
+        "uuid": generate_uuid(),
+        "climb_uuid": climb_uuid,
+        "angle": angle,
+        "is_mirror": is_mirror,
+        "attempt_id": attempt_id,
+        "bid_count": bid_count,
+        "quality": quality,
+        "difficulty": difficulty,
+        "is_benchmark": is_benchmark,
+        "comment": comment,
+        "climbed_at": climbed_at,
+    }
+
+
 def save_attempt(
     board,
     token,
@@ -261,26 +597,32 @@ def save_attempt(
     bid_count,
     comment,
     climbed_at,
+    session=None,
 ):
-    uuid = generate_uuid()
-    response = requests.put(
+    response = (session or requests).put(
         f"{WEB_HOSTS[board]}/bids/save",
         headers={"Cookie": f"token={token}"},
-        json={
-            "user_id": user_id,
-            "uuid": uuid,
-            "climb_uuid": climb_uuid,
-            "angle": angle,
-            "is_mirror": is_mirror,
-            "bid_count": bid_count,
-            "comment": comment,
-            "climbed_at": climbed_at,
-        },
+        json=attempt_json(
+            user_id, climb_uuid, angle, is_mirror, bid_count, comment, climbed_at
+        ),
     )
     response.raise_for_status()
     return response.json()
 
 
+def attempt_json(user_id, climb_uuid, angle, is_mirror, bid_count, comment, climbed_at):
+    return {
+        "user_id": user_id,
+        "uuid": generate_uuid(),
+        "climb_uuid": climb_uuid,
+        "angle": angle,
+        "is_mirror": is_mirror,
+        "bid_count": bid_count,
+        "comment": comment,
+        "climbed_at": climbed_at,
+    }
+
+
 def save_climb(
     board,
     token,
@@ -293,6 +635,7 @@ def save_climb(
     frames_count=1,
     frames_pace=0,
     angle=None,
+    session=None,
 ):
     uuid = generate_uuid()
     data = {
@@ -309,7 +652,7 @@ def save_climb(
     if angle:
         data["angle"] = angle
 
-    response = requests.put(
+    response = (session or requests).put(
         f"{WEB_HOSTS[board]}/climbs/save",
         headers={"Cookie": f"token={token}"},
         json=data,
@@ -318,11 +661,18 @@ def save_climb(
     return response.json()
 
 
-def bids_logbook_entries(board, token, db_path):
-    raw_entries = get_attempts(board, token)
+def bids_logbook_entries(board, token, db_path, session=None, lookup=None):
+    raw_entries = get_attempts(board, token, session)
+    yield from process_raw_bid_entries(raw_entries, db_path, lookup)
+
 
-    for raw_entry in raw_entries:
-        climb_name = boardlib.db.aurora.get_climb_name(db_path, raw_entry["climb_uuid"])
+def process_raw_bid_entries(raw_bid_entries, db_path, lookup=None):
+    if lookup is None:
+        lookup = boardlib.db.aurora.ClimbLookup(db_path)
+    lookup.load(climb_uuids=(raw_entry["climb_uuid"] for raw_entry in raw_bid_entries))
+
+    for raw_entry in raw_bid_entries:
+        climb_name = lookup.get_climb_name(raw_entry["climb_uuid"])
 
         yield {
             "climb_uuid": raw_entry["climb_uuid"],
@@ -337,16 +687,20 @@ def bids_logbook_entries(board, token, db_path):
         }
 
 
-def process_raw_ascent_entries(raw_ascents_entries, board, db_path):
+def process_raw_ascent_entries(raw_ascents_entries, board, db_path, lookup=None):
+    if lookup is None:
+        lookup = boardlib.db.aurora.ClimbLookup(db_path)
+    lookup.load(*climb_lookup_keys(raw_ascents_entries))
+
     ascents_entries = []
-    difficulty_mapping = boardlib.db.aurora.get_difficulty_mapping(db_path)
+    difficulty_mapping = lookup.difficulty_mapping
     for raw_entry in raw_ascents_entries:
         if not raw_entry["is_listed"]:
             continue
 
-        climb_name = boardlib.db.aurora.get_climb_name(db_path, raw_entry["climb_uuid"])
-        difficulty, benchmark_difficulty = boardlib.db.aurora.get_difficulty(
-            db_path, raw_entry["climb_uuid"], raw_entry["angle"]
+        climb_name = lookup.get_climb_name(raw_entry["climb_uuid"])
+        difficulty, benchmark_difficulty = lookup.get_difficulty(
+            raw_entry["climb_uuid"], raw_entry["angle"]
         )
 
         ascents_entries.append(
@@ -396,112 +750,290 @@ def summarize_bids(bids_df, board):
     return bids_summary
 
 
-def combine_ascents_and_bids(ascents_df, bids_summary, db_path):
-    final_logbook = []
-    difficulty_mapping = boardlib.db.aurora.get_difficulty_mapping(db_path)
-    for _, ascent_row in ascents_df.iterrows():
-        ascent_date = ascent_row["date"].date()
-        ascent_climb_uuid = ascent_row["climb_uuid"]
-        ascent_is_mirror = ascent_row["is_mirror"]
-        ascent_angle = ascent_row["angle"]
-
-        bid_match = bids_summary[
-            (bids_summary["climb_uuid"] == ascent_climb_uuid)
-            & (bids_summary["date"] == ascent_date)
-            & (bids_summary["is_mirror"] == ascent_is_mirror)
-            & (bids_summary["angle"] == ascent_angle)
-        ]
+def combine_ascents_and_bids(ascents_df, bids_summary, db_path, lookup=None):
+    """
+    Merge the ascents with the summarized bids of the same climb, day, mirroring and angle.
 
-        # Used for Climbdex to uniquely identify climbs at a particular angle
-        climb_angle_uuid = f"{ascent_climb_uuid}-{ascent_angle}"
+    The tries of a day's bids are added to the first ascent of that climb on that day. Bids without a matching
+    ascent become attempt entries, listed after all ascents.
 
-        if not bid_match.empty:
-            bid_row = bid_match.iloc[0]
-            total_tries = ascent_row["tries"] + bid_row["tries"]
-            final_logbook.append(
-                {
-                    "climb_angle_uuid": climb_angle_uuid,
-                    "climb_uuid": ascent_climb_uuid,
-                    "board": ascent_row["board"],
-                    "angle": ascent_row["angle"],
-                    "climb_name": ascent_row["name"],
-                    "date": ascent_row["date"],
-                    "logged_grade": ascent_row["logged_grade"],
-                    "displayed_grade": ascent_row.get("displayed_grade", None),
-                    "is_benchmark": ascent_row.get("is_benchmark", None),
-                    "tries": total_tries,
-                    "is_mirror": ascent_row["is_mirror"],
-                    "is_ascent": True,
-                    "comment": ascent_row["comment"],
-                }
-            )
-            bids_summary = bids_summary.drop(bid_match.index)
-        else:
-            final_logbook.append(
-                {
-                    "climb_angle_uuid": climb_angle_uuid,
-                    "climb_uuid": ascent_climb_uuid,
-                    "board": ascent_row["board"],
-                    "angle": ascent_row["angle"],
-                    "climb_name": ascent_row["name"],
-                    "date": ascent_row["date"],
-                    "logged_grade": ascent_row["logged_grade"],
-                    "displayed_grade": ascent_row.get("displayed_grade", None),
-                    "is_benchmark": ascent_row["is_benchmark"],
-                    "tries": ascent_row["tries"],
-                    "is_mirror": ascent_row["is_mirror"],
-                    "is_ascent": True,
-                    "comment": ascent_row["comment"],
-                }
-            )
+    :param ascents_df: The ascent entries, as built by process_raw_ascent_entries
+    :param bids_summary: The bids summarized per climb and day, as built by summarize_bids
+    :param db_path: Path to the board's SQLite database file
+    :param lookup: Optional ClimbLookup for db_path
+    :return: A DataFrame with one row per logbook entry
+    """
+    if lookup is None:
+        lookup = boardlib.db.aurora.ClimbLookup(db_path)
+    difficulty_mapping = lookup.difficulty_mapping
+    key_columns = ["climb_uuid", "date", "is_mirror", "angle"]
 
-    for _, bid_row in bids_summary.iterrows():
-        climb_angle_uuid = f"{bid_row['climb_uuid']}-{bid_row['angle']}"
+    ascents_df = ascents_df.reset_index(drop=True)
+    ascent_keys = pd.DataFrame(
+        {
+            "climb_uuid": ascents_df["climb_uuid"],
+            "date": pd.to_datetime(ascents_df["date"]).dt.date,
+            "is_mirror": ascents_df["is_mirror"],
+            "angle": ascents_df["angle"],
+        }
+    )
 
-        difficulty, benchmark_dificulty = boardlib.db.aurora.get_difficulty(
-            db_path, bid_row["climb_uuid"], bid_row["angle"]
+    tries = ascents_df["tries"].copy()
+    remaining_bids = bids_summary
+    if not ascents_df.empty and not bids_summary.empty:
+        matched = ascent_keys.merge(
+            bids_summary[key_columns + ["tries"]].drop_duplicates(subset=key_columns),
+            on=key_columns,
+            how="left",
+            indicator=True,
+        )
+        # Only the first ascent of each key takes the bids' tries
+        bid_match = (matched["_merge"] == "both") & ~ascent_keys.duplicated()
+        tries[bid_match] = tries[bid_match] + matched.loc[bid_match, "tries"].astype(
+            tries.dtype
         )
 
-        final_logbook.append(
-            {
-                "climb_angle_uuid": climb_angle_uuid,
-                "climb_uuid": bid_row["climb_uuid"],
-                "board": bid_row["board"],
-                "angle": bid_row["angle"],
-                "climb_name": bid_row["climb_name"],
-                "date": bid_row["date"],
-                "logged_grade": None,
-                "displayed_grade": difficulty_to_grade(difficulty_mapping, difficulty),
-                "is_benchmark": bool(benchmark_dificulty),
-                "tries": bid_row["tries"],
-                "is_mirror": bid_row["is_mirror"],
-                "is_ascent": False,
-                "comment": bid_row.get(
-                    "comment", None
-                ),  # Use .get() to safely handle missing 'comment'
-            }
+        remaining_bids = bids_summary.merge(
+            ascent_keys.drop_duplicates(), on=key_columns, how="left", indicator=True
+        )
+        remaining_bids = remaining_bids[remaining_bids["_merge"] == "left_only"]
+
+    ascents_logbook = pd.DataFrame(
+        {
+            # Used for Climbdex to uniquely identify climbs at a particular angle
+            "climb_angle_uuid": climb_angle_uuids(ascents_df),
+            "climb_uuid": ascents_df["climb_uuid"],
+            "board": ascents_df["board"],
+            "angle": ascents_df["angle"],
+            "climb_name": ascents_df["name"],
+            "date": ascents_df["date"],
+            "logged_grade": ascents_df["logged_grade"],
+            "displayed_grade": ascents_df.get("displayed_grade", None),
+            "is_benchmark": ascents_df.get("is_benchmark", None),
+            "tries": tries,
+            "is_mirror": ascents_df["is_mirror"],
+            "is_ascent": True,
+            "comment": ascents_df["comment"],
+        },
+        columns=COMBINED_LOGBOOK_COLUMNS,
+    )
+
+    difficulties = [
+        lookup.get_difficulty(climb_uuid, angle)
+        for climb_uuid, angle in zip(
+            remaining_bids["climb_uuid"], remaining_bids["angle"]
         )
-    return final_logbook
+    ]
+    bids_logbook = pd.DataFrame(
+        {
+            "climb_angle_uuid": climb_angle_uuids(remaining_bids),
+            "climb_uuid": remaining_bids["climb_uuid"],
+            "board": remaining_bids["board"],
+            "angle": remaining_bids["angle"],
+            "climb_name": remaining_bids["climb_name"],
+            "date": remaining_bids["date"],
+            "logged_grade": None,
+            "displayed_grade": [
+                difficulty_to_grade(difficulty_mapping, difficulty)
+                for difficulty, _ in difficulties
+            ],
+            "is_benchmark": [
+                bool(benchmark_difficulty) for _, benchmark_difficulty in difficulties
+            ],
+            "tries": remaining_bids["tries"],
+            "is_mirror": remaining_bids["is_mirror"],
+            "is_ascent": False,
+            "comment": remaining_bids.get("comment", None),
+        },
+        columns=COMBINED_LOGBOOK_COLUMNS,
+    )
+
+    if bids_logbook.empty:
+        return ascents_logbook
+    if ascents_logbook.empty:
+        return bids_logbook.reset_index(drop=True)
+    return pd.concat([ascents_logbook, bids_logbook], ignore_index=True)
+
 
+def climb_angle_uuids(entries_df):
+    return entries_df["climb_uuid"] + "-" + entries_df["angle"].astype(str)
 
-def calculate_sessions_count(group):
-    group = group.sort_values(by="date")
-    unique_dates = group["date"].dt.date.drop_duplicates().reset_index(drop=True)
-    sessions_count = unique_dates.rank(method="dense").astype(int)
-    sessions_count_map = dict(zip(unique_dates, sessions_count))
-    group["sessions_count"] = group["date"].dt.date.map(sessions_count_map)
-    return group
 
+def calculate_logbook_totals(logbook_df):
+    """
+    Add the running sessions_count, tries_total and is_repeat columns for each climb, mirroring and angle.
 
-def calculate_tries_total(group):
-    group = group.sort_values(by="date")
-    group["tries_total"] = group["tries"].cumsum()
-    return group
+    The logbook is sorted once by climb and date, after which each column is a single vectorized groupby transform.
+    Entries without a climb name (climbs missing from the database) are dropped, as grouping on them would.
 
+    :param logbook_df: The combined logbook entries
+    :return: The logbook with the new columns, ordered by climb, mirroring, angle and date
+    """
+    group_columns = ["climb_name", "is_mirror", "angle"]
+    logbook_df = (
+        logbook_df.dropna(subset=group_columns)
+        .sort_values(group_columns + ["date"], kind="stable")
+        .reset_index(drop=True)
+    )
+    group_keys = [logbook_df[column] for column in group_columns]
+
+    logbook_df["sessions_count"] = (
+        logbook_df["date"]
+        .dt.normalize()
+        .groupby(group_keys, sort=False)
+        .rank(method="dense")
+        .astype(int)
+    )
+    logbook_df["tries_total"] = (
+        logbook_df["tries"].groupby(group_keys, sort=False).cumsum()
+    )
+    logbook_df["is_repeat"] = logbook_df.duplicated(subset=group_columns, keep="first")
+    return logbook_df
 
-def logbook_entries(board, token, db_path):
-    bids_entries = list(bids_logbook_entries(board, token, db_path))
-    raw_ascents_entries = get_ascents(board, token)
+
+def climb_lookup_keys(raw_entries):
+    """
+    :param raw_entries: Raw ascent or bid entries from the sync API
+    :return: The climb UUIDs and (climb_uuid, angle) pairs needed to build logbook entries from raw_entries
+    """
+    climb_angles = {
+        (raw_entry["climb_uuid"], raw_entry["angle"]) for raw_entry in raw_entries
+    }
+    return {climb_uuid for climb_uuid, _ in climb_angles}, climb_angles
+
+
+def sync_user_store(board, token, user_id, user_store, session=None, store_lock=None):
+    """
+    Bring a user's ascents and bids in a local user store up to date.
+
+    Only the changes since the dates recorded by the previous sync of the store are requested, so a store which is
+    already up to date costs a single small request. Each page is committed together with its sync dates, so an
+    interrupted sync resumes where it stopped.
+
+    :param board: The board name
+    :param token: The login token of the user
+    :param user_id: The id of the user
+    :param user_store: Path to the SQLite database file of the user store, created if it does not exist
+    :param session: Optional requests session to reuse connections between pages
+    :param store_lock: Optional lock held while writing to the store, to serialize the writes of concurrent syncs
+        into the same store. Pages are still downloaded while the lock is held by another sync.
+    :return: A dictionary mapping table names to the numbers of rows inserted, updated, unchanged and deleted
+    """
+    if store_lock is None:
+        store_lock = contextlib.nullcontext()
+    with store_lock:
+        boardlib.db.aurora.create_user_store(user_store)
+    tables_and_sync_dates = {table_name: BASE_SYNC_DATE for table_name in USER_TABLES}
+    tables_and_sync_dates.update(
+        (table_name, sync_date)
+        for table_name, sync_date in boardlib.db.aurora.get_user_syncs(
+            user_store, user_id
+        ).items()
+        if table_name in USER_TABLES
+    )
+
+    row_counts = {}
+    with boardlib.db.aurora.SharedTablesWriter(user_store, commit_pages=1) as writer:
+        for sync_data in sync(board, tables_and_sync_dates, token, session=session):
+            page = {
+                table_name: rows
+                for table_name, rows in sync_data.items()
+                if table_name in boardlib.db.aurora.USER_STORE_TABLES
+            }
+            page["user_syncs"] = [
+                {**user_sync, "user_id": user_id}
+                for user_sync in page.get("user_syncs", [])
+            ]
+            with store_lock:
+                boardlib.db.aurora.add_row_counts(row_counts, writer.write(page))
+    return row_counts
+
+
+def logbook_entries(
+    board,
+    token,
+    db_path,
+    session=None,
+    lookup=None,
+    user_store=None,
+    user_id=None,
+    engine="pandas",
+):
+    """
+    Build the full logbook of ascents and attempts for the logged in user.
+
+    :param board: The board name
+    :param token: The login token of the user
+    :param db_path: Path to the board's SQLite database file, or a boardlib.db.aurora.ReadOnlyDatabase
+    :param session: Optional requests session to reuse connections between requests
+    :param lookup: Optional ClimbLookup for db_path, e.g. to share cached lookups between users
+    :param user_store: Optional path to a user store. The user's ascents and bids are then synced incrementally into
+        the store and read from it, instead of being downloaded in full.
+    :param user_id: The id of the user, required with user_store
+    :param engine: "pandas" to build the logbook from DataFrames, or "sql" to build it with a single query joining the
+        user store against the board database. The "sql" engine requires user_store.
+    :return: A DataFrame of logbook entries, sorted by date
+    """
+    if engine not in LOGBOOK_ENGINES:
+        raise ValueError(f"Unknown logbook engine {engine}")
+    if engine == "sql":
+        if user_store is None or user_id is None:
+            raise ValueError("The sql logbook engine requires a user store and user_id.")
+        sync_user_store(board, token, user_id, user_store, session)
+        return sql_logbook_entries(board, db_path, user_store, user_id)
+
+    raw_ascents_entries, raw_bids_entries = get_raw_logbook(
+        board, token, session, user_store, user_id
+    )
+    return build_logbook(
+        board, raw_ascents_entries, raw_bids_entries, db_path, lookup
+    )
+
+
+def get_raw_logbook(
+    board, token, session=None, user_store=None, user_id=None, store_lock=None
+):
+    """
+    Fetch the raw ascents and bids of the logged in user.
+
+    :param board: The board name
+    :param token: The login token of the user
+    :param session: Optional requests session to reuse connections between requests
+    :param user_store: Optional path to a user store to sync incrementally and read the entries from
+    :param user_id: The id of the user, required with user_store
+    :param store_lock: Optional lock held while writing to user_store, as passed to sync_user_store
+    :return: A (raw_ascents_entries, raw_bids_entries) tuple
+    """
+    if user_store is None:
+        raw_bids_entries = get_attempts(board, token, session)
+        raw_ascents_entries = get_ascents(board, token, session)
+    else:
+        if user_id is None:
+            raise ValueError("A user_id is required to use a user store.")
+        sync_user_store(board, token, user_id, user_store, session, store_lock)
+        raw_bids_entries = boardlib.db.aurora.get_user_rows(user_store, "bids", user_id)
+        raw_ascents_entries = boardlib.db.aurora.get_user_rows(
+            user_store, "ascents", user_id
+        )
+    return raw_ascents_entries, raw_bids_entries
+
+
+def build_logbook(board, raw_ascents_entries, raw_bids_entries, db_path, lookup=None):
+    """
+    Build a logbook DataFrame from raw ascents and bids.
+
+    :param board: The board name
+    :param raw_ascents_entries: The raw ascents from the sync API
+    :param raw_bids_entries: The raw bids from the sync API
+    :param db_path: Path to the board's SQLite database file
+    :param lookup: Optional ClimbLookup for db_path
+    :return: A DataFrame of logbook entries, sorted by date
+    """
+    if lookup is None:
+        lookup = boardlib.db.aurora.ClimbLookup(db_path)
+    # Fetch every climb name and difficulty the logbook needs up front, in a few queries
+    lookup.load(*climb_lookup_keys(raw_bids_entries + raw_ascents_entries))
+    bids_entries = list(process_raw_bid_entries(raw_bids_entries, db_path, lookup))
 
     if not bids_entries and not raw_ascents_entries:
         return pd.DataFrame(
@@ -540,7 +1072,7 @@ def logbook_entries(board, token, db_path):
 
     if raw_ascents_entries:
         ascents_entries = process_raw_ascent_entries(
-            raw_ascents_entries, board, db_path
+            raw_ascents_entries, board, db_path, lookup
         )
         ascents_df = pd.DataFrame(ascents_entries)
     else:
@@ -560,7 +1092,9 @@ def logbook_entries(board, token, db_path):
             ]
         )
 
-    final_logbook = combine_ascents_and_bids(ascents_df, bids_summary, db_path)
+    final_logbook = combine_ascents_and_bids(
+        ascents_df, bids_summary, db_path, lookup
+    )
 
     full_logbook_df = pd.DataFrame(
         final_logbook,
@@ -581,31 +1115,111 @@ def logbook_entries(board, token, db_path):
     )
     full_logbook_df["date"] = pd.to_datetime(full_logbook_df["date"])
 
-    full_logbook_df = (
-        full_logbook_df.groupby(["climb_name", "is_mirror", "angle"])
-        .apply(calculate_sessions_count)
-        .reset_index(drop=True)
-    )
-    full_logbook_df = (
-        full_logbook_df.groupby(["climb_name", "is_mirror", "angle"])
-        .apply(calculate_tries_total)
-        .reset_index(drop=True)
-    )
+    full_logbook_df = calculate_logbook_totals(full_logbook_df)
+    full_logbook_df = full_logbook_df.sort_values(by="date", kind="stable")
+
+    return full_logbook_df
+
 
-    full_logbook_df["is_repeat"] = full_logbook_df.duplicated(
-        subset=["climb_name", "is_mirror", "angle"], keep="first"
+def batch_logbook_entries(
+    board,
+    credentials,
+    db_path,
+    max_workers=DEFAULT_BATCH_WORKERS,
+    lookup=None,
+    user_store=None,
+):
+    """
+    Build the logbooks of several users of the same board.
+
+    Users are logged in and their ascents and bids are fetched concurrently, each over its own session. The logbooks
+    are then built one after another from a single ClimbLookup, which loads the climbs of every user in one pass
+    over the database, so climbs shared between users are only looked up once. With a user store, the writes of the
+    users' syncs to the store are serialized, since SQLite allows a single writer at a time.
+
+    :param board: The board name
+    :param credentials: An iterable of (username, password) pairs
+    :param db_path: Path to the board's SQLite database file, or a boardlib.db.aurora.ReadOnlyDatabase
+    :param max_workers: The maximum number of users fetched concurrently
+    :param lookup: Optional ClimbLookup for db_path
+    :param user_store: Optional path to a user store holding the entries of every user, synced incrementally
+    :return: A (logbooks, failures) tuple. logbooks maps usernames to logbook DataFrames, in the order of credentials.
+        failures maps usernames to the exception raised while logging in or fetching their entries.
+    """
+    credentials = list(credentials)
+    store_lock = threading.Lock()
+
+    def fetch(username, password):
+        with boardlib.util.http.create_session() as session:
+            login_info = login(board, username, password, session)
+            return get_raw_logbook(
+                board,
+                login_info["token"],
+                session,
+                user_store,
+                login_info.get("user_id"),
+                store_lock,
+            )
+
+    raw_logbooks = {}
+    failures = {}
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            username: executor.submit(fetch, username, password)
+            for username, password in credentials
+        }
+        for username, future in futures.items():
+            try:
+                raw_logbooks[username] = future.result()
+            except Exception as e:
+                failures[username] = e
+
+    if lookup is None:
+        lookup = boardlib.db.aurora.ClimbLookup(db_path)
+    lookup.load(
+        *climb_lookup_keys(
+            [
+                raw_entry
+                for raw_ascents_entries, raw_bids_entries in raw_logbooks.values()
+                for raw_entry in raw_ascents_entries + raw_bids_entries
+            ]
+        )
     )
-    full_logbook_df = full_logbook_df.sort_values(by="date")
+    logbooks = {
+        username: build_logbook(
+            board, raw_ascents_entries, raw_bids_entries, db_path, lookup
+        )
+        for username, (raw_ascents_entries, raw_bids_entries) in raw_logbooks.items()
+    }
+    return logbooks, failures
 
-    return full_logbook_df
+
+def sql_logbook_entries(board, db_path, user_store, user_id):
+    """
+    Build a user's logbook from a user store with boardlib.db.aurora.query_logbook.
+
+    :param board: The board name
+    :param db_path: Path to the board's SQLite database file
+    :param user_store: Path to the SQLite database file of the user store
+    :param user_id: The id of the user
+    :return: A DataFrame with the same columns as the one built by logbook_entries, sorted by date
+    """
+    columns, rows = boardlib.db.aurora.query_logbook(db_path, user_store, user_id)
+    logbook_df = pd.DataFrame.from_records(rows, columns=columns)
+    logbook_df.insert(1, "board", board)
+    logbook_df["date"] = pd.to_datetime(logbook_df["date"])
+    for column in ("is_benchmark", "is_mirror", "is_ascent", "is_repeat"):
+        logbook_df[column] = logbook_df[column].astype(bool)
+    return logbook_df
 
 
-def user_followers(board: str, token: str, user_id: int):
+def user_followers(board: str, token: str, user_id: int, session=None):
     """
     Get all accounts that follow the given user
     :param board:
     :param token:
     :param user_id:
+    :param session:
     :return:
         {
             'users': [
@@ -619,7 +1233,7 @@ def user_followers(board: str, token: str, user_id: int):
             ]
         }
     """
-    response = requests.get(
+    response = (session or requests).get(
         f"{WEB_HOSTS[board]}/users/{user_id}/followers",
         headers={"cookie": f"token={token}"},
     )
@@ -627,12 +1241,13 @@ def user_followers(board: str, token: str, user_id: int):
     return response.json()
 
 
-def user_followees(board: str, token: str, user_id: int):
+def user_followees(board: str, token: str, user_id: int, session=None):
     """
     Get all accounts the given user follows
     :param board:
     :param token:
     :param user_id:
+    :param session:
     :return:
         {
             'users': [
@@ -646,7 +1261,7 @@ def user_followees(board: str, token: str, user_id: int):
             ]
         }
     """
-    response = requests.get(
+    response = (session or requests).get(
         f"{WEB_HOSTS[board]}/users/{user_id}/followees",
         headers={"cookie": f"token={token}"},
     )
@@ -654,11 +1269,13 @@ def user_followees(board: str, token: str, user_id: int):
     return response.json()
 
 
-def follow(board: str, token: str, your_user_id: int, id_to_follow: int):
+def follow(
+    board: str, token: str, your_user_id: int, id_to_follow: int, session=None
+):
     """
     Follow a user
     """
-    response = requests.post(
+    response = (session or requests).post(
         f"{WEB_HOSTS[board]}/follows/save",
         headers={"cookie": f"token={token}"},
         data={
@@ -671,11 +1288,13 @@ def follow(board: str, token: str, your_user_id: int, id_to_follow: int):
     return response.json()
 
 
-def unfollow(board: str, token: str, your_user_id: int, id_to_follow: int):
+def unfollow(
+    board: str, token: str, your_user_id: int, id_to_follow: int, session=None
+):
     """
     Unfollow a user
     """
-    response = requests.post(
+    response = (session or requests).post(
         f"{WEB_HOSTS[board]}/follows/save",
         headers={"cookie": f"token={token}"},
         data={
@@ -688,12 +1307,15 @@ def unfollow(board: str, token: str, your_user_id: int, id_to_follow: int):
     return response.json()
 
 
-def get_notifications(board: str, token: str, included_types: list[str] = None):
+def get_notifications(
+    board: str, token: str, included_types: list[str] = None, session=None
+):
     """
     Get all notifications for the given user
     :param board:
     :param token:
     :param included_types: a list of notification types to include in the response. Optional values:
+    :param session:
     :return:
         {
             'notifications': [
@@ -706,18 +1328,21 @@ def get_notifications(board: str, token: str, included_types: list[str] = None):
         }
     """
 
-    if included_types is None:
-        included_types = ["climbs", "follows", "users", "ascents", "likes"]
-
-    response = requests.get(
+    response = (session or requests).get(
         f"{WEB_HOSTS[board]}/notifications",
-        params={t: 1 for t in included_types},
+        params=notification_params(included_types),
         headers={"cookie": f"token={token}"},
     )
     response.raise_for_status()
     return response.json()
 
 
+def notification_params(included_types=None):
+    if included_types is None:
+        included_types = ["climbs", "follows", "users", "ascents", "likes"]
+    return {t: 1 for t in included_types}
+
+
 def difficulty_to_grade(difficulty_mapping, difficulty):
     return (
         difficulty_mapping.get(int(round(difficulty)), None)
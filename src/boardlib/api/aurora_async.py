@@ -0,0 +1,255 @@
+"""
+An asyncio client for the Aurora API, mirroring the blocking functions of boardlib.api.aurora.
+
+Requires aiohttp (pip install boardlib[async]). Every function takes an aiohttp.ClientSession as the keyword argument
+session, which pools connections between requests. Use create_session to make one whose connection limit also bounds
+the number of concurrent requests. Hosts are read from boardlib.api.aurora.WEB_HOSTS, which can be updated to point a
+board at another server.
+"""
+import hashlib
+import os
+import tempfile
+
+import aiohttp
+
+import boardlib.api.aurora
+import boardlib.util.http
+
+
+DEFAULT_CONCURRENCY = boardlib.util.http.DEFAULT_POOL_SIZE
+
+
+def create_session(concurrency=DEFAULT_CONCURRENCY, headers=None):
+    """
+    Create an aiohttp session which keeps connections alive and reuses them between requests.
+
+    Must be created, and closed, inside a running event loop.
+
+    :param concurrency: The maximum number of connections open at once, which is also the maximum number of requests
+        in flight through the session. Further requests wait for a free connection.
+    :param headers: Optional default headers sent with every request made through the session.
+    :return: The configured aiohttp.ClientSession.
+    """
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency),
+        headers=headers,
+    )
+
+
+async def login(board, username, password, *, session):
+    async with session.post(
+        f"{boardlib.api.aurora.WEB_HOSTS[board]}/sessions",
+        json=boardlib.api.aurora.login_json(username, password),
+        headers=boardlib.api.aurora.LOGIN_HEADERS,
+    ) as response:
+        if response.status == 422:
+            raise ValueError(
+                "Invalid username or password. Please check your credentials and try again."
+            )
+        response.raise_for_status()
+        return (await response.json(content_type=None))["session"]
+
+
+async def sync(
+    board,
+    tables_and_sync_dates,
+    token=None,
+    max_pages=boardlib.api.aurora.DEFAULT_MAX_SYNC_PAGES,
+    *,
+    session,
+):
+    """
+    Page through the sync API, yielding the tables returned by each request.
+
+    An async generator with the same pages and paging as boardlib.api.aurora.sync.
+
+    :param board: The board name
+    :param tables_and_sync_dates: A mapping of table names to the date they were last synchronized
+    :param token: Optional login token, required for user tables
+    :param max_pages: The maximum number of sync requests to make
+    :param session: The aiohttp session to make the requests with
+    """
+    headers = boardlib.api.aurora.sync_headers(token)
+    payload_dict = dict(tables_and_sync_dates)
+    page_count = 0
+    complete = False
+
+    while not complete and page_count < max_pages:
+        async with session.post(
+            f"{boardlib.api.aurora.WEB_HOSTS[board]}/sync",
+            data=boardlib.api.aurora.encode_sync_payload(payload_dict),
+            headers=headers,
+        ) as response:
+            response.raise_for_status()
+            response_json = await response.json(content_type=None)
+
+        complete = response_json.pop("_complete", False)
+        yield response_json
+
+        boardlib.api.aurora.update_sync_dates(payload_dict, response_json, token)
+        page_count += 1
+
+
+async def get_json(session, url, token, params=None):
+    async with session.get(
+        url, headers={"cookie": f"token={token}"}, params=params
+    ) as response:
+        response.raise_for_status()
+        return await response.json(content_type=None)
+
+
+async def get_user(board, token, user_id, *, session):
+    return await get_json(
+        session, f"{boardlib.api.aurora.WEB_HOSTS[board]}/users/{user_id}", token
+    )
+
+
+async def user_followers(board, token, user_id, *, session):
+    """
+    Get all accounts that follow the given user, as returned by boardlib.api.aurora.user_followers.
+    """
+    return await get_json(
+        session,
+        f"{boardlib.api.aurora.WEB_HOSTS[board]}/users/{user_id}/followers",
+        token,
+    )
+
+
+async def user_followees(board, token, user_id, *, session):
+    """
+    Get all accounts the given user follows, as returned by boardlib.api.aurora.user_followees.
+    """
+    return await get_json(
+        session,
+        f"{boardlib.api.aurora.WEB_HOSTS[board]}/users/{user_id}/followees",
+        token,
+    )
+
+
+async def get_notifications(board, token, included_types=None, *, session):
+    """
+    Get all notifications for the given user, as returned by boardlib.api.aurora.get_notifications.
+    """
+    return await get_json(
+        session,
+        f"{boardlib.api.aurora.WEB_HOSTS[board]}/notifications",
+        token,
+        params=boardlib.api.aurora.notification_params(included_types),
+    )
+
+
+async def put_json(session, url, token, json):
+    async with session.put(
+        url, headers={"Cookie": f"token={token}"}, json=json
+    ) as response:
+        response.raise_for_status()
+        return await response.json(content_type=None)
+
+
+async def save_ascent(
+    board,
+    token,
+    user_id,
+    climb_uuid,
+    angle,
+    is_mirror,
+    attempt_id,
+    bid_count,
+    quality,
+    difficulty,
+    is_benchmark,
+    comment,
+    climbed_at,
+    *,
+    session,
+):
+    ascent = boardlib.api.aurora.ascent_json(
+        user_id,
+        climb_uuid,
+        angle,
+        is_mirror,
+        attempt_id,
+        bid_count,
+        quality,
+        difficulty,
+        is_benchmark,
+        comment,
+        climbed_at,
+    )
+    return await put_json(
+        session,
+        f"{boardlib.api.aurora.WEB_HOSTS[board]}/ascents/save/{ascent['uuid']}",
+        token,
+        ascent,
+    )
+
+
+async def save_attempt(
+    board,
+    token,
+    user_id,
+    climb_uuid,
+    angle,
+    is_mirror,
+    bid_count,
+    comment,
+    climbed_at,
+    *,
+    session,
+):
+    return await put_json(
+        session,
+        f"{boardlib.api.aurora.WEB_HOSTS[board]}/bids/save",
+        token,
+        boardlib.api.aurora.attempt_json(
+            user_id, climb_uuid, angle, is_mirror, bid_count, comment, climbed_at
+        ),
+    )
+
+
+async def download_image(
+    api_host, image_filename, output_path, manifest_entry=None, *, session
+):
+    """
+    Download a single image to the given path, like boardlib.api.aurora.download_image.
+
+    The body is streamed to a temporary file next to output_path and renamed into place once complete. When a
+    manifest entry from a previous download is given, the request is made conditional on the image having changed.
+
+    :return: The manifest entry for the image at output_path. This is manifest_entry if the image was unchanged.
+    """
+    async with session.get(
+        f"{api_host}/img/{image_filename}",
+        headers=boardlib.api.aurora.conditional_image_headers(manifest_entry),
+    ) as response:
+        if manifest_entry and response.status == 304:
+            return manifest_entry
+
+        response.raise_for_status()
+        sha256 = hashlib.sha256()
+        size = 0
+        temp_file = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(output_path),
+            prefix=f".{os.path.basename(output_path)}.",
+            suffix=".part",
+            delete=False,
+        )
+        try:
+            with temp_file:
+                async for chunk in response.content.iter_chunked(
+                    boardlib.api.aurora.IMAGE_CHUNK_SIZE
+                ):
+                    temp_file.write(chunk)
+                    sha256.update(chunk)
+                    size += len(chunk)
+            os.replace(temp_file.name, output_path)
+        except BaseException:
+            os.remove(temp_file.name)
+            raise
+
+        return {
+            "size": size,
+            "sha256": sha256.hexdigest(),
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
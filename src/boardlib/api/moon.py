@@ -1,4 +1,11 @@
+import collections
+import concurrent.futures
 import datetime
+import json
+import os
+import pathlib
+import tempfile
+import time
 
 import bs4
 import requests
@@ -6,6 +13,8 @@ import requests
 import boardlib.util.grades
 
 HOST = "https://moonboard.com"
+DEFAULT_MAX_WORKERS = 8
+DEFAULT_SESSION_MAX_AGE = datetime.timedelta(days=14)
 
 BOARD_IDS = {
     "moon2016": 1,
@@ -50,11 +59,38 @@ IDS_TO_ANGLES = {
 }
 
 
-def get_session(username, password):
+def create_session():
     session = requests.Session()
     session.headers.update({
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/145.0.0.0 Safari/537.36",
 })
+    return session
+
+
+def get_session(username, password, cache_path=None):
+    """
+    Get a logged in session, reusing the cookies of a previous login when possible.
+
+    :param username: The Moonboard username
+    :param password: The Moonboard password
+    :param cache_path: Optional path of a session cache file. Cookies stored there for the same user are reused if
+        they have not expired and the server still accepts them. Otherwise, a new login is made and its cookies are
+        stored for later runs.
+    :return: The logged in requests.Session
+    """
+    if cache_path is not None:
+        session = load_session(cache_path, username)
+        if session is not None and is_session_valid(session):
+            return session
+
+    session = login(username, password)
+    if cache_path is not None:
+        save_session(cache_path, username, session)
+    return session
+
+
+def login(username, password):
+    session = create_session()
     login_page = session.get(f"{HOST}/account/login")
     login_page.raise_for_status()
     
@@ -90,55 +126,171 @@ def get_session(username, password):
     return session
 
 
-def logbook_pages(session, board, page_size=40, page=1):
+def is_session_valid(session):
+    """
+    Check that the server accepts the session's cookies with a minimal logbook request. A session which is not logged
+    in is redirected to the login page instead.
+    """
     response = session.post(
         f"{HOST}/Logbook/GetLogbook",
-        data={
-            "sort": "",
-            "page": page,
-            "pageSize": page_size,
-            "group": "",
-            "filter": f"setupId~eq~'{BOARD_IDS[board]}'",
-        },
-        headers={
-            "X-Requested-With": "XMLHttpRequest",
-        },
+        data={"sort": "", "page": 1, "pageSize": 1, "group": "", "filter": ""},
+        headers={"X-Requested-With": "XMLHttpRequest"},
+        allow_redirects=False,
     )
-    response.raise_for_status()
-    response_json = response.json()
-    yield from response_json["Data"]
-    if response_json["Total"] > page_size * page:
-        yield from logbook_pages(session, board, page_size, page + 1)
+    if response.status_code != requests.codes.ok:
+        return False
+    try:
+        response.json()
+    except ValueError:
+        return False
+    return True
+
+
+def save_session(cache_path, username, session, max_age=DEFAULT_SESSION_MAX_AGE):
+    """
+    Store the cookies of a logged in session, readable only by the current user.
+
+    The cache expires when the first of its cookies does, and at the latest max_age after it was saved.
+    """
+    expires_at = time.time() + max_age.total_seconds()
+    cookies = []
+    for cookie in session.cookies:
+        if cookie.expires is not None:
+            expires_at = min(expires_at, cookie.expires)
+        cookies.append(
+            {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": cookie.secure,
+                "expires": cookie.expires,
+            }
+        )
+
+    cache_path = pathlib.Path(cache_path)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    # mkstemp creates the file with 0600 permissions, and the rename keeps them
+    fd, temp_path = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as cache_file:
+            json.dump(
+                {"username": username, "expires_at": expires_at, "cookies": cookies},
+                cache_file,
+            )
+        os.replace(temp_path, cache_path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def load_session(cache_path, username):
+    """
+    :return: A session with the cached cookies of the user, or None if there are none which have not expired.
+    """
+    try:
+        with open(cache_path, encoding="utf-8") as cache_file:
+            cache = json.load(cache_file)
+    except (OSError, ValueError):
+        return None
+
+    if cache.get("username") != username or cache.get("expires_at", 0) <= time.time():
+        return None
+
+    session = create_session()
+    for cookie in cache.get("cookies", []):
+        session.cookies.set(**cookie)
+    return session
+
+
+def paginate(session, url, board, page_size, page=1):
+    """
+    Iterate over the data of every page of a paginated Moonboard endpoint, one request per page.
+
+    :param session: The logged in session
+    :param url: The URL of the endpoint
+    :param board: The board name
+    :param page_size: The number of items per page
+    :param page: The first page to request
+    """
+    while True:
+        response = session.post(
+            url,
+            data={
+                "sort": "",
+                "page": page,
+                "pageSize": page_size,
+                "group": "",
+                "filter": f"setupId~eq~'{BOARD_IDS[board]}'",
+            },
+            headers={"X-Requested-With": "XMLHttpRequest"},
+        )
+        response.raise_for_status()
+        response_json = response.json()
+        yield from response_json["Data"]
+        if response_json["Total"] <= page_size * page:
+            return
+        page += 1
+
+
+def logbook_pages(session, board, page_size=40, page=1):
+    yield from paginate(session, f"{HOST}/Logbook/GetLogbook", board, page_size, page)
 
 
 def raw_logbook_entries_for_page(session, board, entry_id, page_size=30, page=1):
-    response = session.post(
-        f"{HOST}/Logbook/GetLogbookEntries/{entry_id}",
-        data={
-            "sort": "",
-            "page": page,
-            "pageSize": page_size,
-            "group": "",
-            "filter": f"setupId~eq~'{BOARD_IDS[board]}'",
-        },
-        headers={"X-Requested-With": "XMLHttpRequest"},
+    yield from paginate(
+        session, f"{HOST}/Logbook/GetLogbookEntries/{entry_id}", board, page_size, page
     )
-    response.raise_for_status()
-    response_json = response.json()
-    yield from response_json["Data"]
-    if response_json["Total"] > page_size * page:
-        yield from raw_logbook_entries_for_page(
-            session, board, entry_id, page_size, page + 1
-        )
 
 
-def raw_logbook_entries(session, board, logbook_page_size=40, entry_page_size=30):
+def raw_logbook_entries(
+    session,
+    board,
+    logbook_page_size=40,
+    entry_page_size=30,
+    max_workers=DEFAULT_MAX_WORKERS,
+):
+    """
+    Iterate over the raw entries of every logbook day, in logbook order.
+
+    The entries of up to max_workers days are fetched concurrently over the session. Only a bounded number of days
+    is fetched ahead of the entries being consumed.
+
+    :param session: The logged in session
+    :param board: The board name
+    :param logbook_page_size: The number of logbook days per page
+    :param entry_page_size: The number of entries per page of a logbook day
+    :param max_workers: The maximum number of concurrent requests. 1 fetches everything sequentially.
+    """
     logbook = logbook_pages(session, board, page_size=logbook_page_size)
-    for entry in logbook:
-        yield from raw_logbook_entries_for_page(
-            session, board, entry["Id"], page_size=entry_page_size
+    if max_workers <= 1:
+        for entry in logbook:
+            yield from raw_logbook_entries_for_page(
+                session, board, entry["Id"], page_size=entry_page_size
+            )
+        return
+
+    def fetch_day(entry_id):
+        return list(
+            raw_logbook_entries_for_page(
+                session, board, entry_id, page_size=entry_page_size
+            )
         )
 
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = collections.deque()
+        try:
+            for entry in logbook:
+                pending.append(executor.submit(fetch_day, entry["Id"]))
+                # Keep the workers busy without queuing up the whole logbook
+                if len(pending) >= max_workers * 2:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
 
 def get_my_ranking(session, board, angle):
     response = session.post(
@@ -158,9 +310,16 @@ def get_summary_by_benchmark_tries(session, board, angle):
     return response.json()
 
 
-def logbook_entries(board, username, password, grade_type="font"):
-    session = get_session(username, password)
-    entries = raw_logbook_entries(session, board)
+def logbook_entries(
+    board,
+    username,
+    password,
+    grade_type="font",
+    max_workers=DEFAULT_MAX_WORKERS,
+    session_cache=None,
+):
+    session = get_session(username, password, session_cache)
+    entries = raw_logbook_entries(session, board, max_workers=max_workers)
     for entry in entries:
         font_logged_grade = entry["Problem"]["UserGrade"]
         font_displayed_grade = entry["Problem"]["Grade"]
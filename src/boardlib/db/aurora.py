@@ -1,6 +1,14 @@
 import collections
-import io
+import contextlib
+import datetime
+import hashlib
+import itertools
+import json
+import os
+import pathlib
 import sqlite3
+import tempfile
+import threading
 import zipfile
 
 import requests
@@ -15,49 +23,253 @@ APP_PACKAGE_NAMES = {
     "tension": "tensionboard2",
     "touchstone": "touchstoneboard",
 }
+DEFAULT_SYNC_COMMIT_PAGES = 10
+BULK_LOAD_COMMIT_PAGES = 100
+# A first sync, or one this far behind, rewrites most of the shared tables
+BULK_LOAD_SYNC_AGE = datetime.timedelta(days=30)
+ROW_BATCH_SIZE = 1000
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+# Stays under SQLite's default limit of 999 bound parameters per statement
+LOOKUP_BATCH_SIZE = 500
+ROW_COUNT_KEYS = ("inserted", "updated", "unchanged", "deleted")
+# Without the count of existing keys, inserted and updated rows are counted together as upserted
+UPSERT_ROW_COUNT_KEYS = ("upserted", "unchanged", "deleted")
+CHANGED_ROW_COUNT_KEYS = ("inserted", "updated", "upserted", "deleted")
+READ_MMAP_SIZE = 256 * 1024 * 1024
+READ_CACHE_SIZE_KIB = 64 * 1024
+READ_CACHED_STATEMENTS = 256
+USER_STORE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ascents (
+    uuid TEXT PRIMARY KEY,
+    wall_uuid TEXT,
+    climb_uuid TEXT,
+    angle INTEGER,
+    is_mirror INTEGER,
+    user_id INTEGER,
+    attempt_id INTEGER,
+    bid_count INTEGER,
+    quality INTEGER,
+    difficulty INTEGER,
+    is_benchmark INTEGER,
+    comment TEXT,
+    climbed_at TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    is_listed INTEGER
+);
+CREATE TABLE IF NOT EXISTS bids (
+    uuid TEXT PRIMARY KEY,
+    user_id INTEGER,
+    climb_uuid TEXT,
+    angle INTEGER,
+    is_mirror INTEGER,
+    bid_count INTEGER,
+    comment TEXT,
+    climbed_at TEXT,
+    created_at TEXT,
+    updated_at TEXT,
+    is_listed INTEGER
+);
+CREATE TABLE IF NOT EXISTS user_syncs (
+    user_id INTEGER,
+    table_name TEXT,
+    last_synchronized_at TEXT,
+    PRIMARY KEY (user_id, table_name)
+);
+CREATE INDEX IF NOT EXISTS ascents_user_id_climbed_at ON ascents (user_id, climbed_at);
+CREATE INDEX IF NOT EXISTS bids_user_id_climb_uuid ON bids (user_id, climb_uuid, climbed_at);
+"""
+USER_STORE_TABLES = ("ascents", "bids", "user_syncs")
+USER_STORE_BOOLEAN_COLUMNS = ("is_mirror", "is_benchmark", "is_listed")
 
 
-def download_database(board, output_file):
+def download_database(board, output_file, session=None, progress_callback=None):
     """
     The sqlite3 database is stored in the assets folder of the APK files for the Android app of each board.
 
     This function downloads the latest APK file for the board's Android app and extracts the database from it.
+    The download is streamed to a temporary file and the nested archives are read from disk, so memory use does not
+    grow with the size of the APK. The database is written next to output_file and renamed into place once complete.
     :param board: The board to download the database for.
     :param output_file: The file to write the database to.
+    :param session: Optional requests session to make the download with.
+    :param progress_callback: Optional function called with (stage, bytes_done, total_bytes) as the APK is downloaded
+        (stage "download") and the database is extracted (stage "extract"). total_bytes is None when unknown.
+    :return: The SHA-256 hex digest of the extracted database.
     """
     app_package_name = APP_PACKAGE_NAMES[board]
-    response = requests.get(
+    response = (session or requests).get(
         f"https://d.apkpure.net/b/APK/com.auroraclimbing.{app_package_name}",
         params={"version": "latest"},
         # Some user-agent is required, 403 if not included
         headers={
             "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
         },
+        stream=True,
     )
     response.raise_for_status()
 
-    bundle_file = io.BytesIO(response.content)
-    with zipfile.ZipFile(bundle_file, "r") as zip_file:
-        try: 
-            apk_file = io.BytesIO(zip_file.read(f"com.auroraclimbing.{app_package_name}.apk"))
-        except KeyError:
-            # Fallback to old APK directory structure to support older versions
-            with open(output_file, "wb") as output_file:
-                output_file.write(zip_file.read("assets/db.sqlite3"))
-        else:
-            with zipfile.ZipFile(apk_file, "r") as main_zip:
-                with open(output_file, "wb") as output_file:
-                    output_file.write(main_zip.read("assets/db.sqlite3"))
+    output_directory = os.path.dirname(os.path.abspath(output_file))
+    with tempfile.TemporaryDirectory(
+        dir=output_directory, prefix=".boardlib-download-"
+    ) as temp_directory:
+        bundle_path = os.path.join(temp_directory, "bundle.xapk")
+        try:
+            content_length = response.headers.get("Content-Length")
+            with open(bundle_path, "wb") as bundle_file:
+                copy_in_chunks(
+                    response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE),
+                    bundle_file,
+                    progress_callback=progress_callback,
+                    stage="download",
+                    total_bytes=int(content_length) if content_length else None,
+                )
+        finally:
+            response.close()
+
+        database_path = os.path.join(temp_directory, "db.sqlite3")
+        with zipfile.ZipFile(bundle_path, "r") as zip_file:
+            try:
+                apk_info = zip_file.getinfo(f"com.auroraclimbing.{app_package_name}.apk")
+            except KeyError:
+                # Fallback to old APK directory structure to support older versions
+                sha256 = extract_zip_member(
+                    zip_file, "assets/db.sqlite3", database_path, progress_callback
+                )
+            else:
+                apk_path = os.path.join(temp_directory, "app.apk")
+                extract_zip_member(zip_file, apk_info, apk_path)
+                with zipfile.ZipFile(apk_path, "r") as main_zip:
+                    sha256 = extract_zip_member(
+                        main_zip, "assets/db.sqlite3", database_path, progress_callback
+                    )
+
+        os.replace(database_path, output_file)
+
+    return sha256
+
+
+def extract_zip_member(zip_file, member, output_path, progress_callback=None):
+    """
+    Copy a member of a zip file to the given path in chunks.
+
+    :param zip_file: The open zipfile.ZipFile.
+    :param member: The member name or zipfile.ZipInfo.
+    :param output_path: The path to write the member to.
+    :param progress_callback: Optional function called with ("extract", bytes_done, total_bytes).
+    :return: The SHA-256 hex digest of the member.
+    """
+    if not isinstance(member, zipfile.ZipInfo):
+        member = zip_file.getinfo(member)
+
+    with zip_file.open(member) as member_file, open(output_path, "wb") as output_file:
+        return copy_in_chunks(
+            iter(lambda: member_file.read(DOWNLOAD_CHUNK_SIZE), b""),
+            output_file,
+            progress_callback=progress_callback,
+            stage="extract",
+            total_bytes=member.file_size,
+        )
+
+
+def copy_in_chunks(
+    chunks, output_file, progress_callback=None, stage=None, total_bytes=None
+):
+    """
+    :param chunks: An iterator of bytes chunks.
+    :param output_file: The binary file to write the chunks to.
+    :param progress_callback: Optional function called with (stage, bytes_done, total_bytes) after each chunk.
+    :return: The SHA-256 hex digest of the data written.
+    """
+    sha256 = hashlib.sha256()
+    bytes_done = 0
+    for chunk in chunks:
+        output_file.write(chunk)
+        sha256.update(chunk)
+        bytes_done += len(chunk)
+        if progress_callback:
+            progress_callback(stage, bytes_done, total_bytes)
+    return sha256.hexdigest()
+
+
+class ReadOnlyDatabase:
+    """
+    A single read-only connection to a board database, shared by every reader.
+
+    The database is opened once in read-only URI mode with query_only set, memory mapped I/O and a larger page cache.
+    The connection keeps the statements it has run prepared, so repeated lookups skip parsing and planning. It may be
+    used from several threads; queries are serialized by a lock.
+
+    Every reader in this module accepts a ReadOnlyDatabase in place of a database path. Use as a context manager, or
+    call close() when done.
+    """
+
+    def __init__(
+        self,
+        database,
+        mmap_size=READ_MMAP_SIZE,
+        cache_size_kib=READ_CACHE_SIZE_KIB,
+        cached_statements=READ_CACHED_STATEMENTS,
+    ):
+        """
+        :param database: The path to the SQLite database file.
+        :param mmap_size: The number of bytes of the database file to memory map.
+        :param cache_size_kib: The size of the page cache in KiB.
+        :param cached_statements: The number of prepared statements to keep.
+        """
+        self.database = database
+        self.connection = sqlite3.connect(
+            f"{pathlib.Path(database).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=cached_statements,
+        )
+        self.connection.execute(f"PRAGMA mmap_size = {int(mmap_size)}")
+        self.connection.execute(f"PRAGMA cache_size = -{int(cache_size_kib)}")
+        self.connection.execute("PRAGMA query_only = ON")
+        self.lock = threading.RLock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @contextlib.contextmanager
+    def connect(self):
+        """
+        Hold the connection for the duration of the with block. Results must be read before it ends.
+        """
+        with self.lock:
+            yield self.connection
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+@contextlib.contextmanager
+def read_connection(database):
+    """
+    :param database: The path to the SQLite database file, or a ReadOnlyDatabase.
+    :return: A context manager for a connection to read from. A connection opened for a path is closed on exit.
+    """
+    if isinstance(database, ReadOnlyDatabase):
+        with database.connect() as connection:
+            yield connection
+    else:
+        with contextlib.closing(sqlite3.connect(database)) as connection:
+            yield connection
 
 
 def get_shared_syncs(database):
     """
     Retrieve the mapping of tables names to last sync dates for the shared (public) tables in the database.
 
-    :param database: The path to the SQLite database file.
+    :param database: The path to the SQLite database file, or a ReadOnlyDatabase.
     :return: A dictionary mapping table names to their last synchronized date.
     """
-    with sqlite3.connect(database) as connection:
+    with read_connection(database) as connection:
         result = connection.execute(
             "SELECT table_name, last_synchronized_at FROM shared_syncs"
         )
@@ -71,86 +283,1160 @@ def sync_shared_tables(database, sync_result):
     """
     Sync the shared tables in the database with the provided sync results from a sync API request.
 
+    Opens a new connection for every call. Use SharedTablesWriter to apply many sync pages over a single connection.
+
     :param database: The path to the SQLite database file.
-    :param row_counts: A dictionary mapping table names to number of rows inserted/updated/deleted.
+    :param sync_result: A dictionary mapping table names to the rows returned by the sync API.
+    :return: A dictionary mapping table names to their row counts, as returned by insert_rows_default.
     """
     with sqlite3.connect(database) as connection:
         row_counts = {}
         for table_name, rows in sync_result.items():
-            ROW_INSERTERS.get(table_name, insert_rows_default)(
-                connection, table_name, rows
+            row_counts[table_name] = ROW_INSERTERS.get(
+                table_name, insert_rows_default
+            )(connection, table_name, rows)
+
+        return row_counts
+
+
+class SharedTablesWriter:
+    """
+    Applies sync pages to the tables of a database over one long-lived connection. Used for the shared tables of a
+    board database, and for the user tables of a user store.
+
+    Column lists and conflict keys are read once per table and the upsert statements built from them are reused, so
+    sqlite3 keeps them prepared in its statement cache. Pages are committed together in batches of commit_pages. Each page is applied
+    inside a savepoint, so a page that fails part way through leaves no partial rows behind.
+
+    In bulk-load mode, meant for syncs which rewrite most of the tables, the database is switched to WAL journaling
+    with synchronous=NORMAL, at least BULK_LOAD_COMMIT_PAGES pages are committed together, and the non-unique indexes
+    of each table are dropped before it is first written and rebuilt once when the writer is closed. The original
+    journal mode is restored on close. Existing keys are not counted in bulk-load mode, so the row counts of each table
+    report the rows inserted and updated together, as upserted.
+
+    Use as a context manager, or call close() when done. Pending pages are committed on a clean exit.
+    """
+
+    def __init__(
+        self, database, commit_pages=DEFAULT_SYNC_COMMIT_PAGES, bulk_load=False
+    ):
+        """
+        :param database: The path to the SQLite database file.
+        :param commit_pages: The number of sync pages to apply between commits.
+        :param bulk_load: If true, write in bulk-load mode.
+        """
+        self.connection = sqlite3.connect(database, cached_statements=256)
+        self.commit_pages = commit_pages
+        self.pending_pages = 0
+        self.table_columns = {}
+        self.table_conflict_columns = {}
+        self.bulk_load = bulk_load
+        self.dropped_indexes = {}
+        if bulk_load:
+            self.commit_pages = max(commit_pages, BULK_LOAD_COMMIT_PAGES)
+            self.journal_mode = self.connection.execute(
+                "PRAGMA journal_mode"
+            ).fetchone()[0]
+            self.connection.execute("PRAGMA journal_mode = WAL")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.connection.rollback()
+            self.finish_bulk_load()
+            self.connection.close()
+
+    def get_columns(self, table_name):
+        """
+        :param table_name: The name of the table.
+        :return: The cached list of column names for the table.
+        """
+        if table_name not in self.table_columns:
+            self.table_columns[table_name] = get_table_columns(
+                self.connection, table_name
+            )
+            if self.bulk_load:
+                self.drop_indexes(table_name)
+        return self.table_columns[table_name]
+
+    def get_conflict_columns(self, table_name):
+        """
+        :param table_name: The name of the table.
+        :return: The cached conflict key columns for the table.
+        """
+        if table_name not in self.table_conflict_columns:
+            self.table_conflict_columns[table_name] = get_conflict_columns(
+                self.connection, table_name
             )
-            row_counts[table_name] = len(rows)
+        return self.table_conflict_columns[table_name]
+
+    def drop_indexes(self, table_name):
+        """
+        Drop the non-unique indexes of a table, keeping their definitions to rebuild them with.
+        """
+        for _, index_name, unique, origin, *_ in self.connection.execute(
+            f"PRAGMA index_list('{table_name}')"
+        ).fetchall():
+            if unique or origin != "c":
+                continue
+            (self.dropped_indexes[index_name],) = self.connection.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'index' AND name = ?",
+                (index_name,),
+            ).fetchone()
+            self.connection.execute(f'DROP INDEX "{index_name}"')
 
+    def finish_bulk_load(self):
+        """
+        Rebuild the dropped indexes and restore the journal mode. Indexes whose drop was rolled back are left as they
+        are.
+        """
+        if not self.bulk_load:
+            return
+
+        existing_indexes = {
+            row[0]
+            for row in self.connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        with self.connection:
+            for index_name, index_sql in self.dropped_indexes.items():
+                if index_name not in existing_indexes:
+                    self.connection.execute(index_sql)
+        self.dropped_indexes = {}
+        self.connection.execute(f"PRAGMA journal_mode = {self.journal_mode}")
+
+    def write(self, sync_result):
+        """
+        Apply one page of sync results.
+
+        :param sync_result: A dictionary mapping table names to the rows returned by the sync API, or an iterator of
+            (table_name, rows) pairs as produced by a streamed sync.
+        :return: A dictionary mapping table names to their row counts, as returned by insert_rows_default.
+        """
+        tables = (
+            sync_result.items() if hasattr(sync_result, "items") else sync_result
+        )
+        row_counts = {}
+        with self.page_savepoint():
+            for table_name, rows in tables:
+                row_counts[table_name] = ROW_INSERTERS.get(
+                    table_name, insert_rows_default
+                )(
+                    self.connection,
+                    table_name,
+                    rows,
+                    columns=self.get_columns(table_name),
+                    conflict_columns=self.get_conflict_columns(table_name),
+                    count_existing=not self.bulk_load,
+                )
+        return row_counts
+
+    def write_json(self, page_json):
+        """
+        Apply one page of sync results from the undecoded response text. The rows of each table are read with SQLite's
+        JSON functions, so no Python objects are built for them.
+
+        :param page_json: The JSON text of a sync API response, e.g. as yielded by boardlib.api.aurora.sync with
+            raw=True. Every array in the response is written to the table of the same name.
+        :return: A dictionary mapping table names to their row counts, as returned by insert_rows_default.
+        """
+        row_counts = {}
+        with self.page_savepoint():
+            for table_name, rows_json in get_json_arrays(self.connection, page_json):
+                row_counts[table_name] = JSON_ROW_INSERTERS.get(
+                    table_name, insert_rows_json
+                )(
+                    self.connection,
+                    table_name,
+                    rows_json,
+                    columns=self.get_columns(table_name),
+                    conflict_columns=self.get_conflict_columns(table_name),
+                    count_existing=not self.bulk_load,
+                )
         return row_counts
 
+    @contextlib.contextmanager
+    def page_savepoint(self):
+        """
+        Apply the writes of the with block as one page, rolled back together if it fails.
+        """
+        if not self.connection.in_transaction:
+            self.connection.execute("BEGIN")
+        self.connection.execute("SAVEPOINT sync_page")
+        try:
+            yield
+        except Exception:
+            self.connection.execute("ROLLBACK TO sync_page")
+            self.connection.execute("RELEASE sync_page")
+            raise
+
+        self.connection.execute("RELEASE sync_page")
+        self.pending_pages += 1
+        if self.pending_pages >= self.commit_pages:
+            self.commit()
 
-def insert_rows_default(connection, table_name, rows):
+    def commit(self):
+        self.connection.commit()
+        self.pending_pages = 0
+
+    def close(self):
+        self.commit()
+        self.finish_bulk_load()
+        self.connection.close()
+
+
+def is_bulk_load_needed(tables_and_sync_dates, max_age=BULK_LOAD_SYNC_AGE, now=None):
+    """
+    :param tables_and_sync_dates: A mapping of table names to the date they were last synchronized, as returned by
+        get_shared_syncs.
+    :param max_age: How far behind the oldest sync date may be before a bulk load is needed.
+    :param now: The current UTC time. Defaults to the time of the call.
+    :return: True if any table has never been synchronized, has a sync date which cannot be parsed, or was last
+        synchronized more than max_age ago.
+    """
+    sync_dates = [
+        parse_sync_date(sync_date) for sync_date in tables_and_sync_dates.values()
+    ]
+    if not sync_dates or None in sync_dates:
+        return True
+    if now is None:
+        now = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return now - min(sync_dates) > max_age
+
+
+def parse_sync_date(sync_date):
+    """
+    Parse a sync date as stored in shared_syncs, e.g. "2024-02-28 00:00:00.000000". The fraction of a second may have
+    any number of digits, or be left out.
+
+    :return: The naive UTC datetime, or None if sync_date is empty or not a date.
+    """
+    if not sync_date:
+        return None
+
+    date_time, _, fraction = str(sync_date).replace("T", " ").partition(".")
+    if fraction and not fraction.isdigit():
+        return None
+    try:
+        parsed_date = datetime.datetime.strptime(date_time, "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+    return parsed_date.replace(microsecond=int(fraction[:6].ljust(6, "0") or 0))
+
+
+def get_table_columns(connection, table_name):
     """
-    Insert or replace the given rows into the specified table
     :param connection: The SQLite connection object.
-    :param table_name: The name of the table to insert rows into.
-    :param rows: The list of rows to insert.
+    :param table_name: The name of the table.
+    :return: The list of column names for the table, in schema order.
     """
     pragma_result = connection.execute(f"PRAGMA table_info('{table_name}')")
-    value_params = ", ".join(f":{row[1]}" for row in pragma_result.fetchall())
-    connection.executemany(
-        f"INSERT OR REPLACE INTO {table_name} VALUES ({value_params})",
-        (collections.defaultdict(lambda: None, row) for row in rows),
+    return [row[1] for row in pragma_result.fetchall()]
+
+
+def get_conflict_columns(connection, table_name):
+    """
+    :param connection: The SQLite connection object.
+    :param table_name: The name of the table.
+    :return: The columns of the table's unique key: its primary key, or else its unique index. Empty if it has no
+        unique key, or more than one, since an upsert only resolves conflicts on one key where INSERT OR REPLACE
+        resolves them on all of them.
+    """
+    primary_key = sorted(
+        (row[5], row[1])
+        for row in connection.execute(f"PRAGMA table_info('{table_name}')")
+        if row[5]
     )
+    unique_indexes = [
+        (index_name, partial)
+        for _, index_name, unique, origin, partial in connection.execute(
+            f"PRAGMA index_list('{table_name}')"
+        ).fetchall()
+        if unique and origin != "pk"
+    ]
+    if primary_key:
+        return [] if unique_indexes else [column for _, column in primary_key]
+    if len(unique_indexes) != 1:
+        return []
+
+    ((index_name, partial),) = unique_indexes
+    columns = [
+        row[2] for row in connection.execute(f"PRAGMA index_info('{index_name}')")
+    ]
+    # Partial indexes, and indexes on expressions which have no column name, cannot be used as a conflict target
+    if partial or None in columns:
+        return []
+    return columns
+
+
+def upsert_sql(table_name, columns, conflict_columns, source=None):
+    """
+    Build an INSERT statement which updates the existing row with the same conflict key, but only when one of its
+    values differs, so identical rows are left untouched. Falls back to INSERT OR REPLACE when no conflict columns
+    are given, as for tables without a single unique key, or SQLite is older than 3.24 and has no upsert.
+
+    :param table_name: The name of the table.
+    :param columns: The column names of the table, in schema order.
+    :param conflict_columns: The columns of the table's primary key or unique index.
+    :param source: Optional SELECT statement producing the rows to insert, with a WHERE clause. Defaults to VALUES
+        with named parameters for the columns.
+    :return: The SQL of the statement.
+    """
+    if source is None:
+        source = f"VALUES ({', '.join(f':{column}' for column in columns)})"
+    if not conflict_columns or sqlite3.sqlite_version_info < (3, 24, 0):
+        return f"INSERT OR REPLACE INTO {table_name} {source}"
+
+    conflict_target = ", ".join(conflict_columns)
+    update_columns = [column for column in columns if column not in conflict_columns]
+    if not update_columns:
+        return f"INSERT INTO {table_name} {source} ON CONFLICT ({conflict_target}) DO NOTHING"
+
+    assignments = ", ".join(f"{column} = excluded.{column}" for column in update_columns)
+    changed = " OR ".join(
+        f"{column} IS NOT excluded.{column}" for column in update_columns
+    )
+    return (
+        f"INSERT INTO {table_name} {source} "
+        f"ON CONFLICT ({conflict_target}) DO UPDATE SET {assignments} WHERE {changed}"
+    )
+
+
+def count_existing_keys(connection, table_name, conflict_columns, rows):
+    """
+    :return: A (key_count, existing_count) tuple of the number of distinct conflict keys in rows, and how many of
+        them are already in the table.
+    """
+    keys = list({tuple(row[column] for column in conflict_columns) for row in rows})
+    # A join against the keys searches the key index for every key. A row value IN (VALUES ...) scans the table.
+    key_matches = " AND ".join(
+        f"{table_name}.{column} = conflict_keys.column{index}"
+        for index, column in enumerate(conflict_columns, start=1)
+    )
+    key_params = f"({', '.join('?' * len(conflict_columns))})"
+    existing_count = 0
+    for batch in iter_batches(keys, max(1, LOOKUP_BATCH_SIZE // len(conflict_columns))):
+        existing_count += connection.execute(
+            f"""
+            SELECT COUNT(*)
+            FROM (VALUES {', '.join([key_params] * len(batch))}) AS conflict_keys
+            INNER JOIN {table_name} ON {key_matches}
+            """,
+            [value for key in batch for value in key],
+        ).fetchone()[0]
+    return len(keys), existing_count
+
+
+def upsert_rows(
+    connection, table_name, rows, columns, conflict_columns, count_existing=True
+):
+    """
+    Upsert one batch of rows with the statement built by upsert_sql.
 
+    :param rows: A list of row dictionaries with a value for every column.
+    :param count_existing: If false, the keys of the rows are not looked up before the upsert, and every changed row
+        is counted as inserted.
+    :return: An (inserted, updated) tuple of row counts.
+    """
+    if not rows:
+        return 0, 0
+
+    inserted = None
+    if conflict_columns and count_existing:
+        key_count, existing_count = count_existing_keys(
+            connection, table_name, conflict_columns, rows
+        )
+        inserted = key_count - existing_count
+    total_changes = connection.total_changes
+    connection.executemany(upsert_sql(table_name, columns, conflict_columns), rows)
+    changed = connection.total_changes - total_changes
+    if inserted is None:
+        inserted = changed
+    return inserted, changed - inserted
 
-def insert_rows_climb_stats(connection, table_name, rows):
+
+def new_row_counts(count_existing=True):
+    """
+    :param count_existing: False if existing keys are not counted, and inserted and updated rows are counted together.
+    :return: A dictionary of zero row counts, with the keys of ROW_COUNT_KEYS, or of UPSERT_ROW_COUNT_KEYS if
+        count_existing is false.
+    """
+    return dict.fromkeys(ROW_COUNT_KEYS if count_existing else UPSERT_ROW_COUNT_KEYS, 0)
+
+
+def add_upsert_counts(row_counts, inserted, updated):
+    """
+    Add the counts returned by upsert_rows to row counts made by new_row_counts.
     """
-    Insert/replace/delete the given rows into the climb_stats table. When a row has no display_difficulty, this means the row should be deleted.
+    if "upserted" in row_counts:
+        row_counts["upserted"] += inserted + updated
+    else:
+        row_counts["inserted"] += inserted
+        row_counts["updated"] += updated
+
+
+def insert_rows_default(
+    connection,
+    table_name,
+    rows,
+    columns=None,
+    conflict_columns=None,
+    count_existing=True,
+):
+    """
+    Upsert the given rows into the specified table. Rows identical to the stored ones are not written.
+    :param connection: The SQLite connection object.
+    :param table_name: The name of the table to insert rows into.
+    :param rows: The rows to insert. May be any iterable; rows are consumed lazily.
+    :param columns: The column names of the table. Read from the schema if not provided.
+    :param conflict_columns: The key columns of the table to detect existing rows by. Read from the schema if not
+        provided.
+    :param count_existing: If false, existing keys are not looked up, which saves a query per batch of rows, and the
+        rows inserted and updated are counted together.
+    :return: A dictionary with the number of rows inserted, updated, unchanged and deleted, or upserted, unchanged
+        and deleted if count_existing is false.
+    """
+    if columns is None:
+        columns = get_table_columns(connection, table_name)
+    if conflict_columns is None:
+        conflict_columns = get_conflict_columns(connection, table_name)
+    row_counts = new_row_counts(count_existing)
+    for batch in iter_batches(rows, ROW_BATCH_SIZE):
+        inserted, updated = upsert_rows(
+            connection,
+            table_name,
+            [collections.defaultdict(lambda: None, row) for row in batch],
+            columns,
+            conflict_columns,
+            count_existing,
+        )
+        add_upsert_counts(row_counts, inserted, updated)
+        row_counts["unchanged"] += len(batch) - inserted - updated
+    return row_counts
+
+
+def insert_rows_climb_stats(
+    connection,
+    table_name,
+    rows,
+    columns=None,
+    conflict_columns=None,
+    count_existing=True,
+):
+    """
+    Upsert/delete the given rows into the climb_stats table. When a row has no display_difficulty, this means the row should be deleted.
     :param connection: The SQLite connection object.
     :param table_name: The name of the table to insert rows into. Should be "climb_stats".
-    :param rows: The list of rows to insert.
+    :param rows: The rows to insert. May be any iterable; rows are consumed lazily in batches.
+    :param columns: The column names of the table. Read from the schema if not provided.
+    :param conflict_columns: The key columns of the table to detect existing rows by. Read from the schema if not
+        provided.
+    :param count_existing: If false, existing keys are not looked up and the rows inserted and updated are counted
+        together.
+    :return: A dictionary with the number of rows inserted, updated, unchanged and deleted, or upserted, unchanged
+        and deleted if count_existing is false. Deletes of rows which were not stored are counted as unchanged.
     """
-    pragma_result = connection.execute(f"PRAGMA table_info('{table_name}')")
-    value_params = ", ".join(f":{row[1]}" for row in pragma_result.fetchall())
-    insert_rows = []
-    delete_rows = []
-    for row in rows:
-        row_dict = collections.defaultdict(
-            lambda: None,
-            row,
-            display_difficulty=(
-                row["benchmark_difficulty"]
-                if row.get("benchmark_difficulty")
-                else row["difficulty_average"]
-            ),
+    if columns is None:
+        columns = get_table_columns(connection, table_name)
+    if conflict_columns is None:
+        conflict_columns = get_conflict_columns(connection, table_name)
+    row_counts = new_row_counts(count_existing)
+    for batch in iter_batches(rows, ROW_BATCH_SIZE):
+        insert_rows = []
+        delete_rows = []
+        for row in batch:
+            row_dict = collections.defaultdict(
+                lambda: None,
+                row,
+                display_difficulty=(
+                    row["benchmark_difficulty"]
+                    if row.get("benchmark_difficulty")
+                    else row["difficulty_average"]
+                ),
+            )
+            row_list = insert_rows if row_dict["display_difficulty"] else delete_rows
+            row_list.append(row_dict)
+
+        inserted, updated = upsert_rows(
+            connection,
+            table_name,
+            insert_rows,
+            columns,
+            conflict_columns,
+            count_existing,
+        )
+        total_changes = connection.total_changes
+        connection.executemany(
+            f"DELETE FROM {table_name} WHERE climb_uuid = :climb_uuid AND angle = :angle",
+            delete_rows,
+        )
+        deleted = connection.total_changes - total_changes
+        add_upsert_counts(row_counts, inserted, updated)
+        row_counts["deleted"] += deleted
+        row_counts["unchanged"] += len(batch) - inserted - updated - deleted
+    return row_counts
+
+
+def json_key_path(key):
+    """
+    :return: The JSON path of a key of the top-level object.
+    """
+    return f'$."{key}"'
+
+
+def json_row_value(column):
+    """
+    :return: SQL extracting the value of a column from the row object of a json_each row.
+    """
+    return f"json_extract(value, '{json_key_path(column)}')"
+
+
+def get_json_arrays(connection, page_json):
+    """
+    Split the JSON text of a sync API response into the JSON text of each of its arrays, so that the statements
+    writing a table only parse that table's rows.
+
+    :return: A list of (key, array_json) pairs for the keys of the top-level object whose values are arrays, in
+        document order.
+    """
+    return connection.execute(
+        "SELECT key, value FROM json_each(?) WHERE type = 'array' ORDER BY id",
+        (page_json,),
+    ).fetchall()
+
+
+def get_json_sync_state(page_json):
+    """
+    Decode only the parts of the JSON text of a sync API response needed to request the next page.
+
+    :return: A dictionary with the response's shared_syncs and user_syncs, and _complete if it is set.
+    """
+    with contextlib.closing(sqlite3.connect(":memory:")) as connection:
+        shared_syncs, user_syncs, complete = connection.execute(
+            """
+            SELECT
+                json_extract(:page, '$.shared_syncs'),
+                json_extract(:page, '$.user_syncs'),
+                json_extract(:page, '$._complete')
+            """,
+            {"page": page_json},
+        ).fetchone()
+    sync_state = {
+        "shared_syncs": json.loads(shared_syncs) if shared_syncs else [],
+        "user_syncs": json.loads(user_syncs) if user_syncs else [],
+    }
+    if complete is not None:
+        sync_state["_complete"] = bool(complete)
+    return sync_state
+
+
+def load_json_rows(connection, table_name, rows_json, path, columns):
+    """
+    Read the rows of a JSON array into a temporary table with the columns of the given table, so the array is parsed
+    once however many statements then read the rows. The temporary table is created on first use and emptied on every
+    load.
+
+    :param rows_json: JSON text containing an array of row objects.
+    :param path: The JSON path of the array in rows_json.
+    :param columns: The column names of the table. Keys missing from a row are loaded as NULL; keys which are not
+        columns are ignored.
+    :return: A (rows_table, row_count) tuple of the name of the temporary table and the number of rows loaded.
+    """
+    rows_table = f"json_rows_{table_name}"
+    connection.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {rows_table} AS SELECT * FROM main.{table_name} WHERE false"
+    )
+    connection.execute(f"DELETE FROM temp.{rows_table}")
+    cursor = connection.execute(
+        f"""
+        INSERT INTO temp.{rows_table} ({', '.join(columns)})
+        SELECT {', '.join(json_row_value(column) for column in columns)}
+        FROM json_each(?, ?)
+        """,
+        (rows_json, path),
+    )
+    return f"temp.{rows_table}", cursor.rowcount
+
+
+def upsert_rows_from(
+    connection,
+    table_name,
+    rows_table,
+    columns,
+    conflict_columns,
+    expressions=None,
+    condition="true",
+    count_existing=True,
+):
+    """
+    Upsert the rows of another table, such as one filled by load_json_rows, with the statement built by upsert_sql.
+
+    :param rows_table: The name of the table holding the rows to upsert.
+    :param expressions: Optional mapping of column names to the SQL computing them from the columns of rows_table,
+        instead of reading the column of the same name.
+    :param condition: SQL selecting the rows of rows_table to upsert.
+    :param count_existing: If false, the keys of the rows are not looked up before the upsert, and every changed row
+        is counted as inserted.
+    :return: An (inserted, updated) tuple of row counts.
+    """
+    expressions = expressions or {}
+    source = f"""
+        SELECT {', '.join(expressions.get(column, column) for column in columns)}
+        FROM {rows_table}
+        WHERE {condition}
+    """
+
+    inserted = None
+    if conflict_columns and count_existing:
+        key_matches = " AND ".join(
+            f"{table_name}.{column} = conflict_keys.{column}" for column in conflict_columns
         )
-        row_list = insert_rows if row_dict["display_difficulty"] else delete_rows
-        row_list.append(row_dict)
+        # Counts the distinct keys, and those of them already stored, searching the key index for every key
+        (inserted,) = connection.execute(
+            f"""
+            SELECT COUNT(*) - COUNT({table_name}.{conflict_columns[0]})
+            FROM (
+                SELECT DISTINCT {', '.join(conflict_columns)} FROM {rows_table} WHERE {condition}
+            ) AS conflict_keys
+            LEFT JOIN {table_name} ON {key_matches}
+            """
+        ).fetchone()
+    total_changes = connection.total_changes
+    connection.execute(upsert_sql(table_name, columns, conflict_columns, source))
+    changed = connection.total_changes - total_changes
+    if inserted is None:
+        inserted = changed
+    return inserted, changed - inserted
+
 
-    connection.executemany(
-        f"INSERT OR REPLACE INTO {table_name} VALUES ({value_params})",
-        insert_rows,
+def insert_rows_json(
+    connection,
+    table_name,
+    rows_json,
+    path="$",
+    columns=None,
+    conflict_columns=None,
+    count_existing=True,
+):
+    """
+    Upsert the rows of a JSON array into the specified table, like insert_rows_default. The rows are read once with
+    json_each into a temporary table, which the row count and upsert statements then read. Keys missing from a row are
+    inserted as NULL; keys which are not columns of the table are ignored.
+    :param connection: The SQLite connection object.
+    :param table_name: The name of the table to insert rows into.
+    :param rows_json: JSON text containing an array of row objects.
+    :param path: The JSON path of the array in rows_json.
+    :param columns: The column names of the table. Read from the schema if not provided.
+    :param conflict_columns: The key columns of the table to detect existing rows by. Read from the schema if not
+        provided.
+    :param count_existing: If false, existing keys are not looked up, which saves a query, and the rows inserted and
+        updated are counted together.
+    :return: A dictionary with the number of rows inserted, updated, unchanged and deleted, or upserted, unchanged
+        and deleted if count_existing is false.
+    """
+    if columns is None:
+        columns = get_table_columns(connection, table_name)
+    if conflict_columns is None:
+        conflict_columns = get_conflict_columns(connection, table_name)
+    rows_table, row_count = load_json_rows(
+        connection, table_name, rows_json, path, columns
     )
-    for row in delete_rows:
-        connection.execute(
-            f"DELETE FROM {table_name} WHERE climb_uuid = :climb_uuid AND angle = :angle",
-            row,
+    inserted, updated = upsert_rows_from(
+        connection,
+        table_name,
+        rows_table,
+        columns,
+        conflict_columns,
+        count_existing=count_existing,
+    )
+    row_counts = new_row_counts(count_existing)
+    add_upsert_counts(row_counts, inserted, updated)
+    row_counts["unchanged"] = row_count - inserted - updated
+    return row_counts
+
+
+def insert_rows_json_climb_stats(
+    connection,
+    table_name,
+    rows_json,
+    path="$",
+    columns=None,
+    conflict_columns=None,
+    count_existing=True,
+):
+    """
+    Upsert/delete the rows of a JSON array into the climb_stats table, like insert_rows_climb_stats. The rows are read
+    once into a temporary table, the display difficulty is computed in SQL, and rows without one are deleted with a
+    second statement.
+    :param connection: The SQLite connection object.
+    :param table_name: The name of the table to insert rows into. Should be "climb_stats".
+    :param rows_json: JSON text containing an array of row objects.
+    :param path: The JSON path of the array in rows_json.
+    :param columns: The column names of the table. Read from the schema if not provided.
+    :param conflict_columns: The key columns of the table to detect existing rows by. Read from the schema if not
+        provided.
+    :param count_existing: If false, existing keys are not looked up and the rows inserted and updated are counted
+        together.
+    :return: A dictionary with the number of rows inserted, updated, unchanged and deleted, or upserted, unchanged
+        and deleted if count_existing is false. Deletes of rows which were not stored are counted as unchanged.
+    """
+    if columns is None:
+        columns = get_table_columns(connection, table_name)
+    if conflict_columns is None:
+        conflict_columns = get_conflict_columns(connection, table_name)
+    rows_table, row_count = load_json_rows(
+        connection, table_name, rows_json, path, columns
+    )
+    connection.execute(
+        f"""
+        UPDATE {rows_table}
+        SET display_difficulty = CASE
+            WHEN benchmark_difficulty THEN benchmark_difficulty
+            ELSE difficulty_average
+        END
+        """
+    )
+    inserted, updated = upsert_rows_from(
+        connection,
+        table_name,
+        rows_table,
+        columns,
+        conflict_columns,
+        condition="ifnull(display_difficulty, 0) != 0",
+        count_existing=count_existing,
+    )
+    total_changes = connection.total_changes
+    connection.execute(
+        f"""
+        DELETE FROM {table_name}
+        WHERE rowid IN (
+            SELECT {table_name}.rowid
+            FROM {rows_table} AS json_rows
+            INNER JOIN {table_name}
+                ON {table_name}.climb_uuid = json_rows.climb_uuid
+                AND {table_name}.angle = json_rows.angle
+            WHERE ifnull(json_rows.display_difficulty, 0) = 0
         )
+        """
+    )
+    deleted = connection.total_changes - total_changes
+    row_counts = new_row_counts(count_existing)
+    add_upsert_counts(row_counts, inserted, updated)
+    row_counts["unchanged"] = row_count - inserted - updated - deleted
+    row_counts["deleted"] = deleted
+    return row_counts
+
+
+def add_row_counts(row_counts_totals, row_counts):
+    """
+    Add the row counts of one sync page to running totals.
+
+    :param row_counts_totals: A dictionary mapping table names to row counts, updated in place.
+    :param row_counts: A dictionary mapping table names to row counts, as returned by SharedTablesWriter.write.
+    :return: row_counts_totals
+    """
+    for table_name, table_row_counts in row_counts.items():
+        table_totals = row_counts_totals.setdefault(
+            table_name, dict.fromkeys(table_row_counts, 0)
+        )
+        for key, count in table_row_counts.items():
+            table_totals[key] += count
+    return row_counts_totals
+
+
+def iter_batches(rows, batch_size):
+    """
+    :param rows: Any iterable of rows.
+    :param batch_size: The maximum number of rows per batch.
+    :return: An iterator of lists of at most batch_size rows.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        yield batch
 
 
 ROW_INSERTERS = {
     "climb_stats": insert_rows_climb_stats,
 }
+JSON_ROW_INSERTERS = {
+    "climb_stats": insert_rows_json_climb_stats,
+}
 
 
-def get_difficulty(database, climb_uuid, angle):
-    with sqlite3.connect(database) as connection:
-        results = connection.execute(
-            "SELECT display_difficulty, benchmark_difficulty FROM climb_stats WHERE climb_uuid = ? AND angle = ?",
-            (climb_uuid, angle),
+def create_user_store(database):
+    """
+    Create the tables of a user store, a separate SQLite database holding users' ascents, bids and the dates they were
+    last synchronized. Tables which already exist are left as they are.
+
+    :param database: The path to the SQLite database file of the user store.
+    """
+    with contextlib.closing(sqlite3.connect(database)) as connection:
+        connection.executescript(USER_STORE_SCHEMA)
+
+
+def get_user_syncs(database, user_id):
+    """
+    :param database: The path to the SQLite database file of the user store.
+    :param user_id: The id of the user.
+    :return: A dictionary mapping the user's table names to their last synchronized date.
+    """
+    with contextlib.closing(sqlite3.connect(database)) as connection:
+        result = connection.execute(
+            "SELECT table_name, last_synchronized_at FROM user_syncs WHERE user_id = ?",
+            (user_id,),
         )
+        return {
+            table_name: last_synchronized_at
+            for table_name, last_synchronized_at in result.fetchall()
+        }
+
+
+def get_user_rows(database, table_name, user_id):
+    """
+    Read a user's stored rows in the shape returned by the sync API.
+
+    :param database: The path to the SQLite database file of the user store.
+    :param table_name: "ascents" or "bids".
+    :param user_id: The id of the user.
+    :return: A list of row dictionaries, ordered by the date they were climbed.
+    """
+    with contextlib.closing(sqlite3.connect(database)) as connection:
+        connection.row_factory = sqlite3.Row
+        result = connection.execute(
+            f"SELECT * FROM {table_name} WHERE user_id = ? ORDER BY climbed_at, rowid",
+            (user_id,),
+        )
+        rows = []
+        for row in result:
+            row = dict(row)
+            for column in USER_STORE_BOOLEAN_COLUMNS:
+                if row.get(column) is not None:
+                    row[column] = bool(row[column])
+            rows.append(row)
+        return rows
+
+
+class ClimbLookup:
+    """
+    Cached lookups of climb names, difficulties and the difficulty to grade mapping of a board database.
+
+    Call load() with every key that will be needed to fetch them all with a few set-based queries. Keys which were
+    not loaded are queried on first use and cached, so repeated lookups never touch the database again.
+    """
+
+    def __init__(self, database):
+        """
+        :param database: The path to the SQLite database file, or a ReadOnlyDatabase to share its connection.
+        """
+        self.database = database
+        self.climb_names = {}
+        self.difficulties = {}
+        self._difficulty_mapping = None
+
+    @property
+    def difficulty_mapping(self):
+        if self._difficulty_mapping is None:
+            self._difficulty_mapping = get_difficulty_mapping(self.database)
+        return self._difficulty_mapping
+
+    def load(self, climb_uuids=(), climb_angles=()):
+        """
+        Load the names and difficulties for the given keys which are not cached yet.
+
+        :param climb_uuids: The climb UUIDs to load names for.
+        :param climb_angles: The (climb_uuid, angle) pairs to load difficulties for.
+        """
+        missing_uuids = sorted(set(climb_uuids) - self.climb_names.keys())
+        missing_angles = set(climb_angles) - self.difficulties.keys()
+        if not missing_uuids and not missing_angles:
+            return
+
+        with read_connection(self.database) as connection:
+            for batch in iter_batches(missing_uuids, LOOKUP_BATCH_SIZE):
+                self.climb_names.update(dict.fromkeys(batch))
+                self.climb_names.update(
+                    connection.execute(
+                        f"SELECT uuid, name FROM climbs WHERE uuid IN ({', '.join('?' * len(batch))})",
+                        batch,
+                    )
+                )
+
+            angle_uuids = sorted({climb_uuid for climb_uuid, _ in missing_angles})
+            self.difficulties.update(dict.fromkeys(missing_angles, (None, None)))
+            for batch in iter_batches(angle_uuids, LOOKUP_BATCH_SIZE):
+                results = connection.execute(
+                    f"""
+                    SELECT climb_uuid, angle, display_difficulty, benchmark_difficulty
+                    FROM climb_stats
+                    WHERE climb_uuid IN ({', '.join('?' * len(batch))})
+                    """,
+                    batch,
+                )
+                for climb_uuid, angle, display_difficulty, benchmark_difficulty in results:
+                    if (climb_uuid, angle) in missing_angles:
+                        self.difficulties[(climb_uuid, angle)] = (
+                            display_difficulty,
+                            benchmark_difficulty,
+                        )
+
+    def get_climb_name(self, climb_uuid):
+        if climb_uuid not in self.climb_names:
+            self.load(climb_uuids=(climb_uuid,))
+        return self.climb_names[climb_uuid]
+
+    def get_difficulty(self, climb_uuid, angle):
+        """
+        :return: The (display_difficulty, benchmark_difficulty) of the climb at the angle, or (None, None).
+        """
+        if (climb_uuid, angle) not in self.difficulties:
+            self.load(climb_angles=((climb_uuid, angle),))
+        return self.difficulties[(climb_uuid, angle)]
+
+
+def round_half_even_sql(expression):
+    """
+    :return: SQL rounding the positive number expression to the nearest integer like Python's round().
+    """
+    truncated = f"CAST({expression} AS INTEGER)"
+    return (
+        f"CASE WHEN {expression} - {truncated} = 0.5 THEN {truncated} + {truncated} % 2 "
+        f"ELSE CAST(ROUND({expression}) AS INTEGER) END"
+    )
+
+
+LOGBOOK_QUERY = f"""
+WITH
+listed_ascents AS (
+    SELECT
+        0 AS part,
+        ROW_NUMBER() OVER (ORDER BY climbed_at, rowid) AS position,
+        climb_uuid,
+        date(climbed_at) AS day,
+        datetime(climbed_at) AS date,
+        is_mirror,
+        angle,
+        difficulty,
+        CASE WHEN attempt_id THEN attempt_id ELSE bid_count END AS tries,
+        comment
+    FROM user_store.ascents
+    WHERE user_id = :user_id AND is_listed
+),
+day_bids AS (
+    SELECT
+        1 AS part,
+        ROW_NUMBER() OVER (ORDER BY climb_uuid, day, is_mirror, angle) AS position,
+        climb_uuid,
+        day,
+        datetime(day) AS date,
+        is_mirror,
+        angle,
+        NULL AS difficulty,
+        tries,
+        NULL AS comment
+    FROM (
+        SELECT
+            bids.climb_uuid,
+            date(bids.climbed_at) AS day,
+            bids.is_mirror,
+            bids.angle,
+            COALESCE(SUM(bids.bid_count), 0) AS tries
+        FROM user_store.bids AS bids
+        JOIN climbs ON climbs.uuid = bids.climb_uuid
+        WHERE bids.user_id = :user_id AND climbs.name IS NOT NULL
+        GROUP BY bids.climb_uuid, day, bids.is_mirror, bids.angle
+    )
+),
+-- Ascents and bids of the same climb, day, mirroring and angle are matched within one window partition: the first
+-- ascent takes the bids' tries, and bids are only kept when there is no ascent to take them
+keyed_entries AS (
+    SELECT
+        *,
+        SUM(1 - part) OVER (day_entries ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+            AS day_ascent_count,
+        SUM(part * tries) OVER (day_entries ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+            AS day_bid_tries,
+        ROW_NUMBER() OVER day_entries AS day_position
+    FROM (SELECT * FROM listed_ascents UNION ALL SELECT * FROM day_bids)
+    WINDOW day_entries AS (PARTITION BY climb_uuid, day, is_mirror, angle ORDER BY part, position)
+),
+entries AS (
+    SELECT
+        keyed_entries.part,
+        keyed_entries.position,
+        keyed_entries.climb_uuid,
+        keyed_entries.angle,
+        climbs.name AS climb_name,
+        keyed_entries.date,
+        logged_grades.boulder_name AS logged_grade,
+        displayed_grades.boulder_name AS displayed_grade,
+        COALESCE(climb_stats.benchmark_difficulty, 0) != 0 AS is_benchmark,
+        keyed_entries.tries
+            + CASE WHEN keyed_entries.day_position = 1 THEN keyed_entries.day_bid_tries ELSE 0 END
+            * (1 - keyed_entries.part) AS tries,
+        keyed_entries.is_mirror,
+        keyed_entries.part = 0 AS is_ascent,
+        keyed_entries.comment
+    FROM keyed_entries
+    JOIN climbs ON climbs.uuid = keyed_entries.climb_uuid
+    LEFT JOIN climb_stats
+        ON climb_stats.climb_uuid = keyed_entries.climb_uuid AND climb_stats.angle = keyed_entries.angle
+    LEFT JOIN difficulty_grades AS logged_grades
+        ON logged_grades.difficulty = {round_half_even_sql("keyed_entries.difficulty")}
+    LEFT JOIN difficulty_grades AS displayed_grades
+        ON displayed_grades.difficulty = {round_half_even_sql("climb_stats.display_difficulty")}
+    WHERE climbs.name IS NOT NULL AND (keyed_entries.part = 0 OR keyed_entries.day_ascent_count = 0)
+)
+SELECT
+    climb_uuid || '-' || angle AS climb_angle_uuid,
+    angle,
+    climb_name,
+    date,
+    logged_grade,
+    displayed_grade,
+    is_benchmark,
+    tries,
+    is_mirror,
+    is_ascent,
+    comment,
+    DENSE_RANK() OVER (PARTITION BY climb_name, is_mirror, angle ORDER BY date(date)) AS sessions_count,
+    SUM(tries) OVER climb_entries AS tries_total,
+    ROW_NUMBER() OVER climb_entries > 1 AS is_repeat
+FROM entries
+WINDOW climb_entries AS (
+    PARTITION BY climb_name, is_mirror, angle
+    ORDER BY date, part, position
+    ROWS UNBOUNDED PRECEDING
+)
+ORDER BY date, climb_name, is_mirror, angle, part, position
+"""
+
+
+def query_logbook(database, user_store, user_id):
+    """
+    Build a user's logbook from a user store with a single query, joining the stored ascents and bids against the
+    climbs, climb_stats and difficulty_grades tables of the board database.
+
+    Produces the same entries, in the same order, as the DataFrame based logbook of boardlib.api.aurora.
+
+    :param database: The path to the SQLite database file of the board, or a ReadOnlyDatabase.
+    :param user_store: The path to the SQLite database file of the user store.
+    :param user_id: The id of the user.
+    :return: A (column_names, rows) tuple.
+    """
+    with read_connection(database) as connection:
+        connection.execute("ATTACH DATABASE ? AS user_store", (str(user_store),))
+        try:
+            result = connection.execute(LOGBOOK_QUERY, {"user_id": user_id})
+            columns, rows = [column[0] for column in result.description], result.fetchall()
+            result.close()
+        finally:
+            # A shared connection outlives this query, so the user store must not stay attached
+            connection.execute("DETACH DATABASE user_store")
+        return columns, rows
+
+
+# Covering indexes for the lookups made by boardlib, which the databases shipped in the apps do not all have
+BOARD_INDEXES = {
+    "boardlib_climb_stats_climb_uuid_angle": "climb_stats (climb_uuid, angle, display_difficulty, benchmark_difficulty)",
+    "boardlib_climbs_uuid_name": "climbs (uuid, name)",
+    "boardlib_product_sizes_layouts_sets_images": "product_sizes_layouts_sets (layout_id, product_size_id, image_filename)",
+}
+DIFFICULTY_QUERY = "SELECT display_difficulty, benchmark_difficulty FROM climb_stats WHERE climb_uuid = ? AND angle = ?"
+CLIMB_NAME_QUERY = "SELECT name FROM climbs WHERE uuid = ?"
+IMAGE_FILENAMES_QUERY = "SELECT image_filename FROM product_sizes_layouts_sets WHERE image_filename IS NOT NULL"
+LAYOUTS_IMAGES_QUERY = """
+SELECT
+    l.name layout_name,
+    s.name product_size_name,
+    p.image_filename
+FROM product_sizes_layouts_sets p
+INNER JOIN
+    (SELECT id, name FROM layouts) AS l ON p.layout_id = l.id
+INNER JOIN
+    (SELECT id, name FROM product_sizes) AS s ON p.product_size_id = s.id
+"""
+# The lookups checked by check_query_plans. ClimbLookup batches keys into IN lists, planned the same as one key.
+LOOKUP_QUERIES = {
+    "get_difficulty": DIFFICULTY_QUERY,
+    "get_climb_name": CLIMB_NAME_QUERY,
+    "get_image_filenames": IMAGE_FILENAMES_QUERY,
+    "get_layouts_images_dict": LAYOUTS_IMAGES_QUERY,
+    "ClimbLookup.climb_names": "SELECT uuid, name FROM climbs WHERE uuid IN (?)",
+    "ClimbLookup.difficulties": (
+        "SELECT climb_uuid, angle, display_difficulty, benchmark_difficulty FROM climb_stats WHERE climb_uuid IN (?)"
+    ),
+}
+
+
+def optimize_database(database, vacuum=False):
+    """
+    Tune a board database for the lookups boardlib makes. Creates the missing BOARD_INDEXES and runs ANALYZE so the
+    query planner has statistics to choose them with.
+
+    :param database: The path to the SQLite database file.
+    :param vacuum: If true, also VACUUM the database to rebuild it without free pages. This rewrites the whole file.
+    :return: The names of the indexes which were created.
+    """
+    with contextlib.closing(sqlite3.connect(database)) as connection:
+        existing_indexes = {
+            row[0]
+            for row in connection.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            )
+        }
+        created_indexes = []
+        with connection:
+            for index_name, index_columns in BOARD_INDEXES.items():
+                if index_name not in existing_indexes:
+                    connection.execute(f"CREATE INDEX {index_name} ON {index_columns}")
+                    created_indexes.append(index_name)
+            connection.execute("ANALYZE")
+        if vacuum:
+            connection.execute("VACUUM")
+        return created_indexes
+
+
+def check_query_plans(database):
+    """
+    Check with EXPLAIN QUERY PLAN that the LOOKUP_QUERIES are answered from indexes.
+
+    :param database: The path to the SQLite database file, or a ReadOnlyDatabase.
+    :return: A dictionary mapping the names of queries which scan a whole table without an index to the plan details
+        of those scans. Empty if every query uses an index.
+    """
+    full_scans = {}
+    with read_connection(database) as connection:
+        for query_name, query in LOOKUP_QUERIES.items():
+            plan = connection.execute(
+                f"EXPLAIN QUERY PLAN {query}", (None,) * query.count("?")
+            ).fetchall()
+            scans = [
+                detail
+                for *_, detail in plan
+                if detail.startswith("SCAN ") and " USING " not in detail
+            ]
+            if scans:
+                full_scans[query_name] = scans
+    return full_scans
+
+
+def get_difficulty(database, climb_uuid, angle):
+    with read_connection(database) as connection:
+        results = connection.execute(DIFFICULTY_QUERY, (climb_uuid, angle))
         return next(results, [None, None])
 
 
 def get_difficulty_mapping(database):
-    with sqlite3.connect(database) as connection:
+    with read_connection(database) as connection:
         return {
             row[0]: row[1]
             for row in connection.execute(
@@ -160,33 +1446,19 @@ def get_difficulty_mapping(database):
 
 
 def get_climb_name(database, climb_uuid):
-    with sqlite3.connect(database) as connection:
-        results = connection.execute(
-            "SELECT name FROM climbs WHERE uuid = ?", (climb_uuid,)
-        )
+    with read_connection(database) as connection:
+        results = connection.execute(CLIMB_NAME_QUERY, (climb_uuid,))
         return next(results, [None])[0]
 
 
 def get_image_filenames(database):
-    with sqlite3.connect(database) as connection:
-        results = connection.execute("SELECT image_filename FROM product_sizes_layouts_sets WHERE image_filename IS NOT NULL")
+    with read_connection(database) as connection:
+        results = connection.execute(IMAGE_FILENAMES_QUERY)
         return [row[0] for row in results]
 
 def get_layouts_images_dict(database):
-    with sqlite3.connect(database) as connection:
-        results = connection.execute(
-            """
-            SELECT
-                l.name layout_name,
-                s.name product_size_name,
-                p.image_filename
-            FROM product_sizes_layouts_sets p
-            INNER JOIN 
-                (SELECT id, name FROM layouts) AS l ON p.layout_id = l.id
-            INNER JOIN
-                (SELECT id, name FROM product_sizes) AS s ON p.product_size_id = s.id;
-            """
-        )
+    with read_connection(database) as connection:
+        results = connection.execute(LAYOUTS_IMAGES_QUERY)
 
         layouts_images_dict = collections.defaultdict(list)
         for row in results:
@@ -0,0 +1,24 @@
+import requests
+import requests.adapters
+
+
+DEFAULT_POOL_SIZE = 10
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, headers=None):
+    """
+    Create a requests session which keeps connections alive and reuses them between requests.
+
+    :param pool_size: The maximum number of connections kept open per host, and the number of hosts pooled.
+    :param headers: Optional default headers sent with every request made through the session.
+    :return: The configured requests.Session.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    if headers:
+        session.headers.update(headers)
+    return session
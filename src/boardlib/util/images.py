@@ -1,6 +1,31 @@
 import os
 from PIL import Image
 
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_END = b"IEND\xaeB`\x82"
+JPEG_START = b"\xff\xd8"
+JPEG_END = b"\xff\xd9"
+
+
+def is_complete_image(path):
+    """
+    Checks whether an image file was written in full, from its first and last bytes: PNG files must end with their
+    IEND chunk and JPEG files with their end of image marker. Files of other formats are never considered complete.
+
+    :param path: The path of the image file.
+    :return: True if the file is a complete PNG or JPEG image.
+    """
+    with open(path, "rb") as image_file:
+        start = image_file.read(len(PNG_SIGNATURE))
+        image_file.seek(0, os.SEEK_END)
+        image_file.seek(max(0, image_file.tell() - len(PNG_END)))
+        end = image_file.read()
+
+    if start == PNG_SIGNATURE:
+        return end == PNG_END
+    return start.startswith(JPEG_START) and end.endswith(JPEG_END)
+
+
 def overlay_images(base_dir, image_paths, output_filepath):
     """
     Creates an overlayed image of an entire board layout from the various hold-set images.
@@ -0,0 +1,129 @@
+import codecs
+import json
+
+NUMBER_CONTINUATIONS = frozenset(".eE+-0123456789")
+
+
+class _ChunkReader:
+    """
+    A text buffer over an iterator of str or UTF-8 encoded bytes chunks, discarding text once it has been consumed.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = iter(chunks)
+        self.utf8_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.exhausted = False
+
+    def fill(self):
+        """
+        Read the next chunk into the buffer.
+
+        :return: False if there is no more data to read.
+        """
+        if self.exhausted:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            chunk = self.utf8_decoder.decode(b"", final=True)
+        elif isinstance(chunk, bytes):
+            chunk = self.utf8_decoder.decode(chunk)
+
+        # Drop the consumed prefix so the buffer only holds the value currently being decoded
+        self.buffer = self.buffer[self.position :] + chunk
+        self.position = 0
+        return True
+
+    def peek(self):
+        """
+        Skip whitespace and return the next character without consuming it.
+        """
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position] in " \t\r\n":
+                self.position += 1
+            if self.position < len(self.buffer):
+                return self.buffer[self.position]
+            if not self.fill():
+                raise ValueError("Unexpected end of JSON stream")
+
+    def expect(self, characters):
+        character = self.peek()
+        if character not in characters:
+            raise ValueError(
+                f"Expected one of {characters!r} at JSON stream position, got {character!r}"
+            )
+        self.position += 1
+        return character
+
+    def decode(self):
+        """
+        Decode the next complete JSON value, reading more chunks until it is available.
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+                continue
+
+            # A number or literal ending exactly at the buffer end may continue in the next chunk, as may a number
+            # followed by the start of its fraction or exponent, e.g. a chunk ending in "15." or "1e"
+            if end == len(self.buffer) or (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and self.buffer[end] in NUMBER_CONTINUATIONS
+            ):
+                if self.fill():
+                    continue
+
+            self.position = end
+            return value
+
+
+def _iter_array(reader):
+    if reader.peek() == "]":
+        reader.position += 1
+        return
+
+    while True:
+        yield reader.decode()
+        if reader.expect(",]") == "]":
+            return
+
+
+def iter_object_items(chunks):
+    """
+    Incrementally decode a JSON object whose values are mostly arrays, e.g. a sync API response.
+
+    Yields (key, value) pairs in document order. Array values are yielded as iterators which decode one element at a
+    time, so only the element being decoded (plus one chunk) is held in memory. Each array iterator must be consumed
+    before the next pair is requested; any elements left unconsumed are decoded and skipped. Other values are yielded
+    fully decoded.
+
+    :param chunks: An iterable of str or UTF-8 encoded bytes chunks, e.g. requests.Response.iter_content().
+    """
+    reader = _ChunkReader(chunks)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+
+    while True:
+        key = reader.decode()
+        reader.expect(":")
+        if reader.peek() == "[":
+            reader.position += 1
+            elements = _iter_array(reader)
+            yield key, elements
+            for _ in elements:
+                pass
+        else:
+            yield key, reader.decode()
+
+        if reader.expect(",}") == "}":
+            return
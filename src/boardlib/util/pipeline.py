@@ -0,0 +1,54 @@
+import queue
+import threading
+
+
+DEFAULT_PREFETCH_DEPTH = 4
+
+
+def prefetch(iterable, depth=DEFAULT_PREFETCH_DEPTH):
+    """
+    Iterate over an iterable from a background thread, running up to depth items ahead of the consumer.
+
+    This lets a slow producer (e.g. a paginated network fetch) overlap with a slow consumer (e.g. database writes).
+    Items are yielded in their original order. An exception raised by the producer is re-raised in the consumer,
+    and closing the returned generator early stops the producer after its current item.
+
+    :param iterable: The iterable to consume in the background.
+    :param depth: The maximum number of items buffered between the producer and the consumer.
+    """
+    items = queue.Queue(maxsize=depth)
+    stopped = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stopped.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for item in iterable:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            put((None, e))
+        else:
+            put((done, None))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+    try:
+        while True:
+            item, error = items.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        stopped.set()
+        producer.join()
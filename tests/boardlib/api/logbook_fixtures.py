@@ -0,0 +1,194 @@
+import contextlib
+import random
+import sqlite3
+
+import pandas as pd
+
+import boardlib.api.aurora
+import boardlib.db.aurora
+from tests.boardlib.db.sqlite_fixtures import create_database
+
+
+class StubClimbLookup:
+    """
+    A ClimbLookup stand-in which derives names and difficulties from the climb UUIDs.
+    """
+
+    difficulty_mapping = {
+        difficulty: f"{difficulty}a/V{difficulty - 10}" for difficulty in range(10, 34)
+    }
+
+    def load(self, climb_uuids=(), climb_angles=()):
+        pass
+
+    def get_climb_name(self, climb_uuid):
+        index = int(climb_uuid[5:])
+        return None if index % 50 == 49 else f"Climb {index}"
+
+    def get_difficulty(self, climb_uuid, angle):
+        index = int(climb_uuid[5:])
+        if index % 7 == 0:
+            return (None, None)
+        return (10 + (index + angle) % 20 + 0.4, 16.0 if index % 5 == 0 else None)
+
+
+def create_logbook_database(path, climb_count, angles=(25, 40, 45)):
+    """
+    Create a board database holding the climb names and difficulties that StubClimbLookup derives.
+    """
+    create_database(path)
+    lookup = StubClimbLookup()
+    with contextlib.closing(sqlite3.connect(path)) as connection, connection:
+        for index in range(climb_count):
+            climb_uuid = f"climb{index:08d}"
+            name = lookup.get_climb_name(climb_uuid)
+            # Climbs without a name are either missing or stored with a NULL name
+            if name is not None or index % 100 == 49:
+                connection.execute(
+                    "INSERT INTO climbs (uuid, name, is_listed) VALUES (?, ?, 1)",
+                    (climb_uuid, name),
+                )
+            for angle in angles:
+                difficulty, benchmark_difficulty = lookup.get_difficulty(climb_uuid, angle)
+                if difficulty is not None:
+                    connection.execute(
+                        "INSERT INTO climb_stats (climb_uuid, angle, display_difficulty, benchmark_difficulty) "
+                        "VALUES (?, ?, ?, ?)",
+                        (climb_uuid, angle, difficulty, benchmark_difficulty),
+                    )
+
+
+def create_user_store(path, raw_ascents, raw_bids):
+    """
+    Create a user store holding the given raw ascents and bids.
+    """
+    boardlib.db.aurora.create_user_store(path)
+    with boardlib.db.aurora.SharedTablesWriter(path) as writer:
+        writer.write({"ascents": raw_ascents, "bids": raw_bids})
+
+
+def raw_logbook(entry_count, climb_count=None, day_count=None, seed=0):
+    """
+    Build synthetic raw ascents and bids from the sync API, half of each.
+
+    :return: A (raw_ascents, raw_bids) tuple.
+    """
+    rng = random.Random(seed)
+    climb_count = climb_count or max(entry_count // 10, 1)
+    day_count = day_count or max(entry_count // 20, 1)
+
+    def entry(index):
+        day = rng.randrange(day_count)
+        return {
+            "uuid": f"{index:032x}",
+            "user_id": 1,
+            "climb_uuid": f"climb{rng.randrange(climb_count):08d}",
+            "angle": rng.choice((25, 40, 40, 45)),
+            "is_mirror": rng.random() < 0.2,
+            "bid_count": rng.randrange(1, 5),
+            "comment": "",
+            "climbed_at": str(
+                pd.Timestamp("2020-01-01")
+                + pd.Timedelta(days=day, hours=rng.randrange(24), minutes=rng.randrange(60))
+            ),
+            "created_at": "2024-01-01 00:00:00.000000",
+        }
+
+    raw_ascents = []
+    for index in range(entry_count // 2):
+        raw_ascent = entry(index)
+        raw_ascent.update(
+            attempt_id=rng.choice((0, 0, 1, 2)),
+            difficulty=rng.randrange(10, 30) + 0.3,
+            quality=3,
+            is_benchmark=False,
+            is_listed=rng.random() < 0.95,
+        )
+        raw_ascents.append(raw_ascent)
+    raw_bids = [entry(index) for index in range(entry_count // 2, entry_count)]
+    return raw_ascents, raw_bids
+
+
+def logbook_frames(raw_ascents, raw_bids, lookup, board="kilter"):
+    """
+    :return: The (ascents_df, bids_summary) frames that logbook_entries combines.
+    """
+    bids_df = pd.DataFrame(
+        boardlib.api.aurora.process_raw_bid_entries(raw_bids, None, lookup)
+    )
+    bids_df["climbed_at"] = pd.to_datetime(bids_df["climbed_at"])
+    bids_summary = boardlib.api.aurora.summarize_bids(bids_df, board)
+    ascents_df = pd.DataFrame(
+        boardlib.api.aurora.process_raw_ascent_entries(
+            raw_ascents, board, None, lookup
+        )
+    )
+    return ascents_df, bids_summary
+
+
+def reference_combine_ascents_and_bids(ascents_df, bids_summary, lookup):
+    """
+    The original row-by-row implementation of combine_ascents_and_bids, kept as a reference for equivalence tests
+    and benchmarks.
+    """
+    final_logbook = []
+    difficulty_mapping = lookup.difficulty_mapping
+    for _, ascent_row in ascents_df.iterrows():
+        ascent_date = ascent_row["date"].date()
+        ascent_climb_uuid = ascent_row["climb_uuid"]
+        ascent_is_mirror = ascent_row["is_mirror"]
+        ascent_angle = ascent_row["angle"]
+
+        bid_match = bids_summary[
+            (bids_summary["climb_uuid"] == ascent_climb_uuid)
+            & (bids_summary["date"] == ascent_date)
+            & (bids_summary["is_mirror"] == ascent_is_mirror)
+            & (bids_summary["angle"] == ascent_angle)
+        ]
+        tries = ascent_row["tries"]
+        if not bid_match.empty:
+            tries += bid_match.iloc[0]["tries"]
+            bids_summary = bids_summary.drop(bid_match.index)
+
+        final_logbook.append(
+            {
+                "climb_angle_uuid": f"{ascent_climb_uuid}-{ascent_angle}",
+                "climb_uuid": ascent_climb_uuid,
+                "board": ascent_row["board"],
+                "angle": ascent_row["angle"],
+                "climb_name": ascent_row["name"],
+                "date": ascent_row["date"],
+                "logged_grade": ascent_row["logged_grade"],
+                "displayed_grade": ascent_row.get("displayed_grade", None),
+                "is_benchmark": ascent_row.get("is_benchmark", None),
+                "tries": tries,
+                "is_mirror": ascent_row["is_mirror"],
+                "is_ascent": True,
+                "comment": ascent_row["comment"],
+            }
+        )
+
+    for _, bid_row in bids_summary.iterrows():
+        difficulty, benchmark_dificulty = lookup.get_difficulty(
+            bid_row["climb_uuid"], bid_row["angle"]
+        )
+        final_logbook.append(
+            {
+                "climb_angle_uuid": f"{bid_row['climb_uuid']}-{bid_row['angle']}",
+                "climb_uuid": bid_row["climb_uuid"],
+                "board": bid_row["board"],
+                "angle": bid_row["angle"],
+                "climb_name": bid_row["climb_name"],
+                "date": bid_row["date"],
+                "logged_grade": None,
+                "displayed_grade": boardlib.api.aurora.difficulty_to_grade(
+                    difficulty_mapping, difficulty
+                ),
+                "is_benchmark": bool(benchmark_dificulty),
+                "tries": bid_row["tries"],
+                "is_mirror": bid_row["is_mirror"],
+                "is_ascent": False,
+                "comment": bid_row.get("comment", None),
+            }
+        )
+    return final_logbook
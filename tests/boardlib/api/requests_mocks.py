@@ -1,15 +1,36 @@
+import json
+
 import requests
 
 
 class MockResponse:
-    def __init__(self, json_data={}, status_code=requests.codes.ok, text=None):
+    def __init__(
+        self,
+        json_data={},
+        status_code=requests.codes.ok,
+        text=None,
+        content=None,
+        headers={},
+    ):
         self.json_data = json_data
         self.status_code = status_code
         self.text = text
+        self.content = content
+        self.headers = headers
 
     def json(self):
         return self.json_data
 
+    def iter_content(self, chunk_size=1):
+        content = self.content
+        if content is None:
+            content = json.dumps(self.json_data).encode("utf-8")
+        for i in range(0, len(content), chunk_size):
+            yield content[i : i + chunk_size]
+
+    def close(self):
+        pass
+
     def raise_for_status(self):
         if self.status_code != requests.codes.ok:
             raise requests.exceptions.HTTPError(
@@ -28,6 +49,25 @@ class MockSession:
     def post(self, *args, **kwargs):
         return next(self.response_iterator)
 
+    def put(self, *args, **kwargs):
+        return next(self.response_iterator)
+
 
 def get_mock_request(**response_kwargs):
     return lambda *args, **kwargs: MockResponse(**response_kwargs)
+
+
+class MockUrlSession:
+    """
+    A session returning a fixed response per URL, for requests made in no particular order.
+    """
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.headers = {}
+
+    def get(self, url, *args, **kwargs):
+        return self.responses[url]
+
+    def post(self, url, *args, **kwargs):
+        return self.responses[url]
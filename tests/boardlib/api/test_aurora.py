@@ -1,10 +1,33 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
 import unittest
 import unittest.mock
 
+import pandas as pd
+import PIL.Image
 import requests
 
 import boardlib.api.aurora
-from tests.boardlib.api.requests_mocks import get_mock_request, MockResponse
+import boardlib.db.aurora
+import boardlib.util.pipeline
+from tests.boardlib.api.logbook_fixtures import (
+    StubClimbLookup,
+    create_logbook_database,
+    create_user_store,
+    logbook_frames,
+    raw_logbook,
+    reference_combine_ascents_and_bids,
+)
+from tests.boardlib.api.requests_mocks import (
+    get_mock_request,
+    MockResponse,
+    MockSession,
+    MockUrlSession,
+)
 
 
 class TestAurora(unittest.TestCase):
@@ -28,6 +51,128 @@ class TestAurora(unittest.TestCase):
         with self.assertRaises(requests.exceptions.HTTPError):
             boardlib.api.aurora.login("aurora", "test", "test")
 
+    def test_login_with_session(self):
+        mock_session = MockSession(
+            MockResponse(json_data={"session": {"token": "test", "user_id": 1234}})
+        )
+        self.assertEqual(
+            boardlib.api.aurora.login("aurora", "test", "test", mock_session),
+            {"token": "test", "user_id": 1234},
+        )
+
+    def test_sync_with_session(self):
+        mock_session = MockSession(
+            MockResponse(json_data={"climbs": ["test1"]}),
+            MockResponse(json_data={"climbs": ["test2"], "_complete": True}),
+        )
+        self.assertEqual(
+            list(
+                boardlib.api.aurora.sync(
+                    "aurora",
+                    {"climbs": boardlib.api.aurora.BASE_SYNC_DATE},
+                    session=mock_session,
+                )
+            ),
+            [{"climbs": ["test1"]}, {"climbs": ["test2"]}],
+        )
+
+    def test_sync_stream(self):
+        mock_session = MockSession(
+            MockResponse(
+                json_data={
+                    "climbs": ["test1", "test2"],
+                    "shared_syncs": [
+                        {"table_name": "climbs", "last_synchronized_at": "test_date"}
+                    ],
+                }
+            ),
+            MockResponse(json_data={"_complete": True, "climbs": ["test3"]}),
+        )
+        mock_session.post = unittest.mock.Mock(side_effect=mock_session.post)
+        pages = [
+            [(table_name, list(rows)) for table_name, rows in page]
+            for page in boardlib.api.aurora.sync(
+                "aurora",
+                {"climbs": boardlib.api.aurora.BASE_SYNC_DATE},
+                session=mock_session,
+                stream=True,
+            )
+        ]
+        self.assertEqual(
+            pages,
+            [
+                [
+                    ("climbs", ["test1", "test2"]),
+                    (
+                        "shared_syncs",
+                        [{"table_name": "climbs", "last_synchronized_at": "test_date"}],
+                    ),
+                ],
+                [("climbs", ["test3"])],
+            ],
+        )
+        self.assertEqual(
+            mock_session.post.call_args_list[1].kwargs["data"], "climbs=test_date"
+        )
+
+    def test_sync_raw(self):
+        first_page = json.dumps(
+            {
+                "climbs": [{"uuid": "test1"}],
+                "shared_syncs": [
+                    {"table_name": "climbs", "last_synchronized_at": "test_date"}
+                ],
+            }
+        )
+        second_page = json.dumps({"climbs": [{"uuid": "test2"}], "_complete": True})
+        mock_session = MockSession(
+            MockResponse(content=first_page.encode("utf-8")),
+            MockResponse(content=second_page.encode("utf-8")),
+        )
+        mock_session.post = unittest.mock.Mock(side_effect=mock_session.post)
+        self.assertEqual(
+            list(
+                boardlib.api.aurora.sync(
+                    "aurora",
+                    {"climbs": boardlib.api.aurora.BASE_SYNC_DATE},
+                    session=mock_session,
+                    raw=True,
+                )
+            ),
+            [first_page, second_page],
+        )
+        self.assertEqual(
+            mock_session.post.call_args_list[1].kwargs["data"], "climbs=test_date"
+        )
+
+    def test_sync_pipelined(self):
+        mock_session = MockSession(
+            MockResponse(
+                json_data={
+                    "climbs": ["test1"],
+                    "shared_syncs": [
+                        {"table_name": "climbs", "last_synchronized_at": "test_date"}
+                    ],
+                }
+            ),
+            MockResponse(json_data={"climbs": ["test2"], "_complete": True}),
+        )
+        mock_session.post = unittest.mock.Mock(side_effect=mock_session.post)
+        sync_results = boardlib.util.pipeline.prefetch(
+            boardlib.api.aurora.sync(
+                "aurora",
+                {"climbs": boardlib.api.aurora.BASE_SYNC_DATE},
+                session=mock_session,
+            )
+        )
+        self.assertEqual(
+            [sync_result["climbs"] for sync_result in sync_results],
+            [["test1"], ["test2"]],
+        )
+        self.assertEqual(
+            mock_session.post.call_args_list[1].kwargs["data"], "climbs=test_date"
+        )
+
     @unittest.mock.patch(
         "requests.get",
         side_effect=get_mock_request(json_data="test_explore"),
@@ -142,6 +287,373 @@ class TestAurora(unittest.TestCase):
         with self.assertRaises(requests.exceptions.HTTPError):
             boardlib.api.aurora.user_sync("aurora", "test", "test")
 
+    @unittest.mock.patch(
+        "boardlib.db.aurora.get_image_filenames",
+        return_value=["sets/1.png", "sets/2.png", "sets/3.png", "sets/4.png"],
+    )
+    def test_download_images(self, mock_get_image_filenames):
+        api_host = "https://api.auroraboardapp.com/img"
+        mock_session = MockUrlSession(
+            {
+                f"{api_host}/sets/1.png": MockResponse(content=b"1"),
+                f"{api_host}/sets/2.png": MockResponse(
+                    status_code=requests.codes.not_found
+                ),
+                f"{api_host}/sets/3.png": MockResponse(content=b"3"),
+            }
+        )
+        with tempfile.TemporaryDirectory() as output_directory:
+            os.makedirs(os.path.join(output_directory, "sets"))
+            with open(os.path.join(output_directory, "sets", "4.png"), "wb") as f:
+                f.write(b"existing")
+            boardlib.api.aurora.save_image_manifest(
+                output_directory, {"sets/4.png": {"size": 8}}
+            )
+
+            failures = boardlib.api.aurora.download_images(
+                "aurora", "test.db", output_directory, session=mock_session
+            )
+
+            self.assertEqual(list(failures), ["sets/2.png"])
+            self.assertEqual(
+                sorted(os.listdir(os.path.join(output_directory, "sets"))),
+                ["1.png", "3.png", "4.png"],
+            )
+            with open(os.path.join(output_directory, "sets", "3.png"), "rb") as f:
+                self.assertEqual(f.read(), b"3")
+            self.assertEqual(
+                sorted(boardlib.api.aurora.load_image_manifest(output_directory)),
+                ["sets/1.png", "sets/3.png", "sets/4.png"],
+            )
+
+    @unittest.mock.patch(
+        "boardlib.db.aurora.get_image_filenames",
+        return_value=["sets/1.png", "sets/2.png"],
+    )
+    def test_download_images_adopts_existing(self, mock_get_image_filenames):
+        image_buffer = io.BytesIO()
+        PIL.Image.new("RGBA", (4, 4)).save(image_buffer, "PNG")
+        png = image_buffer.getvalue()
+        # Only the truncated image is requested again
+        mock_session = MockUrlSession(
+            {"https://api.auroraboardapp.com/img/sets/2.png": MockResponse(content=png)}
+        )
+        with tempfile.TemporaryDirectory() as output_directory:
+            os.makedirs(os.path.join(output_directory, "sets"))
+            for image_filename, content in (("1.png", png), ("2.png", png[:-4])):
+                with open(os.path.join(output_directory, "sets", image_filename), "wb") as f:
+                    f.write(content)
+
+            failures = boardlib.api.aurora.download_images(
+                "aurora", "test.db", output_directory, session=mock_session
+            )
+
+            self.assertEqual(failures, {})
+            manifest = boardlib.api.aurora.load_image_manifest(output_directory)
+            self.assertEqual(sorted(manifest), ["sets/1.png", "sets/2.png"])
+            self.assertEqual(manifest["sets/1.png"]["sha256"], hashlib.sha256(png).hexdigest())
+            self.assertIsNotNone(manifest["sets/1.png"]["last_modified"])
+            with open(os.path.join(output_directory, "sets", "2.png"), "rb") as f:
+                self.assertEqual(f.read(), png)
+
+    def test_download_image_conditional(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            output_path = os.path.join(output_directory, "1.png")
+            manifest_entry = boardlib.api.aurora.download_image(
+                "https://test",
+                "1.png",
+                output_path,
+                MockSession(MockResponse(content=b"test", headers={"ETag": "v1"})),
+            )
+            self.assertEqual(manifest_entry["size"], 4)
+            self.assertEqual(manifest_entry["etag"], "v1")
+
+            mock_session = MockSession(
+                MockResponse(status_code=requests.codes.not_modified)
+            )
+            mock_session.get = unittest.mock.Mock(side_effect=mock_session.get)
+            self.assertIs(
+                boardlib.api.aurora.download_image(
+                    "https://test", "1.png", output_path, mock_session, manifest_entry
+                ),
+                manifest_entry,
+            )
+            self.assertEqual(
+                mock_session.get.call_args.kwargs["headers"], {"If-None-Match": "v1"}
+            )
+
+    def test_download_image_failure_keeps_existing(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            output_path = os.path.join(output_directory, "1.png")
+            with open(output_path, "wb") as f:
+                f.write(b"existing")
+
+            with self.assertRaises(requests.exceptions.HTTPError):
+                boardlib.api.aurora.download_image(
+                    "https://test",
+                    "1.png",
+                    output_path,
+                    MockSession(MockResponse(status_code=requests.codes.not_found)),
+                )
+            self.assertEqual(os.listdir(output_directory), ["1.png"])
+
+    def test_combine_ascents_and_bids(self):
+        lookup = StubClimbLookup()
+        ascents_df, bids_summary = logbook_frames(*raw_logbook(2000, seed=1), lookup)
+        expected = pd.DataFrame(
+            reference_combine_ascents_and_bids(ascents_df, bids_summary, lookup),
+            columns=boardlib.api.aurora.COMBINED_LOGBOOK_COLUMNS,
+        )
+        combined = boardlib.api.aurora.combine_ascents_and_bids(
+            ascents_df, bids_summary, None, lookup
+        )
+        self.assertGreater(combined["tries"].sum(), ascents_df["tries"].sum())
+        # Compare as CSV, which is what the logbook is exported as
+        self.assertEqual(combined.to_csv(index=False), expected.to_csv(index=False))
+
+    def test_combine_ascents_and_bids_without_bids(self):
+        lookup = StubClimbLookup()
+        ascents_df, bids_summary = logbook_frames(*raw_logbook(200, seed=2), lookup)
+        combined = boardlib.api.aurora.combine_ascents_and_bids(
+            ascents_df, bids_summary.iloc[0:0], None, lookup
+        )
+        self.assertEqual(list(combined["tries"]), list(ascents_df["tries"]))
+        self.assertTrue(combined["is_ascent"].all())
+
+    def test_logbook_entries_user_store(self):
+        raw_ascents, raw_bids = raw_logbook(200, seed=3)
+        first_page = {
+            "ascents": raw_ascents[:90],
+            "bids": raw_bids[:90],
+            "user_syncs": [
+                {"table_name": "ascents", "last_synchronized_at": "2024-02-01 00:00:00.000000"},
+                {"table_name": "bids", "last_synchronized_at": "2024-02-02 00:00:00.000000"},
+            ],
+            "_complete": True,
+        }
+        # The delta adds the remaining entries and unlists an ascent from the first sync
+        raw_ascents[0] = {**raw_ascents[0], "is_listed": False}
+        delta_page = {
+            "ascents": [raw_ascents[0]] + raw_ascents[90:],
+            "bids": raw_bids[90:],
+            "user_syncs": [
+                {"table_name": "ascents", "last_synchronized_at": "2024-03-01 00:00:00.000000"},
+            ],
+            "_complete": True,
+        }
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            user_store = os.path.join(tmpdir, "user.sqlite3")
+            for page in (first_page, delta_page):
+                mock_session = MockSession(MockResponse(page))
+                mock_session.post = unittest.mock.Mock(side_effect=mock_session.post)
+                logbook = boardlib.api.aurora.logbook_entries(
+                    "kilter",
+                    "token",
+                    None,
+                    mock_session,
+                    StubClimbLookup(),
+                    user_store=user_store,
+                    user_id=1,
+                )
+
+            self.assertEqual(
+                mock_session.post.call_args.kwargs["data"],
+                "ascents=2024-02-01%2000%3A00%3A00.000000"
+                "&bids=2024-02-02%2000%3A00%3A00.000000",
+            )
+            self.assertEqual(
+                boardlib.db.aurora.get_user_syncs(user_store, 1)["ascents"],
+                "2024-03-01 00:00:00.000000",
+            )
+
+        def by_date(entries):
+            return sorted(entries, key=lambda entry: entry["climbed_at"])
+
+        with unittest.mock.patch(
+            "boardlib.api.aurora.get_ascents", return_value=by_date(raw_ascents)
+        ), unittest.mock.patch(
+            "boardlib.api.aurora.get_attempts", return_value=by_date(raw_bids)
+        ):
+            expected = boardlib.api.aurora.logbook_entries(
+                "kilter", "token", None, lookup=StubClimbLookup()
+            )
+        self.assertEqual(logbook.to_csv(index=False), expected.to_csv(index=False))
+
+    @unittest.mock.patch("boardlib.api.aurora.sync_user_store")
+    def test_logbook_entries_sql_engine(self, mock_sync_user_store):
+        raw_ascents, raw_bids = raw_logbook(2000, seed=4)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            db_path = os.path.join(tmpdir, "kilter.sqlite3")
+            user_store = os.path.join(tmpdir, "user.sqlite3")
+            create_logbook_database(db_path, climb_count=200)
+            create_user_store(user_store, raw_ascents, raw_bids)
+
+            logbooks = {
+                engine: boardlib.api.aurora.logbook_entries(
+                    "kilter",
+                    "token",
+                    db_path,
+                    user_store=user_store,
+                    user_id=1,
+                    engine=engine,
+                )
+                for engine in boardlib.api.aurora.LOGBOOK_ENGINES
+            }
+
+        self.assertEqual(mock_sync_user_store.call_count, 2)
+        self.assertGreater(len(logbooks["sql"]), 1000)
+        self.assertEqual(list(logbooks["sql"].columns), list(logbooks["pandas"].columns))
+        self.assertEqual(
+            logbooks["sql"].to_csv(index=False), logbooks["pandas"].to_csv(index=False)
+        )
+
+    def test_batch_logbook_entries(self):
+        raw_logbooks = {
+            f"user{index}": raw_logbook(400, climb_count=100, seed=index)
+            for index in range(3)
+        }
+
+        def login(board, username, password, session=None):
+            if password != "password":
+                raise ValueError("Invalid username or password.")
+            return {"token": username, "user_id": 1}
+
+        with tempfile.TemporaryDirectory() as tmpdir, unittest.mock.patch(
+            "boardlib.api.aurora.login", side_effect=login
+        ), unittest.mock.patch(
+            "boardlib.api.aurora.get_ascents",
+            side_effect=lambda board, token, session=None: raw_logbooks[token][0],
+        ), unittest.mock.patch(
+            "boardlib.api.aurora.get_attempts",
+            side_effect=lambda board, token, session=None: raw_logbooks[token][1],
+        ):
+            db_path = os.path.join(tmpdir, "kilter.sqlite3")
+            create_logbook_database(db_path, climb_count=100)
+            expected = {
+                username: boardlib.api.aurora.logbook_entries(
+                    "kilter", username, db_path
+                )
+                for username in raw_logbooks
+            }
+
+            with unittest.mock.patch(
+                "sqlite3.connect", wraps=sqlite3.connect
+            ) as mock_connect:
+                logbooks, failures = boardlib.api.aurora.batch_logbook_entries(
+                    "kilter",
+                    [(username, "password") for username in raw_logbooks]
+                    + [("intruder", "wrong")],
+                    db_path,
+                    max_workers=2,
+                )
+
+        # Names and difficulties of every user are loaded in one pass, plus the difficulty mapping
+        self.assertEqual(mock_connect.call_count, 2)
+        self.assertEqual(list(logbooks), list(raw_logbooks))
+        for username, logbook in logbooks.items():
+            self.assertEqual(
+                logbook.to_csv(index=False), expected[username].to_csv(index=False)
+            )
+        self.assertEqual(list(failures), ["intruder"])
+        self.assertIsInstance(failures["intruder"], ValueError)
+
+    def test_batch_logbook_entries_user_store(self):
+        user_ids = {f"user{index}": index + 1 for index in range(6)}
+        raw_logbooks = {}
+        for username, user_id in user_ids.items():
+            raw_logbooks[username] = tuple(
+                [
+                    {**raw_entry, "uuid": f"{user_id}{raw_entry['uuid'][1:]}", "user_id": user_id}
+                    for raw_entry in raw_entries
+                ]
+                for raw_entries in raw_logbook(400, climb_count=100, seed=user_id)
+            )
+
+        def login(board, username, password, session=None):
+            return {"token": username, "user_id": user_ids[username]}
+
+        def sync(board, tables_and_sync_dates, token, session=None):
+            # Many small pages, so the writes of the users interleave
+            raw_ascents, raw_bids = raw_logbooks[token]
+            for start in range(0, len(raw_ascents), 20):
+                yield {
+                    "ascents": raw_ascents[start : start + 20],
+                    "bids": raw_bids[start : start + 20],
+                }
+
+        def by_date(entries):
+            return sorted(entries, key=lambda entry: entry["climbed_at"])
+
+        with tempfile.TemporaryDirectory() as tmpdir, unittest.mock.patch(
+            "boardlib.api.aurora.login", side_effect=login
+        ), unittest.mock.patch(
+            "boardlib.api.aurora.sync", side_effect=sync
+        ), unittest.mock.patch(
+            "boardlib.api.aurora.get_ascents",
+            side_effect=lambda board, token, session=None: by_date(raw_logbooks[token][0]),
+        ), unittest.mock.patch(
+            "boardlib.api.aurora.get_attempts",
+            side_effect=lambda board, token, session=None: by_date(raw_logbooks[token][1]),
+        ):
+            db_path = os.path.join(tmpdir, "kilter.sqlite3")
+            user_store = os.path.join(tmpdir, "user.sqlite3")
+            create_logbook_database(db_path, climb_count=100)
+            expected = {
+                username: boardlib.api.aurora.logbook_entries(
+                    "kilter", username, db_path
+                )
+                for username in raw_logbooks
+            }
+
+            logbooks, failures = boardlib.api.aurora.batch_logbook_entries(
+                "kilter",
+                [(username, "password") for username in raw_logbooks],
+                db_path,
+                max_workers=len(raw_logbooks),
+                user_store=user_store,
+            )
+
+        self.assertEqual(failures, {})
+        self.assertEqual(list(logbooks), list(raw_logbooks))
+        for username, logbook in logbooks.items():
+            self.assertEqual(
+                logbook.to_csv(index=False), expected[username].to_csv(index=False)
+            )
+
+    def test_calculate_logbook_totals(self):
+        logbook_df = pd.DataFrame(
+            {
+                "climb_name": ["B", "A", "A", "A", None, "A"],
+                "is_mirror": [False, False, False, False, False, True],
+                "angle": [40, 40, 40, 40, 40, 40],
+                "date": pd.to_datetime(
+                    [
+                        "2024-01-01 10:00",
+                        "2024-01-03 10:00",
+                        "2024-01-01 12:00",
+                        "2024-01-01 10:00",
+                        "2024-01-01 10:00",
+                        "2024-01-02 10:00",
+                    ]
+                ),
+                "tries": [1, 2, 3, 4, 5, 6],
+            }
+        )
+        totals = boardlib.api.aurora.calculate_logbook_totals(logbook_df)
+        self.assertEqual(
+            totals[
+                ["climb_name", "tries", "sessions_count", "tries_total", "is_repeat"]
+            ].values.tolist(),
+            [
+                ["A", 4, 1, 4, False],
+                ["A", 3, 1, 7, True],
+                ["A", 2, 2, 9, True],
+                ["A", 6, 1, 6, False],
+                ["B", 1, 1, 1, False],
+            ],
+        )
+
     @unittest.mock.patch(
         "boardlib.api.aurora.get_gyms",
         side_effect=lambda *args, **kwargs: {
@@ -0,0 +1,226 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+try:
+    import aiohttp
+    import aiohttp.test_utils
+    import aiohttp.web
+
+    import boardlib.api.aurora_async
+except ImportError:
+    aiohttp = None
+
+import boardlib.api.aurora
+
+
+class StandInServer:
+    """
+    A local stand-in for the Aurora web and API hosts.
+    """
+
+    def __init__(self):
+        self.sync_payloads = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        app = aiohttp.web.Application()
+        app.router.add_post("/sessions", self.sessions)
+        app.router.add_post("/sync", self.sync)
+        app.router.add_get("/users/{user_id}", self.user)
+        app.router.add_get("/users/{user_id}/followers", self.users)
+        app.router.add_get("/users/{user_id}/followees", self.users)
+        app.router.add_get("/notifications", self.notifications)
+        app.router.add_put("/ascents/save/{uuid}", self.save)
+        app.router.add_put("/bids/save", self.save)
+        app.router.add_get("/img/{filename}", self.image)
+        self.server = aiohttp.test_utils.TestServer(app)
+
+    @property
+    def url(self):
+        return str(self.server.make_url("")).rstrip("/")
+
+    async def sessions(self, request):
+        credentials = await request.json()
+        if credentials["password"] != "password":
+            return aiohttp.web.json_response({}, status=422)
+        return aiohttp.web.json_response({"session": {"token": "token", "user_id": 1}})
+
+    async def sync(self, request):
+        payload = dict((await request.post()).items())
+        self.sync_payloads.append(payload)
+        if payload["ascents"] == boardlib.api.aurora.BASE_SYNC_DATE:
+            return aiohttp.web.json_response(
+                {
+                    "ascents": [{"uuid": "a1"}],
+                    "user_syncs": [
+                        {"table_name": "ascents", "last_synchronized_at": "2024-01-01 00:00:00"}
+                    ],
+                    "_complete": False,
+                }
+            )
+        return aiohttp.web.json_response({"ascents": [{"uuid": "a2"}], "_complete": True})
+
+    async def user(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.01)
+            return aiohttp.web.json_response(
+                {
+                    "id": int(request.match_info["user_id"]),
+                    "cookie": request.headers.get("cookie"),
+                }
+            )
+        finally:
+            self.in_flight -= 1
+
+    async def users(self, request):
+        return aiohttp.web.json_response(
+            {"users": [{"id": 2, "path": request.path}]}
+        )
+
+    async def notifications(self, request):
+        return aiohttp.web.json_response({"notifications": sorted(request.query)})
+
+    async def save(self, request):
+        return aiohttp.web.json_response(await request.json())
+
+    async def image(self, request):
+        if request.headers.get("If-None-Match") == '"v1"':
+            return aiohttp.web.Response(status=304)
+        return aiohttp.web.Response(body=b"image", headers={"ETag": '"v1"'})
+
+
+@unittest.skipUnless(aiohttp, "requires aiohttp")
+class TestAuroraAsync(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.server = StandInServer()
+        await self.server.server.start_server()
+        hosts = unittest.mock.patch.dict(
+            boardlib.api.aurora.WEB_HOSTS, {"kilter": self.server.url}
+        )
+        hosts.start()
+        self.addCleanup(hosts.stop)
+        self.session = boardlib.api.aurora_async.create_session(concurrency=2)
+
+    async def asyncTearDown(self):
+        await self.session.close()
+        await self.server.server.close()
+
+    async def test_login(self):
+        self.assertEqual(
+            await boardlib.api.aurora_async.login(
+                "kilter", "username", "password", session=self.session
+            ),
+            {"token": "token", "user_id": 1},
+        )
+        with self.assertRaises(ValueError):
+            await boardlib.api.aurora_async.login(
+                "kilter", "username", "wrong", session=self.session
+            )
+
+    async def test_sync(self):
+        pages = [
+            page
+            async for page in boardlib.api.aurora_async.sync(
+                "kilter",
+                {"ascents": boardlib.api.aurora.BASE_SYNC_DATE},
+                "token",
+                session=self.session,
+            )
+        ]
+        self.assertEqual(
+            [page["ascents"] for page in pages], [[{"uuid": "a1"}], [{"uuid": "a2"}]]
+        )
+        self.assertEqual(
+            self.server.sync_payloads[1], {"ascents": "2024-01-01 00:00:00"}
+        )
+
+    async def test_get_user_concurrency(self):
+        users = await asyncio.gather(
+            *(
+                boardlib.api.aurora_async.get_user(
+                    "kilter", "token", user_id, session=self.session
+                )
+                for user_id in range(8)
+            )
+        )
+        self.assertEqual([user["id"] for user in users], list(range(8)))
+        self.assertEqual(users[0]["cookie"], "token=token")
+        self.assertEqual(self.server.max_in_flight, 2)
+
+    async def test_followers_followees_notifications(self):
+        followers = await boardlib.api.aurora_async.user_followers(
+            "kilter", "token", 1, session=self.session
+        )
+        followees = await boardlib.api.aurora_async.user_followees(
+            "kilter", "token", 1, session=self.session
+        )
+        notifications = await boardlib.api.aurora_async.get_notifications(
+            "kilter", "token", ["ascents", "likes"], session=self.session
+        )
+        self.assertEqual(followers["users"][0]["path"], "/users/1/followers")
+        self.assertEqual(followees["users"][0]["path"], "/users/1/followees")
+        self.assertEqual(notifications["notifications"], ["ascents", "likes"])
+
+    async def test_save_ascent_and_attempt(self):
+        ascent = await boardlib.api.aurora_async.save_ascent(
+            "kilter",
+            "token",
+            1,
+            "climb",
+            40,
+            False,
+            1,
+            1,
+            3,
+            20,
+            False,
+            "",
+            "2024-01-01 00:00:00",
+            session=self.session,
+        )
+        attempt = await boardlib.api.aurora_async.save_attempt(
+            "kilter",
+            "token",
+            1,
+            "climb",
+            40,
+            False,
+            2,
+            "",
+            "2024-01-01 00:00:00",
+            session=self.session,
+        )
+        self.assertEqual((ascent["climb_uuid"], ascent["difficulty"]), ("climb", 20))
+        self.assertEqual(attempt["bid_count"], 2)
+        self.assertEqual(len(ascent["uuid"]), 32)
+
+    async def test_download_image(self):
+        with tempfile.TemporaryDirectory() as output_directory:
+            output_path = os.path.join(output_directory, "1.png")
+            manifest_entry = await boardlib.api.aurora_async.download_image(
+                self.server.url, "1.png", output_path, session=self.session
+            )
+            with open(output_path, "rb") as image_file:
+                self.assertEqual(image_file.read(), b"image")
+            self.assertEqual(manifest_entry["size"], 5)
+            self.assertEqual(manifest_entry["etag"], '"v1"')
+
+            self.assertIs(
+                await boardlib.api.aurora_async.download_image(
+                    self.server.url,
+                    "1.png",
+                    output_path,
+                    manifest_entry,
+                    session=self.session,
+                ),
+                manifest_entry,
+            )
+            self.assertEqual(os.listdir(output_directory), ["1.png"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,18 @@
+import datetime
+import os
+import stat
+import tempfile
 import unittest
 import unittest.mock
 
 import requests
 
 import boardlib.api.moon
-from tests.boardlib.api.requests_mocks import MockResponse, MockSession
+from tests.boardlib.api.requests_mocks import (
+    MockResponse,
+    MockSession,
+    MockUrlSession,
+)
 
 
 class TestMoon(unittest.TestCase):
@@ -35,6 +43,62 @@ class TestMoon(unittest.TestCase):
         with self.assertRaises(requests.exceptions.HTTPError):
             boardlib.api.moon.get_session("username", "password")
 
+    def test_session_cache(self):
+        session = boardlib.api.moon.create_session()
+        session.cookies.set("auth", "cookie", domain="moonboard.com", path="/")
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = os.path.join(tmpdir, "moon-session.json")
+            boardlib.api.moon.save_session(cache_path, "username", session)
+            self.assertEqual(stat.S_IMODE(os.stat(cache_path).st_mode), 0o600)
+
+            cached_session = boardlib.api.moon.load_session(cache_path, "username")
+            self.assertEqual(cached_session.cookies.get("auth"), "cookie")
+            self.assertIsNone(boardlib.api.moon.load_session(cache_path, "other"))
+
+            boardlib.api.moon.save_session(
+                cache_path, "username", session, max_age=datetime.timedelta(0)
+            )
+            self.assertIsNone(boardlib.api.moon.load_session(cache_path, "username"))
+
+    @unittest.mock.patch("boardlib.api.moon.login")
+    def test_get_session_cached(self, mock_login):
+        session = boardlib.api.moon.create_session()
+        session.cookies.set("auth", "cached", domain="moonboard.com", path="/")
+        new_session = boardlib.api.moon.create_session()
+        new_session.cookies.set("auth", "new", domain="moonboard.com", path="/")
+        mock_login.return_value = new_session
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            cache_path = os.path.join(tmpdir, "moon-session.json")
+            boardlib.api.moon.save_session(cache_path, "username", session)
+
+            with unittest.mock.patch(
+                "requests.Session.post",
+                return_value=MockResponse(json_data={"Data": [], "Total": 0}),
+            ):
+                cached_session = boardlib.api.moon.get_session(
+                    "username", "password", cache_path
+                )
+            self.assertEqual(cached_session.cookies.get("auth"), "cached")
+            mock_login.assert_not_called()
+
+            # A session the server rejects is redirected to the login page
+            with unittest.mock.patch(
+                "requests.Session.post",
+                return_value=MockResponse(status_code=requests.codes.found),
+            ):
+                self.assertIs(
+                    boardlib.api.moon.get_session("username", "password", cache_path),
+                    new_session,
+                )
+            mock_login.assert_called_once_with("username", "password")
+            self.assertEqual(
+                boardlib.api.moon.load_session(cache_path, "username").cookies.get(
+                    "auth"
+                ),
+                "new",
+            )
+
     def test_logbook_pages(self):
         mock_session = MockSession(
             MockResponse(
@@ -128,12 +192,51 @@ class TestMoon(unittest.TestCase):
         self.assertEqual(
             list(
                 boardlib.api.moon.raw_logbook_entries(
-                    mock_session, "moon2016", logbook_page_size=1, entry_page_size=1
+                    mock_session,
+                    "moon2016",
+                    logbook_page_size=1,
+                    entry_page_size=1,
+                    max_workers=1,
                 )
             ),
             ["test_entry1", "test_entry2", "test_entry3", "test_entry4"],
         )
 
+    def test_raw_logbook_entries_concurrent(self):
+        day_count = 50
+        responses = {
+            f"{boardlib.api.moon.HOST}/Logbook/GetLogbook": MockResponse(
+                json_data={
+                    "Data": [{"Id": f"day{index}"} for index in range(day_count)],
+                    "Total": day_count,
+                }
+            ),
+        }
+        for index in range(day_count):
+            responses[
+                f"{boardlib.api.moon.HOST}/Logbook/GetLogbookEntries/day{index}"
+            ] = MockResponse(
+                json_data={
+                    "Data": [f"day{index}_entry1", f"day{index}_entry2"],
+                    "Total": 2,
+                }
+            )
+        self.assertEqual(
+            list(
+                boardlib.api.moon.raw_logbook_entries(
+                    MockUrlSession(responses),
+                    "moon2016",
+                    logbook_page_size=day_count,
+                    max_workers=4,
+                )
+            ),
+            [
+                f"day{index}_entry{entry}"
+                for index in range(day_count)
+                for entry in (1, 2)
+            ],
+        )
+
     def test_get_my_ranking(self):
         mock_session = MockSession(
             MockResponse(json_data="test"),
@@ -0,0 +1,117 @@
+import sqlite3
+
+
+SCHEMA = """
+CREATE TABLE shared_syncs (
+    table_name TEXT PRIMARY KEY,
+    last_synchronized_at TEXT
+);
+CREATE TABLE climbs (
+    uuid TEXT PRIMARY KEY,
+    layout_id INTEGER,
+    setter_username TEXT,
+    name TEXT,
+    is_listed INTEGER,
+    created_at TEXT
+);
+CREATE TABLE climb_stats (
+    climb_uuid TEXT,
+    angle INTEGER,
+    display_difficulty DOUBLE,
+    benchmark_difficulty DOUBLE,
+    ascensionist_count INTEGER,
+    difficulty_average DOUBLE,
+    quality_average DOUBLE,
+    PRIMARY KEY (climb_uuid, angle)
+);
+CREATE TABLE difficulty_grades (
+    difficulty INTEGER PRIMARY KEY,
+    boulder_name TEXT,
+    is_listed INTEGER
+);
+CREATE TABLE layouts (
+    id INTEGER PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE product_sizes (
+    id INTEGER PRIMARY KEY,
+    name TEXT
+);
+CREATE TABLE product_sizes_layouts_sets (
+    id INTEGER PRIMARY KEY,
+    product_size_id INTEGER,
+    layout_id INTEGER,
+    set_id INTEGER,
+    image_filename TEXT
+);
+"""
+
+DIFFICULTY_GRADES = [
+    (difficulty, f"{difficulty}a/V{difficulty - 10}", 1)
+    for difficulty in range(10, 34)
+]
+
+
+def create_database(path):
+    """
+    Create a small database with the subset of the Aurora schema used by boardlib.
+    """
+    with sqlite3.connect(path) as connection:
+        connection.executescript(SCHEMA)
+        connection.executemany(
+            "INSERT INTO difficulty_grades VALUES (?, ?, ?)", DIFFICULTY_GRADES
+        )
+        connection.execute(
+            "INSERT INTO shared_syncs VALUES ('climbs', '2024-01-01 00:00:00.000000')"
+        )
+        connection.execute(
+            "INSERT INTO shared_syncs VALUES ('climb_stats', '2024-01-01 00:00:00.000000')"
+        )
+    connection.close()
+
+
+def climb_row(index):
+    return {
+        "uuid": f"climb{index:08d}",
+        "layout_id": 1,
+        "setter_username": f"setter{index % 97}",
+        "name": f"Climb {index}",
+        "is_listed": True,
+        "created_at": "2024-01-01 00:00:00.000000",
+        "frames": "p1r12p2r13",
+    }
+
+
+def climb_stats_row(index, angle=40, deleted=False):
+    return {
+        "climb_uuid": f"climb{index:08d}",
+        "angle": angle,
+        "benchmark_difficulty": None,
+        "ascensionist_count": index % 50,
+        "difficulty_average": None if deleted else 10 + index % 20 + 0.25,
+        "quality_average": 2.5,
+    }
+
+
+def sync_page(start, size, delete_ratio=0.0):
+    """
+    Build a synthetic sync page with size climbs and size climb_stats rows.
+
+    :param delete_ratio: The fraction of climb_stats rows which should be deleted rather than inserted.
+    """
+    return {
+        "climbs": [climb_row(index) for index in range(start, start + size)],
+        "climb_stats": [
+            climb_stats_row(
+                index,
+                deleted=int((index + 1) * delete_ratio) > int(index * delete_ratio),
+            )
+            for index in range(start, start + size)
+        ],
+        "shared_syncs": [
+            {
+                "table_name": "climbs",
+                "last_synchronized_at": f"2024-02-01 00:00:{start % 60:02d}.000000",
+            },
+        ],
+    }
@@ -0,0 +1,477 @@
+import concurrent.futures
+import datetime
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import unittest
+import unittest.mock
+import zipfile
+
+import boardlib.db.aurora
+from tests.boardlib.api.requests_mocks import MockResponse
+from tests.boardlib.db.sqlite_fixtures import create_database, sync_page
+
+
+def zip_bytes(members):
+    zip_buffer = io.BytesIO()
+    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for name, data in members.items():
+            zip_file.writestr(name, data)
+    return zip_buffer.getvalue()
+
+
+class TestAurora(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.database = os.path.join(self.temp_dir.name, "test.db")
+        create_database(self.database)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def query(self, sql, params=()):
+        connection = sqlite3.connect(self.database)
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def test_sync_shared_tables(self):
+        row_counts = boardlib.db.aurora.sync_shared_tables(
+            self.database, sync_page(0, 10, delete_ratio=0.5)
+        )
+        self.assertEqual(
+            row_counts,
+            {
+                "climbs": {"inserted": 10, "updated": 0, "unchanged": 0, "deleted": 0},
+                "climb_stats": {"inserted": 5, "updated": 0, "unchanged": 5, "deleted": 0},
+                "shared_syncs": {"inserted": 0, "updated": 1, "unchanged": 0, "deleted": 0},
+            },
+        )
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climbs"), [(10,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climb_stats"), [(5,)])
+
+    def test_sync_shared_tables_climb_stats_deletes(self):
+        boardlib.db.aurora.sync_shared_tables(self.database, sync_page(0, 10))
+        boardlib.db.aurora.sync_shared_tables(
+            self.database, sync_page(0, 10, delete_ratio=0.5)
+        )
+        self.assertEqual(
+            self.query("SELECT climb_uuid FROM climb_stats ORDER BY climb_uuid"),
+            [(f"climb{index:08d}",) for index in range(0, 10, 2)],
+        )
+
+    def test_sync_shared_tables_unchanged_rows(self):
+        boardlib.db.aurora.sync_shared_tables(self.database, sync_page(0, 10))
+        rowids = self.query("SELECT rowid, uuid FROM climbs ORDER BY uuid")
+
+        page = sync_page(5, 10, delete_ratio=0.5)
+        page["climbs"][0]["name"] = "Renamed"
+        row_counts = boardlib.db.aurora.sync_shared_tables(self.database, page)
+        self.assertEqual(
+            row_counts["climbs"],
+            {"inserted": 5, "updated": 1, "unchanged": 4, "deleted": 0},
+        )
+        self.assertEqual(
+            row_counts["climb_stats"],
+            {"inserted": 3, "updated": 0, "unchanged": 4, "deleted": 3},
+        )
+        self.assertEqual(
+            row_counts["shared_syncs"],
+            {"inserted": 0, "updated": 1, "unchanged": 0, "deleted": 0},
+        )
+        # Upserted rows are updated in place instead of being deleted and reinserted with a new rowid
+        self.assertEqual(
+            self.query("SELECT rowid, uuid FROM climbs WHERE rowid <= 10 ORDER BY uuid"),
+            rowids,
+        )
+        self.assertEqual(
+            self.query("SELECT name FROM climbs WHERE uuid = 'climb00000005'"),
+            [("Renamed",)],
+        )
+
+    def test_shared_tables_writer_write_json(self):
+        json_database = os.path.join(self.temp_dir.name, "json.db")
+        create_database(json_database)
+        pages = [sync_page(0, 10), sync_page(5, 10, delete_ratio=0.5)]
+        pages[1]["climbs"][0]["name"] = "Renamed"
+        del pages[1]["climbs"][1]["setter_username"]
+        pages[1]["climb_stats"][2]["benchmark_difficulty"] = 15.5
+
+        with boardlib.db.aurora.SharedTablesWriter(self.database) as writer:
+            row_counts = [writer.write(page) for page in pages]
+        with boardlib.db.aurora.SharedTablesWriter(json_database) as writer:
+            json_row_counts = [writer.write_json(json.dumps(page)) for page in pages]
+
+        self.assertEqual(json_row_counts, row_counts)
+        json_connection = sqlite3.connect(json_database)
+        for table_name in ("climbs", "climb_stats", "shared_syncs"):
+            self.assertEqual(
+                json_connection.execute(f"SELECT * FROM {table_name} ORDER BY 1, 2").fetchall(),
+                self.query(f"SELECT * FROM {table_name} ORDER BY 1, 2"),
+            )
+        json_connection.close()
+
+    def test_get_json_sync_state(self):
+        self.assertEqual(
+            boardlib.db.aurora.get_json_sync_state(
+                json.dumps({"climbs": [], "shared_syncs": [{"table_name": "climbs"}], "_complete": True})
+            ),
+            {"shared_syncs": [{"table_name": "climbs"}], "user_syncs": [], "_complete": True},
+        )
+        self.assertEqual(
+            boardlib.db.aurora.get_json_sync_state("{}"),
+            {"shared_syncs": [], "user_syncs": []},
+        )
+
+    def test_upsert_sql(self):
+        connection = sqlite3.connect(":memory:")
+        connection.executescript(
+            """
+            CREATE TABLE keyed (id INTEGER PRIMARY KEY, name TEXT);
+            CREATE TABLE unique_index (code TEXT, name TEXT);
+            CREATE UNIQUE INDEX unique_index_code ON unique_index (code);
+            CREATE TABLE unkeyed (name TEXT);
+            CREATE TABLE two_keys (
+                id INTEGER PRIMARY KEY, product_size_id INTEGER, position INTEGER, UNIQUE (product_size_id, position)
+            );
+            """
+        )
+        self.assertEqual(boardlib.db.aurora.get_conflict_columns(connection, "keyed"), ["id"])
+        self.assertEqual(
+            boardlib.db.aurora.get_conflict_columns(connection, "unique_index"), ["code"]
+        )
+        self.assertEqual(boardlib.db.aurora.get_conflict_columns(connection, "unkeyed"), [])
+        self.assertEqual(boardlib.db.aurora.get_conflict_columns(connection, "two_keys"), [])
+        self.assertEqual(
+            boardlib.db.aurora.upsert_sql("unkeyed", ["name"], []),
+            "INSERT OR REPLACE INTO unkeyed VALUES (:name)",
+        )
+
+        rows = [{"code": "a", "name": "A"}, {"code": "b", "name": "B"}]
+        self.assertEqual(
+            boardlib.db.aurora.insert_rows_default(connection, "unique_index", rows),
+            {"inserted": 2, "updated": 0, "unchanged": 0, "deleted": 0},
+        )
+        self.assertEqual(
+            boardlib.db.aurora.insert_rows_default(
+                connection, "unique_index", rows + [{"code": "a", "name": "A2"}]
+            ),
+            {"inserted": 0, "updated": 1, "unchanged": 2, "deleted": 0},
+        )
+        self.assertEqual(
+            boardlib.db.aurora.insert_rows_default(connection, "unkeyed", [{"name": "A"}]),
+            {"inserted": 1, "updated": 0, "unchanged": 0, "deleted": 0},
+        )
+
+        # A row conflicting with another on the second unique key replaces it, as INSERT OR REPLACE does
+        boardlib.db.aurora.insert_rows_default(
+            connection, "two_keys", [{"id": 1, "product_size_id": 10, "position": 1}]
+        )
+        boardlib.db.aurora.insert_rows_default(
+            connection, "two_keys", [{"id": 2, "product_size_id": 10, "position": 1}]
+        )
+        self.assertEqual(
+            connection.execute("SELECT * FROM two_keys").fetchall(), [(2, 10, 1)]
+        )
+        connection.close()
+
+    def test_shared_tables_writer(self):
+        with boardlib.db.aurora.SharedTablesWriter(
+            self.database, commit_pages=2
+        ) as writer:
+            for start in range(0, 50, 10):
+                writer.write(sync_page(start, 10))
+
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climbs"), [(50,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climb_stats"), [(50,)])
+        self.assertEqual(
+            self.query(
+                "SELECT last_synchronized_at FROM shared_syncs WHERE table_name = 'climbs'"
+            ),
+            [("2024-02-01 00:00:40.000000",)],
+        )
+
+    def test_shared_tables_writer_streamed_page(self):
+        page = sync_page(0, 2500, delete_ratio=0.2)
+        with boardlib.db.aurora.SharedTablesWriter(self.database) as writer:
+            row_counts = writer.write(
+                (table_name, iter(rows)) for table_name, rows in page.items()
+            )
+
+        self.assertEqual(
+            {
+                table_name: table_row_counts["inserted"]
+                for table_name, table_row_counts in row_counts.items()
+            },
+            {"climbs": 2500, "climb_stats": 2000, "shared_syncs": 0},
+        )
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climb_stats"), [(2000,)])
+
+    def test_shared_tables_writer_failed_page(self):
+        with boardlib.db.aurora.SharedTablesWriter(self.database) as writer:
+            writer.write(sync_page(0, 10))
+            bad_page = sync_page(10, 10)
+            bad_page["missing_table"] = [{"id": 1}]
+            with self.assertRaises(sqlite3.OperationalError):
+                writer.write(bad_page)
+
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climbs"), [(10,)])
+
+    def test_shared_tables_writer_bulk_load(self):
+        boardlib.db.aurora.optimize_database(self.database)
+        with boardlib.db.aurora.SharedTablesWriter(
+            self.database, bulk_load=True
+        ) as writer:
+            with unittest.mock.patch(
+                "boardlib.db.aurora.count_existing_keys"
+            ) as mock_count_existing_keys:
+                for start in range(0, 50, 10):
+                    writer.write(sync_page(start, 10, delete_ratio=0.2))
+                page = sync_page(0, 10, delete_ratio=0.2)
+                page["climbs"][0]["name"] = "Renamed"
+                row_counts = writer.write(page)
+            # Existing keys are not looked up, so inserted and updated rows are counted together
+            mock_count_existing_keys.assert_not_called()
+            self.assertEqual(
+                row_counts["climbs"], {"upserted": 1, "unchanged": 9, "deleted": 0}
+            )
+            self.assertEqual(writer.commit_pages, boardlib.db.aurora.BULK_LOAD_COMMIT_PAGES)
+            self.assertEqual(
+                writer.connection.execute("PRAGMA journal_mode").fetchone(), ("wal",)
+            )
+            self.assertEqual(
+                set(writer.dropped_indexes),
+                {
+                    "boardlib_climb_stats_climb_uuid_angle",
+                    "boardlib_climbs_uuid_name",
+                },
+            )
+
+        self.assertEqual(self.query("PRAGMA journal_mode"), [("delete",)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climbs"), [(50,)])
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climb_stats"), [(40,)])
+        self.assertEqual(
+            self.query(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND name LIKE 'boardlib_%'"
+            ),
+            [(len(boardlib.db.aurora.BOARD_INDEXES),)],
+        )
+
+    def test_shared_tables_writer_bulk_load_failed_page(self):
+        boardlib.db.aurora.optimize_database(self.database)
+        with self.assertRaises(sqlite3.OperationalError):
+            with boardlib.db.aurora.SharedTablesWriter(
+                self.database, bulk_load=True
+            ) as writer:
+                writer.write(sync_page(0, 10))
+                writer.commit()
+                bad_page = sync_page(10, 10)
+                bad_page["missing_table"] = [{"id": 1}]
+                writer.write(bad_page)
+
+        self.assertEqual(self.query("SELECT COUNT(*) FROM climbs"), [(10,)])
+        self.assertEqual(boardlib.db.aurora.check_query_plans(self.database), {})
+
+    def test_is_bulk_load_needed(self):
+        now = datetime.datetime(2024, 3, 1)
+        # Fractions of any length are accepted, and a malformed date never stops the sync
+        self.assertFalse(
+            boardlib.db.aurora.is_bulk_load_needed(
+                {"climbs": "2024-02-28 00:00:00.12345"}, now=now
+            )
+        )
+        self.assertEqual(
+            boardlib.db.aurora.parse_sync_date("2024-02-28 01:02:03.12345"),
+            datetime.datetime(2024, 2, 28, 1, 2, 3, 123450),
+        )
+        self.assertTrue(
+            boardlib.db.aurora.is_bulk_load_needed({"climbs": "not a date"}, now=now)
+        )
+        self.assertTrue(boardlib.db.aurora.is_bulk_load_needed({}, now=now))
+        self.assertTrue(
+            boardlib.db.aurora.is_bulk_load_needed(
+                {"climbs": "2024-02-28 00:00:00.000000", "climb_stats": None}, now=now
+            )
+        )
+        self.assertTrue(
+            boardlib.db.aurora.is_bulk_load_needed(
+                {
+                    "climbs": "2024-02-28 00:00:00.000000",
+                    "climb_stats": "2023-12-01 00:00:00.000000",
+                },
+                now=now,
+            )
+        )
+        self.assertFalse(
+            boardlib.db.aurora.is_bulk_load_needed(
+                {
+                    "climbs": "2024-02-28 00:00:00.000000",
+                    "climb_stats": "2024-02-10 12:00:00.000000",
+                },
+                now=now,
+            )
+        )
+
+    def test_climb_lookup(self):
+        boardlib.db.aurora.sync_shared_tables(self.database, sync_page(0, 600))
+        lookup = boardlib.db.aurora.ClimbLookup(self.database)
+        with unittest.mock.patch(
+            "sqlite3.connect", side_effect=sqlite3.connect
+        ) as mock_connect:
+            lookup.load(
+                climb_uuids=[f"climb{index:08d}" for index in range(0, 700, 2)],
+                climb_angles=[(f"climb{index:08d}", 40) for index in range(600)]
+                + [("climb00000001", 45)],
+            )
+            self.assertEqual(mock_connect.call_count, 1)
+            self.assertEqual(lookup.get_climb_name("climb00000010"), "Climb 10")
+            self.assertIsNone(lookup.get_climb_name("climb00000650"))
+            self.assertEqual(
+                lookup.get_difficulty("climb00000010", 40), (20.25, None)
+            )
+            self.assertEqual(
+                lookup.get_difficulty("climb00000001", 45), (None, None)
+            )
+            self.assertEqual(mock_connect.call_count, 1)
+
+        self.assertEqual(lookup.get_climb_name("climb00000011"), "Climb 11")
+        self.assertEqual(lookup.difficulty_mapping[20], "20a/V10")
+
+    def test_read_only_database(self):
+        boardlib.db.aurora.sync_shared_tables(self.database, sync_page(0, 100))
+        with boardlib.db.aurora.ReadOnlyDatabase(self.database) as database:
+            with database.connect() as connection:
+                self.assertEqual(
+                    connection.execute("PRAGMA query_only").fetchone(), (1,)
+                )
+                self.assertEqual(
+                    connection.execute("PRAGMA cache_size").fetchone(),
+                    (-boardlib.db.aurora.READ_CACHE_SIZE_KIB,),
+                )
+                with self.assertRaises(sqlite3.OperationalError):
+                    connection.execute("DELETE FROM climbs")
+
+            shared_syncs = boardlib.db.aurora.get_shared_syncs(self.database)
+            with unittest.mock.patch(
+                "sqlite3.connect", side_effect=sqlite3.connect
+            ) as mock_connect:
+                self.assertEqual(
+                    boardlib.db.aurora.get_shared_syncs(database), shared_syncs
+                )
+                lookup = boardlib.db.aurora.ClimbLookup(database)
+                with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+                    names = list(
+                        executor.map(
+                            lookup.get_climb_name,
+                            [f"climb{index:08d}" for index in range(100)],
+                        )
+                    )
+                    difficulties = list(
+                        executor.map(
+                            boardlib.db.aurora.get_difficulty,
+                            [database] * 100,
+                            [f"climb{index:08d}" for index in range(100)],
+                            [40] * 100,
+                        )
+                    )
+                self.assertEqual(mock_connect.call_count, 0)
+
+        self.assertEqual(names, [f"Climb {index}" for index in range(100)])
+        self.assertEqual(
+            difficulties,
+            [
+                boardlib.db.aurora.get_difficulty(
+                    self.database, f"climb{index:08d}", 40
+                )
+                for index in range(100)
+            ],
+        )
+
+    def test_optimize_database(self):
+        boardlib.db.aurora.sync_shared_tables(self.database, sync_page(0, 100))
+        self.assertEqual(
+            set(boardlib.db.aurora.check_query_plans(self.database)),
+            {"get_image_filenames", "get_layouts_images_dict"},
+        )
+
+        self.assertEqual(
+            boardlib.db.aurora.optimize_database(self.database, vacuum=True),
+            list(boardlib.db.aurora.BOARD_INDEXES),
+        )
+        self.assertEqual(boardlib.db.aurora.check_query_plans(self.database), {})
+        self.assertEqual(
+            boardlib.db.aurora.optimize_database(self.database), []
+        )
+        self.assertIn(
+            ("climb_stats",),
+            self.query("SELECT DISTINCT tbl FROM sqlite_stat1"),
+        )
+        self.assertEqual(
+            boardlib.db.aurora.get_difficulty(self.database, "climb00000010", 40),
+            (20.25, None),
+        )
+
+    def test_round_half_even_sql(self):
+        values = [10, 10.4, 10.5, 10.6, 11.5, 12.5, 20.49]
+        with sqlite3.connect(":memory:") as connection:
+            rounded = [
+                connection.execute(
+                    f"SELECT {boardlib.db.aurora.round_half_even_sql(':value')}",
+                    {"value": value},
+                ).fetchone()[0]
+                for value in values
+            ]
+        connection.close()
+        self.assertEqual(rounded, [round(value) for value in values])
+
+    def test_download_database(self):
+        database = b"SQLite format 3" * 100000
+        bundle = zip_bytes(
+            {
+                "com.auroraclimbing.kilterboard.apk": zip_bytes(
+                    {"assets/db.sqlite3": database}
+                ),
+                "icon.png": b"",
+            }
+        )
+        progress_callback = unittest.mock.Mock()
+        output_file = os.path.join(self.temp_dir.name, "kilter.db")
+        with unittest.mock.patch(
+            "requests.get",
+            return_value=MockResponse(
+                content=bundle, headers={"Content-Length": str(len(bundle))}
+            ),
+        ):
+            sha256 = boardlib.db.aurora.download_database(
+                "kilter", output_file, progress_callback=progress_callback
+            )
+
+        self.assertEqual(sha256, hashlib.sha256(database).hexdigest())
+        with open(output_file, "rb") as f:
+            self.assertEqual(f.read(), database)
+        progress_callback.assert_any_call("download", len(bundle), len(bundle))
+        progress_callback.assert_called_with("extract", len(database), len(database))
+        self.assertEqual(
+            sorted(os.listdir(self.temp_dir.name)), ["kilter.db", "test.db"]
+        )
+
+    def test_download_database_old_structure(self):
+        output_file = os.path.join(self.temp_dir.name, "kilter.db")
+        with unittest.mock.patch(
+            "requests.get",
+            return_value=MockResponse(
+                content=zip_bytes({"assets/db.sqlite3": b"test"})
+            ),
+        ):
+            boardlib.db.aurora.download_database("kilter", output_file)
+
+        with open(output_file, "rb") as f:
+            self.assertEqual(f.read(), b"test")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,224 @@
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+import pandas as pd
+
+import boardlib.__main__
+
+
+MOON_ENTRIES = [
+    {
+        "board": "moon2016",
+        "angle": 40,
+        "climb_name": "test_name",
+        "date": "2023-09-05",
+        "displayed_grade": "7A",
+        "logged_grade": "7A+",
+        "is_benchmark": True,
+        "tries": "4+",
+        "is_mirror": False,
+        "comment": "",
+    },
+    {
+        "board": "moon2016",
+        "angle": 40,
+        "climb_name": "other_name",
+        "date": "2023-09-06",
+        "displayed_grade": "6C",
+        "logged_grade": "6C",
+        "is_benchmark": False,
+        "tries": "1",
+        "is_mirror": False,
+        "comment": "nice",
+    },
+]
+
+
+class TestMain(unittest.TestCase):
+    def test_write_entries_frame_matches_write_entries(self):
+        records = [
+            {
+                "board": "kilter",
+                "angle": 40 + index,
+                "climb_name": f"Climb, {index}",
+                "date": pd.Timestamp(2024, 1, index + 1),
+                "logged_grade": "6a/V3",
+                "displayed_grade": "6a/V3",
+                "is_benchmark": False,
+                "tries": index + 1,
+                "is_mirror": False,
+                "sessions_count": 1,
+                "tries_total": index + 1,
+                "is_repeat": False,
+                "is_ascent": True,
+                "comment": "",
+                "climb_uuid": "not exported",
+            }
+            for index in range(5)
+        ]
+        expected = io.StringIO()
+        boardlib.__main__.write_entries(expected, records)
+        actual = io.StringIO()
+        boardlib.__main__.write_entries_frame(
+            actual, pd.DataFrame(records), chunk_size=2
+        )
+        self.assertEqual(actual.getvalue(), expected.getvalue())
+
+    def test_write_entries_frame_empty(self):
+        output = io.StringIO()
+        boardlib.__main__.write_entries_frame(output, pd.DataFrame())
+        self.assertEqual(
+            output.getvalue(), ",".join(boardlib.__main__.LOGBOOK_FIELDS) + "\r\n"
+        )
+        output = io.StringIO()
+        boardlib.__main__.write_entries_frame(output, pd.DataFrame(), no_headers=True)
+        self.assertEqual(output.getvalue(), "")
+
+    def test_typed_logbook_frame(self):
+        logbook_df = boardlib.__main__.typed_logbook_frame(MOON_ENTRIES)
+        self.assertEqual(list(logbook_df.columns), list(boardlib.__main__.LOGBOOK_FIELDS))
+        self.assertTrue(pd.api.types.is_datetime64_any_dtype(logbook_df["date"]))
+        self.assertEqual(str(logbook_df["is_benchmark"].dtype), "boolean")
+        self.assertEqual(str(logbook_df["displayed_grade"].dtype), "category")
+        self.assertEqual(str(logbook_df["angle"].dtype), "Int64")
+        self.assertEqual(list(logbook_df["tries"]), ["4+", "1"])
+        # Fields which Moon entries do not have are empty
+        self.assertTrue(logbook_df["is_repeat"].isna().all())
+
+    def test_write_entries_ndjson(self):
+        output = io.StringIO()
+        boardlib.__main__.write_logbook(
+            output, iter(MOON_ENTRIES), output_format="ndjson"
+        )
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["date"], "2023-09-05T00:00:00")
+        self.assertEqual(records[0]["is_benchmark"], True)
+        self.assertIsNone(records[0]["is_repeat"])
+
+    def test_write_entries_ndjson_chunks(self):
+        # Only the last chunk has tries which are not numbers
+        entries = [
+            {**MOON_ENTRIES[1], "tries": tries} for tries in ("1", "2", "3", "4+")
+        ]
+        output = io.StringIO()
+        boardlib.__main__.write_entries_ndjson(output, iter(entries), chunk_size=1)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([record["tries"] for record in records], ["1", "2", "3", "4+"])
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "requires pyarrow")
+    def test_write_logbook_columnar(self):
+        expected = boardlib.__main__.typed_logbook_frame(MOON_ENTRIES)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for output_format in boardlib.__main__.COLUMNAR_FORMATS:
+                output_path = os.path.join(tmpdir, f"logbook.{output_format}")
+                boardlib.__main__.write_logbook_columnar(
+                    output_path, MOON_ENTRIES, output_format
+                )
+                read = getattr(pd, f"read_{output_format}")
+                pd.testing.assert_frame_equal(read(output_path), expected)
+
+    def test_print_summary_table(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            boardlib.__main__.print_summary_table(
+                [
+                    {"board": "kilter", "database": "downloaded"},
+                    {"board": "tension", "database": "failed"},
+                ],
+                ("board", "database"),
+            )
+        self.assertEqual(
+            output.getvalue().splitlines(),
+            [
+                "board    database",
+                "-------  ----------",
+                "kilter   downloaded",
+                "tension  failed",
+            ],
+        )
+
+    def test_concurrency_must_be_positive(self):
+        parser = argparse.ArgumentParser()
+        boardlib.__main__.add_images_parser(parser.add_subparsers())
+        args = parser.parse_args(["images", "kilter", "kilter.db", "images", "--concurrency", "3"])
+        self.assertEqual(args.concurrency, 3)
+        for concurrency in ("0", "-2", "many"):
+            with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                parser.parse_args(
+                    ["images", "kilter", "kilter.db", "images", "--concurrency", concurrency]
+                )
+
+    def test_download_all(self):
+        boards = ["kilter", "tension", "decoy"]
+        # Every board waits for the others, so the boards must be processed in parallel
+        barrier = threading.Barrier(len(boards), timeout=5)
+
+        def download_database(board, output_file, session=None, progress_callback=None):
+            barrier.wait()
+            if board == "tension":
+                raise ValueError("Server unavailable")
+            output_file.write_bytes(b"")
+            return "sha256"
+
+        def download_images(board, *args, **kwargs):
+            return {"1.png": ValueError("Not found")} if board == "decoy" else {}
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            parser = argparse.ArgumentParser()
+            boardlib.__main__.add_download_all_parser(parser.add_subparsers())
+            args = parser.parse_args(
+                ["download-all", tmpdir, "-u", "user", "-j", "3", "-b", *boards]
+            )
+            output = io.StringIO()
+            with unittest.mock.patch(
+                "boardlib.db.aurora.download_database", side_effect=download_database
+            ), unittest.mock.patch(
+                "boardlib.__main__.sync_database",
+                return_value={
+                    "climbs": {"inserted": 2, "updated": 1, "unchanged": 100, "deleted": 0},
+                    "climb_stats": {"inserted": 0, "updated": 0, "unchanged": 50, "deleted": 3},
+                },
+            ) as mock_sync_database, unittest.mock.patch(
+                "boardlib.api.aurora.download_images", side_effect=download_images
+            ) as mock_download_images, unittest.mock.patch(
+                "boardlib.__main__.get_password", return_value="password"
+            ), unittest.mock.patch(
+                "boardlib.__main__.get_aurora_login_token", return_value="token"
+            ), contextlib.redirect_stdout(
+                output
+            ):
+                args.func(args)
+
+        # The failed database download stops that board before its sync and images
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_sync_database.call_args_list),
+            ["decoy", "kilter"],
+        )
+        self.assertEqual(
+            sorted(call.args[0] for call in mock_download_images.call_args_list),
+            ["decoy", "kilter"],
+        )
+        lines = output.getvalue().splitlines()
+        done = lines.index("Done.")
+        table = lines[done - 6 : done - 1]
+        self.assertEqual(
+            table[0].split(), ["board", "database", "synced_rows", "images", "seconds"]
+        )
+        # Rows follow the order of the boards, and unchanged rows are not counted as synced
+        self.assertEqual(
+            [row.split()[:-1] for row in table[2:]],
+            [
+                ["kilter", "downloaded", "6", "ok"],
+                ["tension", "failed", "-", "-"],
+                ["decoy", "downloaded", "6", "1", "failed"],
+            ],
+        )
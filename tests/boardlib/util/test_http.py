@@ -0,0 +1,17 @@
+import unittest
+
+import boardlib.util.http
+
+
+class TestHttp(unittest.TestCase):
+    def test_create_session(self):
+        session = boardlib.util.http.create_session(
+            pool_size=4, headers={"User-Agent": "test"}
+        )
+        adapter = session.get_adapter("https://kilterboardapp.com")
+        self.assertEqual(adapter._pool_maxsize, 4)
+        self.assertEqual(session.headers["User-Agent"], "test")
+
+
+if __name__ == "__main__":
+    unittest.main()
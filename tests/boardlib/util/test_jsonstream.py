@@ -0,0 +1,55 @@
+import json
+import unittest
+
+import boardlib.util.jsonstream
+
+
+def decode(chunks):
+    return {
+        key: list(value) if not isinstance(value, (str, int, float, bool)) else value
+        for key, value in boardlib.util.jsonstream.iter_object_items(chunks)
+    }
+
+
+class TestJsonStream(unittest.TestCase):
+    document = {
+        "climbs": [
+            {"uuid": "a", "name": "Crème brûlée", "angle": 40},
+            {"uuid": "b", "name": "Test", "angle": 12345, "frames": None},
+        ],
+        "climb_stats": [],
+        "shared_syncs": [{"table_name": "climbs", "last_synchronized_at": "x"}],
+        "_complete": True,
+        "count": 1234567,
+    }
+
+    def test_iter_object_items(self):
+        text = json.dumps(self.document, indent=1, ensure_ascii=False)
+        self.assertEqual(decode([text]), self.document)
+
+    def test_iter_object_items_byte_chunks(self):
+        data = json.dumps(self.document, ensure_ascii=False).encode("utf-8")
+        self.assertEqual(
+            decode(data[i : i + 1] for i in range(len(data))), self.document
+        )
+
+    def test_iter_object_items_skips_unconsumed(self):
+        items = boardlib.util.jsonstream.iter_object_items([json.dumps(self.document)])
+        keys = [key for key, _ in items]
+        self.assertEqual(keys, list(self.document))
+
+    def test_iter_object_items_split_numbers(self):
+        self.assertEqual(decode(['{"n": 15.', "25}"]), {"n": 15.25})
+        self.assertEqual(decode(['{"n": 1e', "-3}"]), {"n": 1e-3})
+        self.assertEqual(decode(['{"n": [3.', "5, -", "2]}"]), {"n": [3.5, -2]})
+
+    def test_iter_object_items_empty(self):
+        self.assertEqual(decode(["{ }"]), {})
+
+    def test_iter_object_items_truncated(self):
+        with self.assertRaises(ValueError):
+            decode([json.dumps(self.document)[:-20]])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import threading
+import time
+import unittest
+
+import boardlib.util.pipeline
+
+
+class TestPipeline(unittest.TestCase):
+    def test_prefetch_order(self):
+        self.assertEqual(
+            list(boardlib.util.pipeline.prefetch(iter(range(100)), depth=2)),
+            list(range(100)),
+        )
+
+    def test_prefetch_runs_ahead(self):
+        produced = []
+
+        def producer():
+            for i in range(3):
+                produced.append(i)
+                yield i
+
+        items = boardlib.util.pipeline.prefetch(producer(), depth=4)
+        self.assertEqual(next(items), 0)
+        time.sleep(0.1)
+        self.assertEqual(produced, [0, 1, 2])
+        self.assertEqual(list(items), [1, 2])
+
+    def test_prefetch_error(self):
+        def producer():
+            yield 1
+            raise ValueError("test")
+
+        items = boardlib.util.pipeline.prefetch(producer())
+        self.assertEqual(next(items), 1)
+        with self.assertRaises(ValueError):
+            next(items)
+
+    def test_prefetch_close(self):
+        def producer():
+            i = 0
+            while True:
+                yield i
+                i += 1
+
+        threads_before = set(threading.enumerate())
+        items = boardlib.util.pipeline.prefetch(producer(), depth=1)
+        next(items)
+        # Other tests' threads may still be alive, so only check the producer thread started by prefetch
+        (producer_thread,) = set(threading.enumerate()) - threads_before
+        items.close()
+        self.assertFalse(producer_thread.is_alive())
+
+
+if __name__ == "__main__":
+    unittest.main()